@@ -1,23 +1,48 @@
 import asyncio
+import hmac
 import logging
+import math
 import os
 import re
 import tempfile
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from mutagen import File as MutagenFile
-
 import httpx
 import socketio
-from deepgram import AsyncDeepgramClient
+from deepgram import AsyncDeepgramClient, DeepgramClientEnvironment
 from deepgram.core.events import EventType
 from deepgram.listen.v1.types import ListenV1Results, ListenV1Metadata
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.formparsers import MultiPartException, MultiPartParser
 
-from stt.options import clean_params, Mode
+from common.audio_buffer import AudioBuffer
+from common.audio_index import (
+    SeekError, byte_range, get_index, load_resume_point, save_resume_point, time_at,
+)
+from common.cluster import SessionRouter, make_client_manager
+from common.emission import InterimEmitter
+from common.jobs import JOBS_DIR, JobManager, JobQueueFull
+from common.latency import LatencyTracker
+from common.loop_lag import LoopLagMonitor
+from common.metrics import REGISTRY, Counter, Gauge, Histogram
+from common.result_cache import RESULT_CACHE_URL_TTL, ResultCache, cache_key, text_id
+from common.segmented import (
+    SEGMENT_CONCURRENCY, SEGMENT_MAX_CONCURRENCY, SEGMENT_SECONDS, merge_results, plan_segments,
+    segment_body, segment_prefix,
+)
+from common.sessions import AdmissionCancelled, AdmissionRejected, SessionRegistry, SessionState
+from common.silence_gate import SILENCE_KEEPALIVE_SECONDS, SilenceGate
+from common.tee import AudioTee
+from common.transcript_store import EXPORT_FORMATS, TRANSCRIPT_DIR, Transcript, TranscriptStore, write_export
+from common.uploads import (
+    UPLOAD_MAX_BYTES, UploadTooLarge, aiter_path, capped, iter_file, safe_filename, save_upload,
+)
+from common.upstream import UpstreamPool, websocket_base
+from stt.profiles import Profile, ProfileError, compile_profile, get_profile, register_profile, registered_profiles
 
 load_dotenv()
 
@@ -25,17 +50,56 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 PORT = int(os.getenv("PORT", 8001))
+SESSIONS_ADMIN_TOKEN = os.getenv("SESSIONS_ADMIN_TOKEN", "")  # bearer token for POST /api/sessions/{sid}/stop
 TEMP_DIR = Path(tempfile.gettempdir()) / "deepgram-stt"
 TEMP_DIR.mkdir(exist_ok=True)
 
 # 1. AsyncServer — async_mode MUST be "asgi" (not "gevent", not "threading")
+# With SOCKETIO_MESSAGE_QUEUE set, workers share a pub/sub client manager so emits
+# reach clients on any worker, and the router forwards session commands to the
+# worker that holds the Deepgram socket.
+client_manager = make_client_manager()
 sio = socketio.AsyncServer(
     async_mode="asgi",
     cors_allowed_origins="*",
+    client_manager=client_manager,
 )
+router = SessionRouter(client_manager)
+
+# Shared, pooled HTTP client for every Deepgram REST call (TTS + batch STT).
+# Opened lazily on first use, closed by the FastAPI lifespan on shutdown.
+upstream = UpstreamPool()
+
+# Streaming connects (deepgram-sdk WebSockets) follow the same base URL, so DEEPGRAM_BASE_URL
+# can point the whole app at a stand-in such as scripts/mock_deepgram.py
+DEEPGRAM_ENVIRONMENT = DeepgramClientEnvironment(
+    base=upstream.base_url,
+    production=websocket_base(upstream.base_url),
+    agent=DeepgramClientEnvironment.PRODUCTION.agent,
+)
+
+# Content-addressed batch/streaming result cache shared by /transcribe and /api/tts-transcribe
+result_cache = ResultCache()
 
-# 2. FastAPI sub-app for HTTP routes only
-fastapi_app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    upstream.client  # open the pool eagerly when served by uvicorn
+    router.start(sio)
+    await router.broadcast("profiles_sync")  # learn the profiles registered before this worker started
+    loop_lag.start()
+    await jobs.start()  # re-queues jobs interrupted by the last shutdown
+    try:
+        yield
+    finally:
+        await router.aclose()
+        await loop_lag.aclose()
+        await jobs.aclose()
+        await upstream.aclose()
+
+
+# 2. FastAPI sub-app for HTTP routes only (socketio.ASGIApp forwards lifespan events here)
+fastapi_app = FastAPI(lifespan=lifespan)
 fastapi_app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # 3. Combined ASGI callable — THIS is what uvicorn serves, not fastapi_app
@@ -50,11 +114,182 @@ def _clean_error(e: Exception) -> str:
     return msg
 
 
-# Per-session state — module-level dict, not sio.session() (too slow for audio hot path)
-# Key: SocketIO session id (sid)
-# Value: dict with keys: task (asyncio.Task), stop_event (asyncio.Event),
-#        ws (AsyncV1SocketClient | None), request_id (str | None)
-_sessions: dict[str, dict] = {}
+def _error_cause(e: Exception) -> str:
+    """Coarse stream_error cause label for metrics."""
+    status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+    if status is None:
+        m = re.search(r'status_code:\s*(\d+)', str(e))
+        status = int(m.group(1)) if m else None
+    if status in (401, 403):
+        return "auth"
+    if status == 429:
+        return "rate_limit"
+    if status is not None:
+        return "upstream_4xx" if status < 500 else "upstream_5xx"
+    if isinstance(e, (OSError, asyncio.TimeoutError)):
+        return "network"
+    return "internal"
+
+
+# Per-session state — module-level registry, not sio.session() (too slow for audio hot path)
+# Key: SocketIO session id (sid); value: SessionState. Starting a stream goes through
+# _sessions.admit(), which caps concurrent upstream streams per process and per API key.
+_sessions = SessionRegistry()
+
+# Server-side transcript per stream (same sid keys), kept after the stream ends for
+# TRANSCRIPT_RETENTION seconds so a reloaded page or second tab can fetch it
+transcripts = TranscriptStore()
+
+
+# --- Metrics (Prometheus text at /metrics) ---
+# Children are resolved once so hot-path updates are a single attribute increment.
+
+def _active_sessions() -> dict:
+    counts = {("mic",): 0, ("file",): 0}
+    for session in list(_sessions.values()):
+        counts[(session.kind,)] = counts.get((session.kind,), 0) + 1
+    return counts
+
+
+Gauge("stt_active_sessions", "Active streaming sessions by kind.", ["kind"], fn=_active_sessions)
+Gauge("stt_queued_sessions", "Stream starts waiting for an upstream slot.", fn=lambda: _sessions.occupancy()["queued"])
+Counter("stt_session_admissions_total", "Stream start admission outcomes.", ["outcome"],
+        fn=lambda: {("admitted",): _sessions.admitted, ("queued",): _sessions.queued,
+                    ("rejected",): _sessions.rejected})
+AUDIO_BYTES_IN = Counter("stt_audio_bytes_in_total", "Audio bytes received from clients or files.", ["kind"])
+AUDIO_BYTES_OUT = Counter("stt_audio_bytes_out_total", "Audio bytes sent to Deepgram.", ["kind"])
+SEND_MEDIA_ERRORS = Counter("stt_send_media_errors_total", "Failed send_media calls.", ["kind"])
+KEEPALIVE_FAILURES = Counter("stt_keepalive_failures_total", "Failed KeepAlive sends.")
+UPSTREAM_CONNECT_SECONDS = Histogram(
+    "stt_upstream_connect_seconds", "Deepgram WebSocket connect time.", ["kind"]
+)
+BATCH_REQUEST_SECONDS = Histogram(
+    "stt_batch_request_seconds", "Upstream batch (pre-recorded) request latency.", ["route"]
+)
+TRANSCRIPT_LATENCY_SECONDS = Histogram(
+    "stt_transcript_latency_seconds", "Result arrival minus when its audio was sent (file) or captured (mic).",
+    ["kind", "result"],
+)
+TIME_TO_FIRST_TRANSCRIPT_SECONDS = Histogram(
+    "stt_time_to_first_transcript_seconds", "First audio to first non-empty transcript.", ["kind"]
+)
+SILENCE_SKIPPED_SECONDS = Counter(
+    "stt_silence_skipped_seconds_total", "Silent audio not sent upstream (silence_gate).", ["kind"]
+)
+STREAM_ERRORS = Counter("stt_stream_errors_total", "stream_error events emitted, by cause.", ["cause"])
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "stt_event_loop_lag_seconds", "How late a 100 ms event-loop timer fires.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+loop_lag = LoopLagMonitor(EVENT_LOOP_LAG_SECONDS.labels().observe)
+Gauge("stt_event_loop_lag_max_seconds", "Worst event-loop lag since start.", fn=lambda: loop_lag.max_lag)
+Gauge("stt_transcript_words", "Final words held in server-side transcripts.",
+      fn=lambda: transcripts.stats()["words"])
+Gauge("stt_upstream_pool_connections", "Pooled upstream HTTP connections by state.", ["state"],
+      fn=lambda: {(k,): upstream.stats()[k] for k in ("in_use", "idle")})
+Counter("stt_upstream_pool_handshakes_total", "Upstream TCP connects and TLS handshakes.", ["kind"],
+        fn=lambda: {(k,): upstream.stats()[k] for k in ("connects", "tls_handshakes")})
+Counter("stt_result_cache_events_total", "Result cache hits, misses and evictions.", ["event"],
+        fn=lambda: {(k,): v for k, v in result_cache.counters.items()})
+
+_mic_bytes_in = AUDIO_BYTES_IN.labels("mic")
+_mic_bytes_out = AUDIO_BYTES_OUT.labels("mic")
+_file_bytes_in = AUDIO_BYTES_IN.labels("file")
+_file_bytes_out = AUDIO_BYTES_OUT.labels("file")
+_transcribe_seconds = BATCH_REQUEST_SECONDS.labels("transcribe")
+_tts_batch_seconds = BATCH_REQUEST_SECONDS.labels("tts-transcribe")
+_job_seconds = BATCH_REQUEST_SECONDS.labels("job")
+_segment_seconds = BATCH_REQUEST_SECONDS.labels("transcribe-segment")
+
+
+def _observe_result(
+    tracker: LatencyTracker, kind: str, msg: ListenV1Results, transcript: str, gate: SilenceGate | None = None,
+) -> None:
+    """Feed one result into the session's latency tracker and the latency histograms."""
+    had_ttft = tracker.time_to_first_transcript is not None
+    is_final = bool(msg.is_final)
+    end = msg.start + msg.duration
+    if gate:
+        end = gate.to_original(end)  # positions are tracked on the original timeline
+    latency = tracker.observe(end, is_final, bool(transcript.strip()))
+    if latency is not None:
+        TRANSCRIPT_LATENCY_SECONDS.labels(kind, "final" if is_final else "interim").observe(latency)
+    if not had_ttft and tracker.time_to_first_transcript is not None:
+        TIME_TO_FIRST_TRANSCRIPT_SECONDS.labels(kind).observe(tracker.time_to_first_transcript)
+
+
+async def _emit_latency_stats(sid: str, params: dict, tracker: LatencyTracker) -> None:
+    """Optional end-of-stream latency summary (params.latency_stats=true)."""
+    if params.get("latency_stats"):
+        await sio.emit("latency_stats", tracker.summary(), to=sid)
+
+
+def _silence_stats(kind: str, params, gate: SilenceGate | None) -> dict:
+    """stream_finished extra for sessions that asked for silence_gate."""
+    if not params.get("silence_gate"):
+        return {}
+    if gate is None:
+        return {"silence_stats": {"enabled": False, "reason": "silence_gate needs linear16 or PCM WAV audio"}}
+    stats = gate.stats()
+    SILENCE_SKIPPED_SECONDS.labels(kind).inc(stats["seconds_saved"])
+    return {"silence_stats": {"enabled": True, **stats}}
+
+
+def _result_words(msg: ListenV1Results, to_time=None) -> list[tuple]:
+    """(word, start, end, confidence, speaker) per word of a result, for the transcript store.
+    `to_time` maps stream times onto the audio's own timeline (file offset, silence cuts).
+    """
+    return [
+        (w.punctuated_word or w.word,
+         to_time(w.start) if to_time else w.start,
+         to_time(w.end) if to_time else w.end,
+         w.confidence, getattr(w, "speaker", None))
+        for w in msg.channel.alternatives[0].words
+    ]
+
+
+async def _finish_transcript(sid: str, transcript: Transcript) -> dict:
+    """stream_finished extra: retain the stream's transcript (and write it to
+    TRANSCRIPT_DIR when set) and summarize it.
+    """
+    transcripts.finish(sid, transcript)
+    if TRANSCRIPT_DIR:
+        try:
+            await asyncio.to_thread(write_export, transcript, TRANSCRIPT_DIR)
+        except OSError as e:
+            logger.warning("[%s] could not export transcript: %s", sid, e)
+    return {"transcript": transcript.stats()}
+
+
+async def _emit_stream_error(sid: str, message: str, cause: str, **extra) -> None:
+    STREAM_ERRORS.labels(cause).inc()
+    await sio.emit("stream_error", {"message": message, **extra}, to=sid)
+
+
+async def _admit(state: SessionState) -> bool:
+    """Claim an upstream stream slot for `state`, queueing if the server is at capacity.
+    On rejection emits stream_error with a retry_after hint (seconds) and returns False.
+    """
+    async def on_queued(position: int) -> None:
+        await sio.emit("stream_queued", {"position": position, "timeout": _sessions.queue_timeout},
+                       to=state.sid)
+
+    try:
+        await _sessions.admit(state, on_queued)
+    except AdmissionCancelled:
+        return False  # stopped or disconnected while queued
+    except AdmissionRejected as e:
+        await _emit_stream_error(state.sid, str(e), "capacity", retry_after=e.retry_after)
+        return False
+    await router.claim(state.sid)
+    return True
+
+
+async def _release(state: SessionState | None) -> None:
+    """Free the session's stream slot and drop this worker's ownership claim."""
+    _sessions.release(state)
+    if state is not None and state.sid not in _sessions:
+        await router.release(state.sid)
 
 
 # --- HTTP Routes ---
@@ -64,70 +299,177 @@ async def index():
     return FileResponse("templates/index.html")
 
 
+# Allowance for multipart boundaries/headers when pre-checking Content-Length
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
 @fastapi_app.post("/upload")
-async def upload(file: UploadFile = File(...)):
-    path = TEMP_DIR / file.filename
-    content = await file.read()
-    path.write_bytes(content)
-    return JSONResponse({"filename": file.filename, "size": path.stat().st_size})
+async def upload(request: Request, filename: str | None = None):
+    """Persist an upload to TEMP_DIR in chunks, never holding the whole file in memory.
+    Accepts multipart/form-data with a `file` field (browser), or a raw request
+    body with `?filename=` (streamed straight from the socket to disk).
+    """
+    length = int(request.headers.get("content-length") or 0)
+    if length > UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD:
+        return JSONResponse({"error": f"file exceeds {UPLOAD_MAX_BYTES} bytes"}, status_code=413)
+
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            # Parse from a byte-counted stream so the cap holds while Starlette spools the
+            # file part (to disk past 1 MB), with or without a Content-Length header.
+            # Closing the form deletes the spool.
+            parser = MultiPartParser(
+                request.headers, capped(request.stream(), UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD), max_files=1,
+            )
+            form = await parser.parse()
+            try:
+                file = form.get("file")
+                if not hasattr(file, "read"):
+                    return JSONResponse({"error": "file is required"}, status_code=400)
+                name = safe_filename(file.filename)
+                meta = await save_upload(iter_file(file), TEMP_DIR / name, UPLOAD_MAX_BYTES)
+            finally:
+                await form.close()
+        else:
+            name = safe_filename(filename)
+            meta = await save_upload(request.stream(), TEMP_DIR / name, UPLOAD_MAX_BYTES)
+    except (ValueError, MultiPartException) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except UploadTooLarge as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+
+    return JSONResponse({"filename": name, **meta})
+
+
+@fastapi_app.get("/api/upstream-stats")
+async def upstream_stats():
+    return JSONResponse(upstream.stats())
+
+
+@fastapi_app.get("/api/cache-stats")
+async def cache_stats():
+    return JSONResponse(result_cache.stats())
+
+
+@fastapi_app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@fastapi_app.get("/api/sessions")
+async def session_stats():
+    """Stream slot occupancy, plus active sessions with per-session audio queue depth
+    and drop counters.
+    """
+    sessions = {}
+    for sid, session in list(_sessions.items()):
+        buffer = session.buffer
+        sessions[sid] = {"kind": session.kind, **(buffer.stats() if buffer else {})}
+    return JSONResponse({"occupancy": _sessions.occupancy(), "cluster": router.stats(), "sessions": sessions})
+
+
+@fastapi_app.post("/api/sessions/{sid}/stop")
+async def stop_session(sid: str, request: Request):
+    """Stop a live stream from any worker; the owning worker emits stream_finished.
+    An admin operation: needs `Authorization: Bearer <SESSIONS_ADMIN_TOKEN>`, and is
+    disabled while that is unset. Clients stop their own streams over the socket.
+    """
+    if not SESSIONS_ADMIN_TOKEN:
+        return JSONResponse({"error": "session admin API disabled (SESSIONS_ADMIN_TOKEN unset)"}, status_code=403)
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.encode(), SESSIONS_ADMIN_TOKEN.encode()):
+        return JSONResponse({"error": "unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    if await _stop_local(sid) or await router.forward("stop", sid):
+        return JSONResponse({"sid": sid, "stopping": True}, status_code=202)
+    return JSONResponse({"error": "no such session"}, status_code=404)
+
+
+@fastapi_app.get("/api/sessions/{sid}/transcript")
+async def export_transcript(sid: str, format: str = "json", token: str = ""):
+    """A stream's server-side transcript (live, or finished within TRANSCRIPT_RETENTION)
+    as columnar JSON or plain text. `token` is the transcript_token from stream_started.
+    """
+    if format not in EXPORT_FORMATS:
+        return JSONResponse({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}, status_code=400)
+    transcript = transcripts.get(sid)
+    # A wrong token looks the same as no transcript, so sids can't be probed
+    if transcript is None or not transcript.authorized(token):
+        return JSONResponse({"error": "no transcript for this session"}, status_code=404)
+    if format == "text":
+        return PlainTextResponse(transcript.export("text"))
+    return JSONResponse(transcript.export("json"))
+
+
+@fastapi_app.post("/api/profiles")
+async def create_profile(request: Request):
+    """HTTP form of the register_profile event: compile params, return their profile_id."""
+    body = await _json_body(request)
+    if body is None:
+        return JSONResponse({"error": "request body must be a JSON object"}, status_code=400)
+    try:
+        profile = await _register_profile(body.get("params", body))
+    except ProfileError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"profile_id": profile.id, "streaming": dict(profile.streaming),
+                         "batch": dict(profile.batch)}, status_code=201)
 
 
 @fastapi_app.get("/files/{filename}")
 async def serve_file(filename: str):
-    path = TEMP_DIR / filename
+    try:
+        path = TEMP_DIR / safe_filename(filename)
+    except ValueError:
+        return JSONResponse({"error": "not found"}, status_code=404)
     if not path.exists():
         return JSONResponse({"error": "not found"}, status_code=404)
     return FileResponse(path)
 
 
-async def _tts_generate(text: str, tts_model: str, api_key: str) -> bytes:
-    """Call Deepgram TTS and return MP3 bytes."""
-    headers = {"Authorization": f"Token {api_key}"}
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(
-            "https://api.deepgram.com/v1/speak",
-            headers={**headers, "Content-Type": "application/json"},
-            params={"model": tts_model, "encoding": "mp3"},
-            json={"text": text},
-        )
-        resp.raise_for_status()
-        return resp.content
-
-
-async def _stt_batch(audio_bytes: bytes, stt_params: dict, api_key: str) -> dict:
+async def _stt_batch(
+    audio_bytes: bytes, stt_params: dict, api_key: str, content_type: str = "audio/mp3",
+    timer=None, timeout: float = 60.0,
+) -> dict:
     """Transcribe audio bytes via Deepgram pre-recorded (batch) API."""
     headers = {"Authorization": f"Token {api_key}"}
-    clean = clean_params(stt_params, Mode.BATCH)
-    query_params = {}
-    for k, v in clean.items():
-        if isinstance(v, bool):
-            query_params[k] = "true" if v else "false"
-        elif isinstance(v, (list, str)):
-            query_params[k] = v
-        else:
-            query_params[k] = str(v)
-    query_params.setdefault("model", "nova-2")
+    query_params = _profile(stt_params).batch
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(
-            "https://api.deepgram.com/v1/listen",
-            headers={**headers, "Content-Type": "audio/mp3"},
+    with (timer or _tts_batch_seconds).time():
+        resp = await upstream.client.post(
+            "/v1/listen",
+            headers={**headers, "Content-Type": content_type},
             params=query_params,
             content=audio_bytes,
+            timeout=timeout,
         )
-        resp.raise_for_status()
-        return resp.json()
+    resp.raise_for_status()
+    return resp.json()
 
 
-async def _stt_streaming(text: str, tts_model: str, stt_params: dict, api_key: str) -> dict:
-    """Pipe Deepgram TTS streaming response directly into the STT WebSocket.
-    TTS audio chunks are forwarded to STT as they arrive — naturally paced at
-    speech speed, no buffering or artificial timing needed.
+async def _tts_stream(text: str, tts_model: str, api_key: str):
+    """Yield Deepgram TTS MP3 chunks as the streamed response arrives."""
+    headers = {"Authorization": f"Token {api_key}"}
+    async with upstream.client.stream(
+        "POST",
+        "/v1/speak",
+        headers={**headers, "Content-Type": "application/json"},
+        params={"model": tts_model, "encoding": "mp3"},
+        json={"text": text},
+        timeout=60.0,
+    ) as tts_resp:
+        tts_resp.raise_for_status()
+        async for chunk in tts_resp.aiter_bytes(chunk_size=4096):
+            yield chunk
+
+
+async def _stt_streaming(audio_chunks, stt_params: dict, api_key: str, marks: dict | None = None) -> dict:
+    """Pipe an async iterator of audio chunks (e.g. a TTS stream) into the STT WebSocket.
+    Chunks are forwarded to STT as they arrive — naturally paced at speech
+    speed, no buffering or artificial timing needed. `marks`, if given, gets the
+    loop time of the first non-empty final as "first_final".
     Returns {"transcript": str, "segments": list}.
     """
-    dg = AsyncDeepgramClient(api_key=api_key)
-    sdk_kwargs = _params_to_sdk_kwargs(stt_params)
-    headers = {"Authorization": f"Token {api_key}"}
+    dg = AsyncDeepgramClient(api_key=api_key, environment=DEEPGRAM_ENVIRONMENT)
+    sdk_kwargs = _profile(stt_params).streaming
 
     segments = []
 
@@ -137,22 +479,14 @@ async def _stt_streaming(text: str, tts_model: str, stt_params: dict, api_key: s
                 t = msg.channel.alternatives[0].transcript
                 if t.strip():
                     segments.append(t)
+                    if marks is not None:
+                        marks.setdefault("first_final", asyncio.get_running_loop().time())
 
         ws.on(EventType.MESSAGE, on_message)
         listen_task = asyncio.create_task(ws.start_listening())
 
-        # Stream TTS audio directly into STT WebSocket as chunks arrive
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            async with client.stream(
-                "POST",
-                "https://api.deepgram.com/v1/speak",
-                headers={**headers, "Content-Type": "application/json"},
-                params={"model": tts_model, "encoding": "mp3"},
-                json={"text": text},
-            ) as tts_resp:
-                tts_resp.raise_for_status()
-                async for chunk in tts_resp.aiter_bytes(chunk_size=4096):
-                    await ws.send_media(chunk)
+        async for chunk in audio_chunks:
+            await ws.send_media(chunk)
 
         await ws.send_close_stream()
         await listen_task
@@ -165,11 +499,14 @@ async def _stt_streaming(text: str, tts_model: str, stt_params: dict, api_key: s
 
 @fastapi_app.post("/api/tts-transcribe")
 async def tts_transcribe(request: Request):
-    body = await request.json()
+    body = await _json_body(request)
+    if body is None:
+        return JSONResponse({"error": "request body must be a JSON object"}, status_code=400)
     text = body.get("text", "").strip()
     tts_model = body.get("tts_model", "aura-2-asteria-en")
     stt_params = body.get("stt_params", {})
     mode = body.get("mode", "batch")  # "batch" | "streaming" | "both"
+    no_cache = bool(body.get("no_cache", False))
 
     if not text:
         return JSONResponse({"error": "text is required"}, status_code=400)
@@ -177,141 +514,601 @@ async def tts_transcribe(request: Request):
         return JSONResponse({"error": "mode must be batch, streaming, or both"}, status_code=400)
 
     api_key = os.getenv("DEEPGRAM_API_KEY", "")
+    # Synthesized audio is identified by its inputs, so cache hits skip TTS as well as STT
+    audio_id = text_id("tts", tts_model, text)
+
+    # One TTS synthesis, pulled lazily and only if a leg misses the cache. The streaming
+    # leg consumes chunks live; the batch leg gets the full buffer once synthesis ends.
+    tts = AudioTee(lambda: _tts_stream(text, tts_model, api_key))
+
+    async def _batch_pipeline():
+        async def compute():
+            return await _stt_batch(await tts.read_all(), stt_params, api_key)
+
+        key = cache_key("batch", audio_id, dict(_profile(stt_params).batch))
+        return await result_cache.get_or_compute(key, compute, bypass=no_cache)
+
+    async def _streaming_pipeline():
+        key = cache_key("streaming", audio_id, dict(_profile(stt_params).streaming))
+        return await result_cache.get_or_compute(
+            key,
+            lambda: _stt_streaming(tts.subscribe(), stt_params, api_key),
+            bypass=no_cache,
+        )
 
     try:
         if mode == "batch":
-            audio_bytes = await _tts_generate(text, tts_model, api_key)
-            result = await _stt_batch(audio_bytes, stt_params, api_key)
-            return JSONResponse(result)
+            result, status = await _batch_pipeline()
+            return JSONResponse(result, headers={"X-Cache": status})
 
         elif mode == "streaming":
-            result = await _stt_streaming(text, tts_model, stt_params, api_key)
-            return JSONResponse(result)
-
-        else:  # both — batch buffers TTS bytes, streaming pipes TTS live; run in parallel
-            async def _batch_pipeline():
-                audio_bytes = await _tts_generate(text, tts_model, api_key)
-                return await _stt_batch(audio_bytes, stt_params, api_key)
+            result, status = await _streaming_pipeline()
+            return JSONResponse(result, headers={"X-Cache": status})
 
-            batch_result, stream_result = await asyncio.gather(
+        else:  # both — legs share one TTS stream and run in parallel
+            (batch_result, batch_status), (stream_result, stream_status) = await asyncio.gather(
                 _batch_pipeline(),
-                _stt_streaming(text, tts_model, stt_params, api_key),
+                _streaming_pipeline(),
+            )
+            return JSONResponse(
+                {"batch": batch_result, "streaming": stream_result},
+                headers={"X-Cache": f"batch={batch_status}, streaming={stream_status}"},
             )
-            return JSONResponse({"batch": batch_result, "streaming": stream_result})
 
     except httpx.HTTPStatusError as e:
         return JSONResponse({"error": str(e)}, status_code=e.response.status_code)
     except Exception as e:
         return JSONResponse({"error": _clean_error(e)}, status_code=500)
+    finally:
+        await tts.aclose()
+
+
+async def _batch_transcribe(
+    url: str | None, file_path: Path | None, params: dict | Profile, api_key: str,
+    timeout: float, timer, no_cache: bool = False,
+) -> tuple[dict, str]:
+    """Pre-recorded transcription of a URL or a local file, through the result cache.
+    Returns (result, cache status). Raises httpx.HTTPStatusError on upstream errors.
+    """
+    query_params = _profile(params).batch
+    headers = {"Authorization": f"Token {api_key}"}
+    if url:
+        audio_id = f"url:{url}"
+
+        async def compute():
+            with timer.time():
+                resp = await upstream.client.post(
+                    "/v1/listen",
+                    headers={**headers, "Content-Type": "application/json"},
+                    params=query_params,
+                    json={"url": url},
+                    timeout=timeout,
+                )
+            resp.raise_for_status()
+            return resp.json()
+    else:
+        # Hash, size and content type come from the upload's audio index, not a re-read
+        index = await asyncio.to_thread(get_index, file_path)
+        audio_id = index["sha256"]
+
+        async def compute():
+            # Stream the body from disk; explicit Content-Length avoids chunked encoding
+            with timer.time():
+                resp = await upstream.client.post(
+                    "/v1/listen",
+                    headers={
+                        **headers,
+                        "Content-Type": index["content_type"] or "audio/*",
+                        "Content-Length": str(index["size"]),
+                    },
+                    params=query_params,
+                    content=aiter_path(file_path),
+                    timeout=timeout,
+                )
+            resp.raise_for_status()
+            return resp.json()
+
+    key = cache_key("batch", audio_id, query_params)
+    # A URL names the audio, not its content: keep those results only briefly
+    ttl = RESULT_CACHE_URL_TTL if url else None
+    return await result_cache.get_or_compute(key, compute, bypass=no_cache, ttl=ttl)
+
+
+async def _segmented_transcribe(
+    file_path: Path, params: dict | Profile, api_key: str, target: float, concurrency: int,
+    timeout: float, timer, no_cache: bool = False,
+) -> tuple[dict, str]:
+    """Split a local file into ~`target`-second segments (common/segmented.py), transcribe
+    up to `concurrency` at once and merge them into one response, with per-segment timing
+    under `segmentation`. Returns (result, cache status). Raises SeekError for files that
+    can't be cut and httpx.HTTPStatusError on upstream errors.
+    """
+    query_params = _profile(params).batch
+    index = await asyncio.to_thread(get_index, file_path)
+    headers = {"Authorization": f"Token {api_key}", "Content-Type": index["content_type"] or "audio/*"}
+    segments = await asyncio.to_thread(plan_segments, file_path, index, target)
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(concurrency)
+    timings: list[dict | None] = [None] * len(segments)
+
+    async def transcribe_segment(segment) -> dict:
+        prefix = await asyncio.to_thread(segment_prefix, file_path, index, segment)
+        async with limit:
+            started = loop.time()
+            with _segment_seconds.time():
+                resp = await upstream.client.post(
+                    "/v1/listen",
+                    headers={**headers, "Content-Length": str(len(prefix) + segment.end_offset - segment.start_offset)},
+                    params=query_params,
+                    content=segment_body(file_path, segment, prefix),
+                    timeout=timeout,
+                )
+            resp.raise_for_status()
+            result = resp.json()
+            timings[segment.index] = {
+                "index": segment.index, "start": round(segment.start, 3), "end": round(segment.end, 3),
+                "seconds": round(loop.time() - started, 3),
+                "request_id": result.get("metadata", {}).get("request_id"),
+            }
+            return result
+
+    async def compute():
+        started = loop.time()
+        with timer.time():
+            tasks = [asyncio.create_task(transcribe_segment(seg)) for seg in segments]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()  # one failed segment fails the call; don't finish the rest
+                raise
+        wall = loop.time() - started
+        upstream_seconds = sum(t["seconds"] for t in timings)
+        merged = merge_results(results, segments)
+        merged["segmentation"] = {
+            "segments": timings,
+            "concurrency": concurrency,
+            "wall_seconds": round(wall, 3),
+            "upstream_seconds": round(upstream_seconds, 3),
+            "speedup": round(upstream_seconds / wall, 2) if wall else None,
+        }
+        return merged
+
+    # The result embeds per-segment timing, which depends on concurrency: key on it too
+    key = cache_key(
+        "batch-segmented", index["sha256"], {**query_params, "segment_seconds": target, "concurrency": concurrency},
+    )
+    return await result_cache.get_or_compute(key, compute, bypass=no_cache)
 
 
 @fastapi_app.post("/transcribe")
 async def transcribe(request: Request):
-    body = await request.json()
-    params = body.get("params", {})
+    body = await _json_body(request)
+    if body is None:
+        return JSONResponse({"error": "request body must be a JSON object"}, status_code=400)
     url = body.get("url")
     filename = body.get("filename")
 
     if not url and not filename:
         return JSONResponse({"error": "url or filename required"}, status_code=400)
+    try:
+        profile = _request_profile(body)
+    except ProfileError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
 
     api_key = os.getenv("DEEPGRAM_API_KEY", "")
+    no_cache = bool(body.get("no_cache", False))
 
-    # Build clean query params for batch mode, convert bools to lowercase strings
-    clean = clean_params(params, Mode.BATCH)
-    query_params = {}
-    for k, v in clean.items():
-        if isinstance(v, bool):
-            query_params[k] = "true" if v else "false"
-        elif isinstance(v, (list, str)):
-            query_params[k] = v
-        else:
-            query_params[k] = str(v)
-    query_params.setdefault("model", "nova-2")
-
-    headers = {"Authorization": f"Token {api_key}"}
+    file_path = None
+    if not url:
+        try:
+            file_path = TEMP_DIR / safe_filename(str(filename))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if not file_path.exists():
+            return JSONResponse({"error": "File not found"}, status_code=404)
 
     try:
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            if url:
-                resp = await client.post(
-                    "https://api.deepgram.com/v1/listen",
-                    headers={**headers, "Content-Type": "application/json"},
-                    params=query_params,
-                    json={"url": url},
-                )
-            else:
-                file_path = TEMP_DIR / filename
-                if not file_path.exists():
-                    return JSONResponse({"error": "File not found"}, status_code=404)
-                file_bytes = file_path.read_bytes()
-                resp = await client.post(
-                    "https://api.deepgram.com/v1/listen",
-                    headers={**headers, "Content-Type": "audio/*"},
-                    params=query_params,
-                    content=file_bytes,
-                )
-            resp.raise_for_status()
-            return JSONResponse(resp.json())
+        if body.get("segmented"):
+            if not file_path:
+                return JSONResponse({"error": "segmented mode needs an uploaded filename"}, status_code=400)
+            try:
+                target = float(body.get("segment_seconds") or SEGMENT_SECONDS)
+                concurrency = int(body.get("concurrency") or SEGMENT_CONCURRENCY)
+            except (TypeError, ValueError):
+                return JSONResponse({"error": "segment_seconds and concurrency must be numbers"}, status_code=400)
+            result, status = await _segmented_transcribe(
+                file_path, profile, api_key, target, max(1, min(concurrency, SEGMENT_MAX_CONCURRENCY)),
+                timeout=300.0, timer=_transcribe_seconds, no_cache=no_cache,
+            )
+        else:
+            result, status = await _batch_transcribe(
+                url, file_path, profile, api_key, timeout=300.0, timer=_transcribe_seconds, no_cache=no_cache,
+            )
+        return JSONResponse(result, headers={"X-Cache": status})
+    except SeekError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
     except httpx.HTTPStatusError as e:
         return JSONResponse({"error": str(e)}, status_code=e.response.status_code)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+# --- Profile fan-out ---
+# One audio source (uploaded file, URL or TTS text) transcribed with N profiles at once.
+# File legs each stream the upload from disk and URL legs pass the URL to Deepgram, as
+# /transcribe does, so neither is held in memory. TTS audio is synthesized once into an
+# AudioTee: batch legs share its joined buffer, streaming legs pipe chunks into their own
+# WebSocket as they arrive. Legs use the same cache keys as /transcribe and
+# /api/tts-transcribe, and the source is only read if some leg misses the cache.
+
+FANOUT_MAX_LEGS = int(os.getenv("FANOUT_MAX_LEGS", 8))
+_fanout_seconds = BATCH_REQUEST_SECONDS.labels("fanout")
+
+
+def _fanout_legs(data: dict) -> list[dict]:
+    """Validated legs from a fan-out request's `profiles` list. Each entry is an object with
+    a `profile_id` or inline `params`, plus optional `name` and `mode` (batch | streaming).
+    Raises ProfileError.
+    """
+    entries = data.get("profiles")
+    if not isinstance(entries, list) or not entries:
+        raise ProfileError("profiles must be a non-empty list")
+    if len(entries) > FANOUT_MAX_LEGS:
+        raise ProfileError(f"at most {FANOUT_MAX_LEGS} profiles per fan-out")
+    legs = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ProfileError(f"profiles[{i}] must be an object")
+        mode = entry.get("mode", "batch")
+        if mode not in ("batch", "streaming"):
+            raise ProfileError(f"profiles[{i}]: mode must be batch or streaming")
+        try:
+            profile = _request_profile(entry)
+        except ProfileError as e:
+            raise ProfileError(f"profiles[{i}]: {e}") from None
+        legs.append({"name": str(entry.get("name") or profile.id), "mode": mode, "profile": profile})
+    return legs
+
+
+async def _fanout_source(data: dict, api_key: str) -> dict:
+    """The request's audio source: `kind` (file | url | tts), `audio_id`, `view` (its
+    description in the response) and, by kind, `path`, `url` or `tee` + `content_type`.
+    Raises ValueError for a missing source and FileNotFoundError for an unknown upload.
+    """
+    if data.get("filename"):
+        file_path = TEMP_DIR / safe_filename(str(data["filename"]))
+        if not file_path.exists():
+            raise FileNotFoundError("File not found")
+        index = await asyncio.to_thread(get_index, file_path)
+        return {"kind": "file", "audio_id": index["sha256"], "path": file_path,
+                "view": {"kind": "file", "filename": file_path.name, "bytes": index["size"]}}
+    if data.get("url"):
+        url = str(data["url"])
+        return {"kind": "url", "audio_id": f"url:{url}", "url": url, "view": {"kind": "url", "url": url}}
+    text = str(data.get("text") or "").strip()
+    if text:
+        tts_model = data.get("tts_model", "aura-2-asteria-en")
+        return {"kind": "tts", "audio_id": text_id("tts", tts_model, text), "content_type": "audio/mp3",
+                "tee": AudioTee(lambda: _tts_stream(text, tts_model, api_key)),
+                "view": {"kind": "tts", "tts_model": tts_model}}
+    raise ValueError("filename, url or text required")
+
+
+async def _fanout(
+    source: dict, legs: list[dict], api_key: str, no_cache: bool = False, on_leg=None,
+) -> list[dict]:
+    """Run every leg concurrently over one source. A failed leg reports `error`
+    without cancelling the others. `latency` holds seconds since the fan-out started
+    (`seconds`), plus the upstream request time for batch legs that called Deepgram
+    (`upstream_seconds`) and the first non-empty final for streaming legs
+    (`first_final_seconds`). `on_leg` is awaited with each leg as it finishes.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    tee = source.get("tee")
+
+    async def run_leg(i: int, leg: dict) -> dict:
+        profile, marks = leg["profile"], {}
+        view = {"index": i, "name": leg["name"], "mode": leg["mode"], "profile_id": profile.id}
+        try:
+            if leg["mode"] == "batch" and tee is None:
+                marks["request"] = loop.time()
+                view["result"], view["cache"] = await _batch_transcribe(
+                    source.get("url"), source.get("path"), profile, api_key,
+                    timeout=300.0, timer=_fanout_seconds, no_cache=no_cache,
+                )
+            else:
+                if leg["mode"] == "batch":
+                    async def compute():
+                        audio = await tee.read_all()
+                        marks["request"] = loop.time()
+                        return await _stt_batch(
+                            audio, profile, api_key, source["content_type"], timer=_fanout_seconds, timeout=300.0,
+                        )
+
+                    key = cache_key("batch", source["audio_id"], profile.batch)
+                else:
+                    def compute():
+                        chunks = tee.subscribe() if tee else aiter_path(source["path"])
+                        return _stt_streaming(chunks, profile, api_key, marks)
+
+                    key = cache_key("streaming", source["audio_id"], profile.streaming)
+                view["result"], view["cache"] = await result_cache.get_or_compute(key, compute, bypass=no_cache)
+        except httpx.HTTPStatusError as e:
+            view["error"] = str(e)
+        except Exception as e:
+            view["error"] = _clean_error(e)
+        finished = loop.time()
+        latency = {"seconds": round(finished - started, 3)}
+        if "request" in marks and view.get("cache", "miss") in ("miss", "bypass"):
+            latency["upstream_seconds"] = round(finished - marks["request"], 3)
+        if "first_final" in marks:
+            latency["first_final_seconds"] = round(marks["first_final"] - started, 3)
+        view["latency"] = latency
+        if on_leg:
+            await on_leg(view)
+        return view
+
+    try:
+        return list(await asyncio.gather(*(run_leg(i, leg) for i, leg in enumerate(legs))))
+    finally:
+        if tee:
+            await tee.aclose()
+
+
+async def _fanout_request(data: dict, on_leg=None) -> dict:
+    """Shared body of POST /api/fanout and the `fanout` socket event.
+    Raises ValueError (incl. ProfileError) and FileNotFoundError for bad requests.
+    """
+    legs = _fanout_legs(data)
+    api_key = os.getenv("DEEPGRAM_API_KEY", "")
+    source = await _fanout_source(data, api_key)
+    if source["kind"] == "url" and any(leg["mode"] == "streaming" for leg in legs):
+        # The server never downloads URLs itself; Deepgram fetches them for batch legs
+        raise ProfileError("streaming legs need a filename or text source")
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = await _fanout(
+        source, legs, api_key, no_cache=bool(data.get("no_cache", False)), on_leg=on_leg,
+    )
+    view = source["view"]
+    if source.get("tee"):
+        view = {**view, "bytes": source["tee"].size}
+    return {
+        "source": view,
+        "legs": results,
+        "wall_seconds": round(loop.time() - started, 3),
+    }
+
+
+@fastapi_app.post("/api/fanout")
+async def fanout(request: Request):
+    """Transcribe one source with several profiles; results per leg, in request order."""
+    body = await _json_body(request)
+    if body is None:
+        return JSONResponse({"error": "request body must be a JSON object"}, status_code=400)
+    try:
+        return JSONResponse(await _fanout_request(body))
+    except FileNotFoundError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+# --- Async batch jobs ---
+# For long files: POST /jobs returns a job id at once; a bounded worker pool runs the
+# batch request (JOB_WORKERS = max concurrent upstream job requests) and state is
+# persisted under JOBS_DIR so a restart resumes unfinished jobs.
+
+JOB_UPSTREAM_TIMEOUT = float(os.getenv("JOB_UPSTREAM_TIMEOUT", 3600.0))
+
+
+async def _run_job(job: dict) -> dict:
+    spec = job["request"]
+    file_path = TEMP_DIR / safe_filename(spec["filename"]) if spec.get("filename") else None
+    if file_path is not None and not file_path.exists():
+        raise FileNotFoundError(f"File not found: {spec['filename']}")
+    result, _ = await _batch_transcribe(
+        spec.get("url"), file_path, spec.get("params", {}), os.getenv("DEEPGRAM_API_KEY", ""),
+        timeout=JOB_UPSTREAM_TIMEOUT, timer=_job_seconds, no_cache=spec.get("no_cache", False),
+    )
+    return result
+
+
+async def _notify_job_finished(job: dict) -> None:
+    if job.get("sid"):
+        await sio.emit("job_finished", _job_view(job), to=job["sid"])
+
+
+def _job_view(job: dict, include_result: bool = True) -> dict:
+    view = {k: job[k] for k in ("id", "status", "created_at", "started_at", "finished_at", "attempts", "error")}
+    if job["status"] == "queued":
+        view["position"] = jobs.position(job["id"])
+    if include_result and job["status"] == "done":
+        view["result"] = job["result"]
+    return view
+
+
+jobs = JobManager(_run_job, JOBS_DIR, on_finished=_notify_job_finished)
+Gauge("stt_jobs", "Async batch jobs by status.", ["status"],
+      fn=lambda: {(k,): v for k, v in jobs.counts().items()})
+
+
+@fastapi_app.post("/jobs")
+async def submit_job(request: Request):
+    """Queue a pre-recorded transcription (url or uploaded filename + params).
+    Optional `sid` receives a job_finished Socket.IO event when it completes.
+    """
+    body = await _json_body(request)
+    if body is None:
+        return JSONResponse({"error": "request body must be a JSON object"}, status_code=400)
+    url, filename = body.get("url"), body.get("filename")
+    if not url and not filename:
+        return JSONResponse({"error": "url or filename required"}, status_code=400)
+    if filename:
+        try:
+            filename = safe_filename(str(filename))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        if not (TEMP_DIR / filename).exists():
+            return JSONResponse({"error": "File not found"}, status_code=404)
+    try:
+        profile = _request_profile(body)
+    except ProfileError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    spec = {
+        "url": url,
+        "filename": filename,
+        "params": dict(profile.params),  # persisted as params: profile ids are per process
+        "no_cache": bool(body.get("no_cache", False)),
+    }
+    try:
+        job = await jobs.submit(spec, sid=body.get("sid"))
+    except JobQueueFull as e:
+        return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "30"})
+    return JSONResponse(_job_view(job), status_code=202, headers={"Location": f"/jobs/{job['id']}"})
+
+
+@fastapi_app.get("/jobs")
+async def list_jobs():
+    return JSONResponse(jobs.stats())
+
+
+@fastapi_app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "no such job"}, status_code=404)
+    return JSONResponse(_job_view(job))
+
+
 # --- Helper functions ---
 
-def _params_to_sdk_kwargs(raw_params: dict) -> dict:
-    """Convert frontend params dict to deepgram-sdk 6.x keyword args.
-    model is required by connect() — default to nova-2 if not provided.
+async def _json_body(request: Request) -> dict | None:
+    """The request's JSON object body, or None if it is malformed or not an object."""
+    try:
+        body = await request.json()
+    except ValueError:  # json.JSONDecodeError and UnicodeDecodeError
+        return None
+    return body if isinstance(body, dict) else None
+
+
+DEFAULT_MODEL = "nova-2"  # connect() requires a model
+
+
+def _profile(params) -> Profile:
+    """Compiled (cached) profile for a frontend params dict: validated once, with the
+    batch query params and deepgram-sdk 6.x connect() kwargs ready. A Profile passes through.
     """
-    clean = clean_params(raw_params, Mode.STREAMING)
-    kwargs = {}
-    for k, v in clean.items():
-        if isinstance(v, bool):
-            kwargs[k] = "true" if v else "false"
-        elif isinstance(v, (list, str)):
-            kwargs[k] = v
-        else:
-            kwargs[k] = str(v)
-    kwargs.setdefault("model", "nova-2")
-    return kwargs
+    return compile_profile(params, default_model=DEFAULT_MODEL)
+
+
+async def _register_profile(params) -> Profile:
+    """Pin a profile so its id outlives the compile cache, and replay the registration
+    on the other workers so the id works whichever worker a later request reaches.
+    """
+    profile = register_profile(params, default_model=DEFAULT_MODEL)
+    await router.broadcast("profiles", [{"id": profile.id, "params": dict(profile.params)}])
+    return profile
+
+
+async def _on_profiles(_sid, entries) -> None:
+    """Registrations made on another worker (see _register_profile)."""
+    for entry in entries or ():
+        try:
+            profile = register_profile(entry["params"], default_model=DEFAULT_MODEL)
+        except (KeyError, TypeError, ProfileError) as e:
+            logger.warning("cluster: could not register profile %s: %s", entry, e)
+            continue
+        if profile.id != entry.get("id"):
+            logger.warning("cluster: profile %s registered as %s (workers disagree on DEFAULT_MODEL?)",
+                           entry.get("id"), profile.id)
+
+
+async def _on_profiles_sync(_sid, _payload) -> None:
+    """A worker started: send it every profile registered here."""
+    entries = [{"id": p.id, "params": dict(p.params)} for p in registered_profiles()]
+    if entries:
+        await router.broadcast("profiles", entries)
+
+
+def _request_profile(data: dict) -> Profile:
+    """The profile a request refers to: a registered `profile_id`, or inline `params`.
+    Raises ProfileError for unknown ids and invalid params.
+    """
+    if data.get("profile_id"):
+        return get_profile(str(data["profile_id"]))
+    return _profile(data.get("params", data.get("config")) or {})
 
 
 # --- Streaming Task ---
 
-async def streaming_task(sid: str, params: dict, stop_event: asyncio.Event) -> None:
+async def _send_buffered(sid: str, ws, buffer: AudioBuffer, gate: SilenceGate | None = None) -> None:
+    """Forward coalesced mic audio from the session buffer until it is closed and drained.
+    With a silence gate, long silences are held back (the keep-alive loop keeps the socket open).
+    """
+    async for chunk in buffer.drain():
+        if gate:
+            chunk = gate.process(chunk)
+            if not chunk:
+                continue
+        try:
+            await ws.send_media(chunk)
+            _mic_bytes_out.inc(len(chunk))
+        except Exception as e:
+            SEND_MEDIA_ERRORS.labels("mic").inc()
+            logger.warning("[%s] send_media error: %s", sid, e)
+
+
+async def streaming_task(
+    sid: str, params: dict | Profile, stop_event: asyncio.Event, buffer: AudioBuffer | None = None
+) -> None:
     """Owns the Deepgram WebSocket lifecycle for one SocketIO session.
-    Runs as an asyncio.Task. Emits stream_started, transcription_update, stream_finished.
+    Runs as an asyncio.Task. Mic audio arrives via `buffer` (filled by on_audio_stream,
+    including before the socket opens) and is forwarded by a sender task.
+    Emits stream_started, transcription_update, stream_finished.
     """
     api_key = os.getenv("DEEPGRAM_API_KEY", "")
-    dg = AsyncDeepgramClient(api_key=api_key)
-    sdk_kwargs = _params_to_sdk_kwargs(params)
+    dg = AsyncDeepgramClient(api_key=api_key, environment=DEEPGRAM_ENVIRONMENT)
+    profile = _profile(params)
+    buffer = buffer or AudioBuffer()
+    sender_task = None
+    tracker = LatencyTracker()
+    state = _sessions.get(sid)
+    gate = SilenceGate.from_params(profile.params)
+    transcript = transcripts.open(sid, "mic")
 
     try:
-        async with dg.listen.v1.connect(**sdk_kwargs) as ws:
-            # Store ws so on_audio_stream can call ws.send_media()
-            if sid in _sessions:
-                _sessions[sid]["ws"] = ws
+        emitter = InterimEmitter.from_params(profile.params)
+        connect_started = asyncio.get_running_loop().time()
+        async with dg.listen.v1.connect(**profile.streaming) as ws:
+            UPSTREAM_CONNECT_SECONDS.labels("mic").observe(asyncio.get_running_loop().time() - connect_started)
+            if state:
+                state.ws = ws
+            # Flushes audio buffered while connecting, then coalesced live frames
+            sender_task = asyncio.create_task(_send_buffered(sid, ws, buffer, gate))
 
             async def on_message(msg, **kwargs):
                 logger.debug("[%s] on_message type=%s", sid, type(msg).__name__)
                 if isinstance(msg, ListenV1Metadata):
-                    if sid in _sessions:
-                        _sessions[sid]["request_id"] = msg.request_id
+                    if state:
+                        state.request_id = msg.request_id
                 elif isinstance(msg, ListenV1Results):
-                    transcript = msg.channel.alternatives[0].transcript
-                    is_final = bool(msg.is_final)
-                    await sio.emit("transcription_update", {
-                        "transcript": transcript,
-                        "is_final": is_final,
-                    }, to=sid)
+                    text = msg.channel.alternatives[0].transcript
+                    if buffer.first_push_at is not None:
+                        tracker.start_realtime(buffer.first_push_at)  # mic audio is captured in real time
+                    _observe_result(tracker, "mic", msg, text, gate)
+                    transcript.add(_result_words(msg, gate.to_original if gate else None), bool(msg.is_final))
+                    payload = emitter.prepare(text, bool(msg.is_final))
+                    if payload is not None:
+                        await sio.emit("transcription_update", payload, to=sid)
 
             ws.on(EventType.MESSAGE, on_message)
             listen_task = asyncio.create_task(ws.start_listening())
 
             # Emit stream_started immediately — don't gate on Metadata arrival
-            await sio.emit("stream_started", {"request_id": None}, to=sid)
+            await sio.emit("stream_started", {"request_id": None, "transcript_token": transcript.token}, to=sid)
 
             # Keep-alive loop — sends every 8s (under Deepgram's ~10s idle timeout)
             async def keep_alive_loop():
@@ -321,6 +1118,7 @@ async def streaming_task(sid: str, params: dict, stop_event: asyncio.Event) -> N
                         try:
                             await ws.send_keep_alive()
                         except Exception as e:
+                            KEEPALIVE_FAILURES.inc()
                             logger.warning("[%s] keep_alive error: %s", sid, e)
                             break
 
@@ -329,9 +1127,12 @@ async def streaming_task(sid: str, params: dict, stop_event: asyncio.Event) -> N
             # Wait for stop signal from on_toggle_transcription(stop) or disconnect()
             await stop_event.wait()
 
-            # Graceful shutdown: cancel keep-alive, send CloseStream, await final results
+            # Graceful shutdown: cancel keep-alive, flush buffered audio, send CloseStream,
+            # await final results
             ka_task.cancel()
+            buffer.close()
             try:
+                await sender_task
                 await ws.send_close_stream()
                 await listen_task  # blocks until Deepgram flushes final Results + closes
             except (asyncio.CancelledError, Exception) as e:
@@ -341,12 +1142,20 @@ async def streaming_task(sid: str, params: dict, stop_event: asyncio.Event) -> N
 
     except Exception as e:
         logger.error("[%s] streaming_task error: %s", sid, e)
-        _sessions.pop(sid, None)  # Free slot before notifying client so retries aren't blocked
-        await sio.emit("stream_error", {"message": _clean_error(e)}, to=sid)
+        await _release(state)  # Free slot before notifying client so retries aren't blocked
+        await _emit_stream_error(sid, _clean_error(e), _error_cause(e))
     finally:
-        request_id = _sessions[sid].get("request_id") if sid in _sessions else None
-        await sio.emit("stream_finished", {"request_id": request_id}, to=sid)
-        _sessions.pop(sid, None)
+        buffer.close()
+        if sender_task and not sender_task.done():
+            sender_task.cancel()
+        await _emit_latency_stats(sid, profile.params, tracker)
+        await sio.emit("stream_finished", {
+            "request_id": state.request_id if state else None,
+            "audio_stats": buffer.stats(),
+            **_silence_stats("mic", profile.params, gate),
+            **await _finish_transcript(sid, transcript),
+        }, to=sid)
+        await _release(state)
         logger.info("[%s] streaming_task finished, session cleaned up", sid)
 
 
@@ -355,66 +1164,161 @@ async def streaming_task(sid: str, params: dict, stop_event: asyncio.Event) -> N
 CHUNK_SIZE = 4096
 
 
+def _parse_pace(value) -> float | None:
+    """Parse a start_file_streaming pace option: 1, 2.5, "4x", or None/0/"max" for unpaced."""
+    if isinstance(value, str):
+        value = value.strip().lower()
+    if value is None or value in ("max", "unpaced"):
+        return None
+    if isinstance(value, str):
+        value = value.removesuffix("x")
+    pace = float(value)
+    if not math.isfinite(pace) or pace < 0:
+        raise ValueError("pace must be a finite number, 0 or more")
+    return pace or None
+
+
+async def _update_resume_point(sid: str, file_path: Path, seconds: float | None) -> None:
+    try:
+        await asyncio.to_thread(save_resume_point, file_path, seconds)
+    except OSError as e:
+        logger.warning("[%s] could not save resume point: %s", sid, e)
+
+
+def _parse_seconds(value) -> float | None:
+    """Parse a start_time/end_time option: seconds as a number or numeric string, or None."""
+    if value is None or value == "":
+        return None
+    seconds = float(value)
+    if not seconds >= 0:  # also rejects NaN
+        raise ValueError("must be a non-negative number of seconds")
+    return seconds
+
+
 async def file_streaming_task(
-    sid: str, filename: str, params: dict, stop_event: asyncio.Event
+    sid: str, filename: str, params: dict | Profile, stop_event: asyncio.Event,
+    pace: float | None = 1.0, start_time: float = 0.0, end_time: float | None = None,
+    resume: bool = False,
 ) -> None:
     """Streams an uploaded file to Deepgram over WebSocket.
     Mirrors streaming_task() but reads from a local file instead of waiting on stop_event.
+    pace is a playback-speed multiplier (1.0 = real time); None sends as fast as possible.
+    start_time/end_time (seconds) stream only that part, from the frame boundary at or
+    before start_time; resume starts where the last unfinished stream's finals reached.
+    Result `start` times are on the file's own timeline either way.
     Emits stream_started, transcription_update, stream_finished.
     """
     api_key = os.getenv("DEEPGRAM_API_KEY", "")
-    dg = AsyncDeepgramClient(api_key=api_key)
-    sdk_kwargs = _params_to_sdk_kwargs(params)
-    file_path = TEMP_DIR / filename
+    dg = AsyncDeepgramClient(api_key=api_key, environment=DEEPGRAM_ENVIRONMENT)
+    profile = _profile(params)
+    file_path = TEMP_DIR / safe_filename(filename)  # on_start_file_streaming has validated it
+    tracker = LatencyTracker()
+    state = _sessions.get(sid)
+    try:
+        index = await asyncio.to_thread(get_index, file_path)
+    except FileNotFoundError:
+        index = None  # reported once the stream is open, below
+    gate = None
+    if profile.params.get("silence_gate") and index and index["codec"] == "pcm_s16le":
+        gate = SilenceGate.from_params(profile.params, index["sample_rate"], index["channels"])
+    last_final = None  # end of the latest final result, on the file's timeline
+    transcript = transcripts.open(sid, "file")
+    finished = False  # read through to end_offset
+    end_offset = 0
 
     try:
-        async with dg.listen.v1.connect(**sdk_kwargs) as ws:
+        if resume and index:
+            start_time = await asyncio.to_thread(load_resume_point, file_path) or start_time
+        start_offset, end_offset, base = byte_range(index, start_time, end_time) if index else (0, 0, 0.0)
+
+        def file_time(t: float) -> float:
+            """A stream time on the file's own timeline."""
+            return base + (gate.to_original(t) if gate else t)
+
+        # Container headers go up as-is before a mid-file start (and ahead of gated PCM)
+        header_bytes = index["data_offset"] if index and (start_offset or gate) else 0
+        emitter = InterimEmitter.from_params(profile.params)
+        connect_started = asyncio.get_running_loop().time()
+        async with dg.listen.v1.connect(**profile.streaming) as ws:
+            UPSTREAM_CONNECT_SECONDS.labels("file").observe(asyncio.get_running_loop().time() - connect_started)
             # Store ws reference in session
-            if sid in _sessions:
-                _sessions[sid]["ws"] = ws
+            if state:
+                state.ws = ws
 
             async def on_message(msg, **kwargs):
+                nonlocal last_final
                 logger.debug("[%s] file on_message type=%s", sid, type(msg).__name__)
                 if isinstance(msg, ListenV1Metadata):
-                    if sid in _sessions:
-                        _sessions[sid]["request_id"] = msg.request_id
+                    if state:
+                        state.request_id = msg.request_id
                 elif isinstance(msg, ListenV1Results):
-                    transcript = msg.channel.alternatives[0].transcript
-                    is_final = bool(msg.is_final)
-                    await sio.emit("transcription_update", {
-                        "transcript": transcript,
-                        "is_final": is_final,
-                        "start": msg.start,
-                    }, to=sid)
+                    text = msg.channel.alternatives[0].transcript
+                    _observe_result(tracker, "file", msg, text, gate)
+                    transcript.add(_result_words(msg, file_time), bool(msg.is_final))
+                    if msg.is_final:
+                        last_final = file_time(msg.start + msg.duration)
+                    payload = emitter.prepare(text, bool(msg.is_final))
+                    if payload is not None:
+                        payload["start"] = file_time(msg.start)
+                        await sio.emit("transcription_update", payload, to=sid)
 
             ws.on(EventType.MESSAGE, on_message)
             listen_task = asyncio.create_task(ws.start_listening())
 
             # Emit stream_started immediately — same pattern as streaming_task
-            await sio.emit("stream_started", {"request_id": None}, to=sid)
+            await sio.emit("stream_started", {
+                "request_id": None, "start_time": base, "transcript_token": transcript.token,
+            }, to=sid)
 
-            # Compute real-time pacing: sleep between chunks so Deepgram
-            # receives audio at 1x speed, keeping transcripts in sync with playback.
-            try:
-                audio_info = MutagenFile(file_path)
-                duration = audio_info.info.length if audio_info else None
-            except Exception:
-                duration = None
-            file_size = file_path.stat().st_size
-            sleep_per_chunk = (CHUNK_SIZE / file_size * duration) if duration and file_size else 0
+            # Pacing: each chunk has an absolute wall-clock deadline at its audio timestamp,
+            # read from the upload's frame index (exact for VBR), so send time and scheduler
+            # jitter never accumulate as drift. pace=1.0 keeps transcripts in sync with
+            # playback; None streams unpaced. Files with no index table are sent unpaced.
+            timed = bool(index and index["seek_offsets"])
+            loop = asyncio.get_running_loop()
 
             # Stream file in chunks; stop early if stop_event set
             try:
                 with open(file_path, "rb") as f:
+                    started_at = last_send_at = loop.time()
+                    if header_bytes:
+                        chunk = f.read(header_bytes)
+                        await ws.send_media(chunk)
+                        _file_bytes_in.inc(len(chunk))
+                        _file_bytes_out.inc(len(chunk))
+                    pos = max(start_offset, header_bytes)
+                    f.seek(pos)
                     while not stop_event.is_set():
-                        chunk = f.read(CHUNK_SIZE)
+                        chunk = f.read(min(CHUNK_SIZE, end_offset - pos) if end_offset else CHUNK_SIZE)
                         if not chunk:
+                            if gate and (tail := gate.flush()):
+                                await ws.send_media(tail)
+                                _file_bytes_out.inc(len(tail))
+                            finished = True
                             break
-                        await ws.send_media(chunk)
-                        if sleep_per_chunk:
-                            await asyncio.sleep(sleep_per_chunk)
+                        _file_bytes_in.inc(len(chunk))
+                        pos += len(chunk)
+                        out = gate.process(chunk) if gate else chunk
+                        if out:
+                            try:
+                                await ws.send_media(out)
+                            except Exception:
+                                SEND_MEDIA_ERRORS.labels("file").inc()
+                                raise
+                            _file_bytes_out.inc(len(out))
+                            last_send_at = loop.time()
+                        elif loop.time() - last_send_at >= SILENCE_KEEPALIVE_SECONDS:
+                            await ws.send_keep_alive()  # paced and silent: keep the socket open
+                            last_send_at = loop.time()
+                        if timed:
+                            position = time_at(index, pos) - base
+                            tracker.mark_sent(position)
+                            if pace:
+                                delay = started_at + position / pace - loop.time()
+                                if delay > 0:
+                                    await asyncio.sleep(delay)
             except FileNotFoundError:
-                await sio.emit("stream_error", {"message": f"File not found: {filename}"}, to=sid)
+                await _emit_stream_error(sid, f"File not found: {filename}", "file_not_found")
                 # Graceful shutdown even on FileNotFoundError
                 try:
                     await ws.send_close_stream()
@@ -434,14 +1338,27 @@ async def file_streaming_task(
                 if not listen_task.done():
                     listen_task.cancel()
 
+    except SeekError as e:
+        await _release(state)
+        await _emit_stream_error(sid, str(e), "bad_request")
     except Exception as e:
         logger.error("[%s] file_streaming_task error: %s", sid, e)
-        _sessions.pop(sid, None)
-        await sio.emit("stream_error", {"message": _clean_error(e)}, to=sid)
+        await _release(state)
+        await _emit_stream_error(sid, _clean_error(e), _error_cause(e))
     finally:
-        request_id = _sessions[sid].get("request_id") if sid in _sessions else None
-        await sio.emit("stream_finished", {"request_id": request_id}, to=sid)
-        _sessions.pop(sid, None)
+        # Reaching the end of the file clears the resume point; a cut-short stream records
+        # how far its finals got (a completed sub-range leaves it as it was)
+        if index and finished and end_offset >= index["size"]:
+            await _update_resume_point(sid, file_path, None)
+        elif index and not finished and last_final is not None:
+            await _update_resume_point(sid, file_path, last_final)
+        await _emit_latency_stats(sid, profile.params, tracker)
+        await sio.emit("stream_finished", {
+            "request_id": state.request_id if state else None,
+            **_silence_stats("file", profile.params, gate),
+            **await _finish_transcript(sid, transcript),
+        }, to=sid)
+        await _release(state)
         logger.info("[%s] file_streaming_task finished, session cleaned up", sid)
 
 
@@ -454,10 +1371,12 @@ async def connect(sid, environ, auth=None):
 
 @sio.event
 async def disconnect(sid, reason=None):
+    _sessions.cancel_wait(sid)
     session = _sessions.pop(sid, None)
     if session:
-        session["stop_event"].set()
-        task = session.get("task")
+        await router.release(sid)
+        session.stop_event.set()
+        task = session.task
         if task and not task.done():
             task.cancel()
     logger.info("Client disconnected: %s reason=%s", sid, reason)
@@ -466,37 +1385,54 @@ async def disconnect(sid, reason=None):
 @sio.on("toggle_transcription")
 async def on_toggle_transcription(sid, data):
     action = data.get("action", "start")
-    params = data.get("params", data.get("config", {}))
     logger.info("[%s] toggle_transcription action=%s", sid, action)
 
     if action == "start":
-        if sid in _sessions:
+        if sid in _sessions or _sessions.is_waiting(sid):
             logger.warning("[%s] toggle_transcription(start) while already streaming — ignoring", sid)
             return
-        stop_event = asyncio.Event()
-        _sessions[sid] = {"stop_event": stop_event, "ws": None, "request_id": None}
-        task = asyncio.create_task(streaming_task(sid, params, stop_event))
-        _sessions[sid]["task"] = task
+        try:
+            profile = _request_profile(data)
+        except ProfileError as e:
+            await _emit_stream_error(sid, str(e), "bad_request")
+            return
+        state = SessionState(sid, "mic", api_key=os.getenv("DEEPGRAM_API_KEY", ""), buffer=AudioBuffer())
+        if not await _admit(state):
+            return
+        state.task = asyncio.create_task(streaming_task(sid, profile, state.stop_event, state.buffer))
 
     elif action == "stop":
         if sid not in _sessions:
-            # Not streaming — keep frontend in sync
+            if await router.forward("stop", sid):
+                return  # owned by another worker; it emits stream_finished
+            # Not streaming (or still queued — withdraw) — keep frontend in sync
+            _sessions.cancel_wait(sid)
             await sio.emit("stream_finished", {"request_id": None}, to=sid)
             return
-        _sessions[sid]["stop_event"].set()
+        _sessions[sid].stop_event.set()
         # stream_finished is emitted by streaming_task after listen_task completes
 
 
 @sio.on("audio_stream")
 async def on_audio_stream(sid, data):
+    """Hot path: queue the frame in the session buffer; streaming_task's sender forwards it.
+    Frames arriving before the Deepgram socket opens are held, not dropped.
+    """
     session = _sessions.get(sid)
-    if session and session.get("ws") is not None:
-        try:
-            audio = data if isinstance(data, bytes) else bytes(data)
-            await session["ws"].send_media(audio)
-        except Exception as e:
-            logger.warning("[%s] send_media error: %s", sid, e)
-    # If ws is None (WebSocket not yet open), drop silently — browser buffers more audio
+    buffer = session.buffer if session else None
+    if buffer is None:
+        # Not streaming here (or a file session): audio is never relayed between workers,
+        # a client's WebSocket stays on the worker that owns its stream
+        return
+    audio = data if isinstance(data, bytes) else bytes(data)
+    _mic_bytes_in.inc(len(audio))
+    if buffer.push(audio):
+        if session.backpressure and buffer.depth < buffer.max_bytes // 2:
+            session.backpressure = False
+    elif buffer.policy == "backpressure" and not session.backpressure:
+        # Signal once per overflow episode; cleared when the queue drains below half
+        session.backpressure = True
+        await sio.emit("audio_backpressure", buffer.stats(), to=sid)
 
 
 @sio.on("detect_audio_settings")
@@ -513,24 +1449,98 @@ async def on_detect_audio_settings(sid):
         await sio.emit("audio_settings", {"sample_rate": 16000, "channels": 1}, to=sid)
 
 
+@sio.on("register_profile")
+async def on_register_profile(sid, data):
+    """Compile a params set once; the ack's profile_id can replace `params` in
+    toggle_transcription and start_file_streaming, on any worker. Ids are content hashes,
+    so registering the same params again (e.g. after a reconnect) returns the same id.
+    """
+    try:
+        profile = await _register_profile((data or {}).get("params", data))
+    except ProfileError as e:
+        return {"error": str(e)}
+    return {"profile_id": profile.id}
+
+
+@sio.on("get_transcript")
+async def on_get_transcript(sid, data=None):
+    """Snapshot of a stream's server-side transcript as the ack: this connection's, or
+    another's via `sid` plus its `token` (e.g. after a page reload). `since` (a previous
+    snapshot's final_words) returns only the finals added after it.
+    """
+    data = data or {}
+    target = str(data.get("sid") or sid)
+    transcript = transcripts.get(target)
+    if transcript is None or (target != sid and not transcript.authorized(data.get("token"))):
+        return {"error": "no transcript for this session"}
+    try:
+        since = max(0, int(data.get("since") or 0))
+    except (TypeError, ValueError):
+        return {"error": "since must be a word index"}
+    return transcript.snapshot(since)
+
+
+@sio.on("fanout")
+async def on_fanout(sid, data):
+    """Socket form of POST /api/fanout: a `fanout_leg` event per leg as it finishes,
+    then the full summary as the ack.
+    """
+    logger.info("[%s] fanout legs=%s", sid, len((data or {}).get("profiles") or []))
+
+    async def emit_leg(view: dict) -> None:
+        await sio.emit("fanout_leg", view, to=sid)
+
+    try:
+        return await _fanout_request(data or {}, on_leg=emit_leg)
+    except (ValueError, FileNotFoundError) as e:
+        return {"error": str(e)}
+
+
 @sio.on("start_file_streaming")
 async def on_start_file_streaming(sid, data):
     filename = data.get("filename") if data else None
-    params = data.get("params", {}) if data else {}
     logger.info("[%s] start_file_streaming filename=%s", sid, filename)
 
     if not filename:
-        await sio.emit("stream_error", {"message": "filename is required"}, to=sid)
+        await _emit_stream_error(sid, "filename is required", "bad_request")
+        return
+    try:
+        # get_index and the resume point write next to the file: keep it inside TEMP_DIR
+        filename = safe_filename(str(filename))
+    except ValueError as e:
+        await _emit_stream_error(sid, str(e), "bad_request")
+        return
+
+    try:
+        pace = _parse_pace(data.get("pace", 1.0))
+    except (TypeError, ValueError):
+        await _emit_stream_error(sid, f"invalid pace: {data.get('pace')!r}", "bad_request")
+        return
+
+    try:
+        start_time = _parse_seconds(data.get("start_time")) or 0.0
+        end_time = _parse_seconds(data.get("end_time"))
+    except (TypeError, ValueError):
+        await _emit_stream_error(sid, "start_time/end_time must be non-negative seconds", "bad_request")
+        return
+
+    try:
+        profile = _request_profile(data)
+    except ProfileError as e:
+        await _emit_stream_error(sid, str(e), "bad_request")
         return
 
-    if sid in _sessions:
+    if sid in _sessions or _sessions.is_waiting(sid):
         logger.warning("[%s] start_file_streaming while already streaming — ignoring", sid)
         return
 
-    stop_event = asyncio.Event()
-    _sessions[sid] = {"stop_event": stop_event, "ws": None, "request_id": None}
-    task = asyncio.create_task(file_streaming_task(sid, filename, params, stop_event))
-    _sessions[sid]["task"] = task
+    state = SessionState(sid, "file", api_key=os.getenv("DEEPGRAM_API_KEY", ""))
+    if not await _admit(state):
+        return
+    state.task = asyncio.create_task(file_streaming_task(
+        sid, filename, profile, state.stop_event, pace,
+        start_time=start_time, end_time=end_time, resume=bool(data.get("resume")),
+    ))
 
 
 @sio.on("stop_file_streaming")
@@ -538,9 +1548,27 @@ async def on_stop_file_streaming(sid, data=None):
     logger.info("[%s] stop_file_streaming", sid)
 
     if sid not in _sessions:
-        # Not streaming — keep frontend in sync
+        if await router.forward("stop", sid):
+            return  # owned by another worker; it emits stream_finished
+        # Not streaming (or still queued — withdraw) — keep frontend in sync
+        _sessions.cancel_wait(sid)
         await sio.emit("stream_finished", {"request_id": None}, to=sid)
         return
 
-    _sessions[sid]["stop_event"].set()
+    _sessions[sid].stop_event.set()
     # stream_finished is emitted by file_streaming_task after listen_task completes
+
+
+# --- Commands forwarded from other workers (see common/cluster.py) ---
+
+async def _stop_local(sid: str, _payload=None) -> bool:
+    session = _sessions.get(sid)
+    if session is None:
+        return False
+    session.stop_event.set()
+    return True
+
+
+router.on("stop", _stop_local)
+router.on("profiles", _on_profiles)
+router.on("profiles_sync", _on_profiles_sync)
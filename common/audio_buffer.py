@@ -0,0 +1,155 @@
+"""Bounded per-session audio buffer for live mic streams.
+
+Frames pushed by the Socket.IO handler are held here until a sender task
+forwards them upstream. The buffer:
+  - keeps audio that arrives before the Deepgram socket is open,
+  - coalesces small frames into sends of roughly `flush_bytes` (or whatever is
+    buffered once the oldest frame has waited `max_delay` seconds),
+  - applies an explicit overflow policy when `max_bytes` would be exceeded:
+      "drop_oldest"  — discard the oldest whole frames to make room
+      "backpressure" — refuse the new frame; the caller signals the client.
+The very first frame is never dropped: for encoded streams (webm/ogg from
+MediaRecorder) it carries the container header Deepgram needs to decode the rest.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+
+AUDIO_BUFFER_MAX_BYTES = int(os.getenv("AUDIO_BUFFER_MAX_BYTES", 1024 * 1024))
+AUDIO_COALESCE_BYTES = int(os.getenv("AUDIO_COALESCE_BYTES", 8192))
+AUDIO_COALESCE_MAX_DELAY = float(os.getenv("AUDIO_COALESCE_MAX_DELAY", 0.1))
+AUDIO_OVERFLOW_POLICY = os.getenv("AUDIO_OVERFLOW_POLICY", "drop_oldest")
+
+OVERFLOW_POLICIES = ("drop_oldest", "backpressure")
+
+
+class AudioBuffer:
+    __slots__ = (
+        "max_bytes", "flush_bytes", "max_delay", "policy",
+        "_frames", "_depth", "_oldest_at", "_header_pending", "_closed", "_wakeup",
+        "frames_in", "bytes_in", "bytes_out", "sends", "dropped_frames", "dropped_bytes",
+        "peak_depth", "first_push_at",
+    )
+
+    def __init__(
+        self,
+        max_bytes: int = AUDIO_BUFFER_MAX_BYTES,
+        flush_bytes: int = AUDIO_COALESCE_BYTES,
+        max_delay: float = AUDIO_COALESCE_MAX_DELAY,
+        policy: str = AUDIO_OVERFLOW_POLICY,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow policy must be one of {OVERFLOW_POLICIES}")
+        self.max_bytes = max_bytes
+        self.flush_bytes = flush_bytes
+        self.max_delay = max_delay
+        self.policy = policy
+        self._frames: deque[bytes] = deque()
+        self._depth = 0
+        self._oldest_at = 0.0
+        self._header_pending = True  # first frame not yet sent — never drop it
+        self._closed = False
+        self._wakeup = asyncio.Event()
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.sends = 0
+        self.dropped_frames = 0
+        self.dropped_bytes = 0
+        self.peak_depth = 0
+        self.first_push_at: float | None = None  # monotonic time the first frame arrived
+
+    @property
+    def depth(self) -> int:
+        """Bytes currently queued."""
+        return self._depth
+
+    def push(self, frame: bytes) -> bool:
+        """Queue one frame. Returns False if it was refused under the backpressure policy."""
+        if self._closed or not frame:
+            return False
+        self.frames_in += 1
+        self.bytes_in += len(frame)
+        if self._depth + len(frame) > self.max_bytes:
+            if self.policy == "backpressure" or not self._make_room(len(frame)):
+                self.dropped_frames += 1
+                self.dropped_bytes += len(frame)
+                return False
+        if not self._frames:
+            self._oldest_at = time.monotonic()
+            if self.first_push_at is None:
+                self.first_push_at = self._oldest_at
+        self._frames.append(frame)
+        self._depth += len(frame)
+        self.peak_depth = max(self.peak_depth, self._depth)
+        if self._depth >= self.flush_bytes:
+            self._wakeup.set()
+        return True
+
+    def _make_room(self, needed: int) -> bool:
+        """Drop oldest whole frames (sparing an unsent header) until `needed` bytes fit."""
+        pinned = self._frames.popleft() if self._header_pending and self._frames else None
+        while self._frames and self._depth + needed > self.max_bytes:
+            dropped = self._frames.popleft()
+            self._depth -= len(dropped)
+            self.dropped_frames += 1
+            self.dropped_bytes += len(dropped)
+        if pinned is not None:
+            self._frames.appendleft(pinned)
+        return self._depth + needed <= self.max_bytes
+
+    def close(self) -> None:
+        """No more frames will arrive; drain() flushes what is left and stops."""
+        self._closed = True
+        self._wakeup.set()
+
+    def _take(self) -> bytes:
+        """Pop whole frames until at least flush_bytes are gathered (or the queue is empty)."""
+        parts = []
+        size = 0
+        while self._frames and size < self.flush_bytes:
+            frame = self._frames.popleft()
+            parts.append(frame)
+            size += len(frame)
+        self._depth -= size
+        self._oldest_at = time.monotonic()
+        chunk = b"".join(parts)
+        self._header_pending = False
+        self.sends += 1
+        self.bytes_out += len(chunk)
+        return chunk
+
+    async def drain(self):
+        """Async iterator of coalesced chunks, for the session's sender task."""
+        while True:
+            if self._depth >= self.flush_bytes or (self._closed and self._frames):
+                yield self._take()
+                continue
+            if self._closed:
+                return
+            self._wakeup.clear()
+            if self._frames:
+                wait = self._oldest_at + self.max_delay - time.monotonic()
+                if wait <= 0:
+                    yield self._take()
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await self._wakeup.wait()
+
+    def stats(self) -> dict:
+        return {
+            "queue_bytes": self._depth,
+            "peak_queue_bytes": self.peak_depth,
+            "frames_in": self.frames_in,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "sends": self.sends,
+            "dropped_frames": self.dropped_frames,
+            "dropped_bytes": self.dropped_bytes,
+            "policy": self.policy,
+        }
@@ -0,0 +1,353 @@
+"""Per-file audio metadata index, built once at upload time and reused.
+
+The index records what streaming and batch requests need to know about a stored
+upload without probing it again: codec, content type, sample rate, channels,
+duration, bitrate, the byte offset where audio data starts, the file's sha256, and
+a sparse seek table (parallel `seek_times` / `seek_offsets` lists) of frame (MP3) or
+page (Ogg) boundaries roughly every SEEK_INTERVAL seconds:
+
+    index = get_index(path)              # blocking — run via asyncio.to_thread
+    time_at(index, 65536)                # audio seconds before byte 65536
+    offset_at(index, 12.5)               # first byte of the frame at or before 12.5 s
+    byte_range(index, 600.0, 1200.0)     # bytes to stream for 10:00-20:00, and where they start
+
+Because the table comes from real frame timestamps, pacing by time_at() stays in
+step with playback for VBR files where a bytes-to-seconds ratio drifts. Formats
+without a frame parser here (FLAC, WebM, M4A, ...) get mutagen's metadata and a
+two-point linear table. Indexes live in an `.index/` directory next to the uploads
+and are rebuilt when the file's size or mtime no longer match. The same directory
+holds each file's resume point: where the last file stream's final results reached.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import struct
+import wave
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from mutagen import File as MutagenFile
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_DIR = ".index"
+SEEK_INTERVAL = float(os.getenv("AUDIO_INDEX_SEEK_INTERVAL", 0.5))  # seconds between seek entries
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# MPEG audio: bitrate (kbps) by [version is MPEG-1][layer], sample rates by version
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+# Codecs whose streams can start at any indexed boundary once the header bytes are sent
+SEEKABLE_CODECS = ("pcm_s16le", "mp3", "opus", "vorbis")
+
+_CONTENT_TYPES = {"pcm_s16le": "audio/wav", "wav": "audio/wav", "mp3": "audio/mpeg",
+                  "opus": "audio/ogg", "vorbis": "audio/ogg", "flac": "audio/flac"}
+
+
+class SeekError(ValueError):
+    """A start/end time that this file cannot be streamed from."""
+
+
+def index_path(path: Path) -> Path:
+    return path.parent / INDEX_DIR / f"{path.name}.json"
+
+
+def resume_path(path: Path) -> Path:
+    return path.parent / INDEX_DIR / f"{path.name}.resume.json"
+
+
+def _empty(path: Path) -> dict:
+    st = path.stat()
+    return {
+        "version": INDEX_VERSION, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": None,
+        "codec": None, "content_type": None, "sample_rate": None, "channels": None,
+        "duration": None, "bitrate": None, "data_offset": 0, "seek_times": [], "seek_offsets": [],
+    }
+
+
+def _probe_wav(f, index: dict) -> bool:
+    try:
+        w = wave.open(f)
+    except (EOFError, wave.Error):
+        return False
+    data_offset = f.tell()
+    rate, channels, width = w.getframerate(), w.getnchannels(), w.getsampwidth()
+    duration = w.getnframes() / rate if rate else 0.0
+    index.update(
+        codec="pcm_s16le" if width == 2 and w.getcomptype() == "NONE" else "wav",
+        sample_rate=rate, channels=channels, duration=duration,
+        bitrate=rate * channels * width * 8, data_offset=data_offset,
+        # PCM is linear, so two points are exact
+        seek_times=[0.0, duration], seek_offsets=[data_offset, data_offset + w.getnframes() * channels * width],
+    )
+    return True
+
+
+def _mp3_frame(header: bytes):
+    """(frame_bytes, samples, sample_rate, channels, kbps) for an MPEG audio frame header, else None."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 3  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    layer = 4 - ((header[1] >> 1) & 3)  # 1, 2, 3
+    bitrate_idx, rate_idx = header[2] >> 4, (header[2] >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+    mpeg1 = version == 3
+    kbps = _MP3_BITRATES[(mpeg1, layer)][bitrate_idx]
+    rate = _MP3_RATES[version][rate_idx]
+    padding = (header[2] >> 1) & 1
+    channels = 1 if header[3] >> 6 == 3 else 2
+    if layer == 1:
+        return (12 * kbps * 1000 // rate + padding) * 4, 384, rate, channels, kbps
+    samples = 1152 if layer == 2 or mpeg1 else 576
+    return samples // 8 * kbps * 1000 // rate + padding, samples, rate, channels, kbps
+
+
+def _probe_mp3(f, index: dict) -> bool:
+    head = f.read(10)
+    start = 0
+    if head[:3] == b"ID3" and len(head) == 10:
+        size = (head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14 | (head[8] & 0x7F) << 7 | head[9] & 0x7F
+        start = 10 + size + (10 if head[5] & 0x10 else 0)  # footer flag
+    f.seek(start)
+    first = _mp3_frame(f.read(4))
+    if first is None:
+        return False
+    _, _, rate, channels, _ = first
+    offset, samples, bits, frames = start, 0, 0, 0
+    times, offsets = [0.0], [start]
+    next_mark = SEEK_INTERVAL
+    while True:
+        f.seek(offset)
+        frame = _mp3_frame(f.read(4))
+        if frame is None:
+            break  # end of audio (ID3v1 "TAG", APE tag, truncation or junk)
+        length, n, _, _, kbps = frame
+        seconds = samples / rate
+        if seconds >= next_mark:
+            times.append(seconds)
+            offsets.append(offset)
+            next_mark = seconds + SEEK_INTERVAL
+        samples += n
+        bits += kbps
+        frames += 1
+        offset += length
+    duration = samples / rate
+    times.append(duration)
+    offsets.append(offset)
+    index.update(
+        codec="mp3", sample_rate=rate, channels=channels, duration=duration,
+        bitrate=round(bits / frames) * 1000, data_offset=start, seek_times=times, seek_offsets=offsets,
+    )
+    return True
+
+
+def _probe_ogg(f, index: dict) -> bool:
+    """Opus or Vorbis in Ogg: page granule positions give each page's end time."""
+    offset, times, offsets = 0, [], []
+    codec = rate = channels = None
+    pre_skip = 0
+    last_time, next_mark = 0.0, 0.0
+    while True:
+        f.seek(offset)
+        header = f.read(27)
+        if len(header) < 27 or header[:4] != b"OggS":
+            break
+        granule = struct.unpack_from("<q", header, 6)[0]
+        lacing = f.read(header[26])
+        body_size = sum(lacing)
+        if codec is None:
+            packet = f.read(min(body_size, 64))
+            if packet[:8] == b"OpusHead":
+                codec, rate, channels = "opus", 48000, packet[9]  # Opus granules are always 48 kHz
+                pre_skip = struct.unpack_from("<H", packet, 10)[0]
+            elif packet[:7] == b"\x01vorbis":
+                codec, channels = "vorbis", packet[11]
+                rate = struct.unpack_from("<I", packet, 12)[0]
+            else:
+                return False
+        if granule > 0 and rate:
+            if last_time >= next_mark:
+                times.append(last_time)  # this page starts where the last one ended
+                offsets.append(offset)
+                next_mark = last_time + SEEK_INTERVAL
+            last_time = max(0.0, (granule - pre_skip) / rate)
+        offset += 27 + len(lacing) + body_size
+    if codec is None:
+        return False
+    data_offset = offsets[0] if offsets else 0
+    times.append(last_time)
+    offsets.append(offset)
+    index.update(
+        codec=codec, sample_rate=rate, channels=channels, duration=last_time,
+        bitrate=round(offset * 8 / last_time) if last_time else None,
+        data_offset=data_offset, seek_times=times, seek_offsets=offsets,
+    )
+    return True
+
+
+def _probe_mutagen(path: Path, index: dict) -> None:
+    try:
+        info = MutagenFile(path)
+    except Exception:
+        info = None
+    if not info:
+        return
+    duration = float(info.info.length or 0) or None
+    index.update(
+        codec=type(info).__name__.lower(),
+        sample_rate=getattr(info.info, "sample_rate", None),
+        channels=getattr(info.info, "channels", None),
+        duration=duration,
+        bitrate=getattr(info.info, "bitrate", None) or None,
+    )
+    if duration:
+        index.update(seek_times=[0.0, duration], seek_offsets=[0, index["size"]])  # no frame table: proportional
+
+
+def build_index(path: Path, sha256: str | None = None) -> dict:
+    """Probe `path` and return its index (not persisted). Blocking."""
+    index = _empty(path)
+    with open(path, "rb") as f:
+        magic = f.read(12)
+        f.seek(0)
+        try:
+            if magic[:4] == b"RIFF" and magic[8:12] == b"WAVE":
+                found = _probe_wav(f, index)
+            elif magic[:4] == b"OggS":
+                found = _probe_ogg(f, index)
+            else:
+                found = _probe_mp3(f, index)
+        except (OSError, struct.error, IndexError, KeyError) as e:
+            logger.warning("audio index probe failed for %s: %s", path.name, e)
+            found = False
+        if not found:
+            index = _empty(path)
+            _probe_mutagen(path, index)
+        if sha256 is None:
+            f.seek(0)
+            digest = hashlib.sha256()
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+            sha256 = digest.hexdigest()
+    index["sha256"] = sha256
+    index["content_type"] = _CONTENT_TYPES.get(index["codec"])
+    return index
+
+
+def write_index(path: Path, sha256: str | None = None) -> dict:
+    """Build and persist the index for `path`. Blocking."""
+    index = build_index(path, sha256)
+    target = index_path(path)
+    target.parent.mkdir(exist_ok=True)
+    tmp = target.with_name(target.name + ".part")
+    tmp.write_text(json.dumps(index))
+    os.replace(tmp, target)
+    return index
+
+
+def load_index(path: Path) -> dict | None:
+    """The persisted index for `path`, or None if missing or stale. Blocking."""
+    try:
+        index = json.loads(index_path(path).read_text())
+        st = path.stat()
+    except (OSError, ValueError):
+        return None
+    if (index.get("version"), index.get("size"), index.get("mtime_ns")) != (INDEX_VERSION, st.st_size, st.st_mtime_ns):
+        return None
+    return index
+
+
+def get_index(path: Path) -> dict:
+    """The persisted index for `path`, building it first if needed. Blocking.
+    Raises FileNotFoundError if `path` does not exist.
+    """
+    return load_index(path) or write_index(path)
+
+
+def time_at(index: dict, offset: int) -> float:
+    """Audio seconds that precede byte `offset`, interpolated within the seek table."""
+    times, offsets = index["seek_times"], index["seek_offsets"]
+    if not offsets or offset <= offsets[0]:
+        return 0.0
+    i = bisect_right(offsets, offset)
+    if i >= len(offsets):
+        return times[-1]
+    t0, t1, o0, o1 = times[i - 1], times[i], offsets[i - 1], offsets[i]
+    return t0 + (t1 - t0) * (offset - o0) / (o1 - o0) if o1 > o0 else t0
+
+
+def offset_at(index: dict, seconds: float, after: bool = False) -> int:
+    """Byte offset of the frame/page boundary at or before `seconds` (at or after, with
+    `after`). PCM is exact to the sample frame.
+    """
+    times, offsets = index["seek_times"], index["seek_offsets"]
+    if not offsets:
+        return 0
+    if index["codec"] == "pcm_s16le":
+        frames = seconds * index["sample_rate"]
+        frames = math.ceil(frames) if after else math.floor(frames)
+        return min(offsets[0] + frames * 2 * index["channels"], offsets[-1])
+    if after:
+        return offsets[min(bisect_left(times, seconds), len(offsets) - 1)]
+    return offsets[max(0, bisect_right(times, seconds) - 1)]
+
+
+def byte_range(index: dict, start_time: float = 0.0, end_time: float | None = None) -> tuple[int, int, float]:
+    """(start_offset, end_offset, start) for streaming `start_time`..`end_time` of a file.
+
+    start_offset is the boundary at or before start_time and `start` its timestamp,
+    where the streamed audio begins on the file's timeline; end_offset is the boundary
+    at or after end_time. A start_offset past data_offset means the header bytes
+    [0, data_offset) must be sent first. Raises SeekError for ranges the file can't serve.
+    """
+    if not start_time and end_time is None:
+        return 0, index["size"], 0.0
+    duration = index["duration"]
+    if not index["seek_offsets"] or not duration:
+        raise SeekError("start_time/end_time need an audio file of known duration")
+    if start_time and index["codec"] not in SEEKABLE_CODECS:
+        raise SeekError(f"start_time is not supported for {index['codec']} files (WAV, MP3 or Ogg only)")
+    if start_time >= duration:
+        raise SeekError(f"start_time is past the end of the file ({duration:.2f} s)")
+    if end_time is not None and end_time <= start_time:
+        raise SeekError("end_time must be after start_time")
+    start_offset = offset_at(index, start_time)
+    if start_offset <= index["data_offset"]:
+        start_offset = 0  # nothing to skip: stream the file from its first byte
+    end_offset = index["size"] if end_time is None or end_time >= duration else offset_at(index, end_time, after=True)
+    return start_offset, end_offset, time_at(index, start_offset)
+
+
+def load_resume_point(path: Path) -> float | None:
+    """Where the last stream of `path` left off (seconds), if it did not finish. Blocking."""
+    try:
+        point = json.loads(resume_path(path).read_text())
+        st = path.stat()
+    except (OSError, ValueError):
+        return None
+    if (point.get("size"), point.get("mtime_ns")) != (st.st_size, st.st_mtime_ns):
+        return None  # the file was replaced
+    return point.get("seconds")
+
+
+def save_resume_point(path: Path, seconds: float | None) -> None:
+    """Record (or, with None, clear) the resume point for `path`. Blocking."""
+    target = resume_path(path)
+    if seconds is None:
+        target.unlink(missing_ok=True)
+        return
+    st = path.stat()
+    target.parent.mkdir(exist_ok=True)
+    target.write_text(json.dumps({"seconds": seconds, "size": st.st_size, "mtime_ns": st.st_mtime_ns}))
@@ -0,0 +1,283 @@
+"""Multi-worker / multi-node support for the Socket.IO server.
+
+With SOCKETIO_MESSAGE_QUEUE set, every worker's AsyncServer shares a
+python-socketio pub/sub client manager, so an emit to any sid reaches the
+client whichever worker holds its connection:
+
+    redis://host:6379/0   AsyncRedisManager (needs the `redis` package)
+    amqp://host//         AsyncAioPikaManager (needs `aio_pika`)
+    memory://             in-process bus — stands in for a broker in tests
+
+The Deepgram WebSocket for a stream lives on the worker that admitted it. The
+SessionRouter rides the same channel: the owning worker broadcasts a claim when
+a stream starts and a release when it ends, and control commands for a sid held
+elsewhere ("stop") are forwarded to its owner instead of being dropped, and
+worker-wide state (registered profiles) is broadcast to every worker. Audio is
+never sent over the channel: clients stay on one worker when they connect over
+WebSocket (the frontend tries it first), and long-polling across workers needs
+sticky sessions. Every worker also broadcasts a heartbeat listing the sids it
+owns; a worker that falls silent for CLUSTER_OWNER_TTL (it died without
+releasing) loses its entries, as do sids missing from its latest heartbeat.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+logger = logging.getLogger(__name__)
+
+SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "deepgram-stt")
+CLUSTER_HEARTBEAT_INTERVAL = float(os.getenv("CLUSTER_HEARTBEAT_INTERVAL", 10))
+CLUSTER_OWNER_TTL = float(os.getenv("CLUSTER_OWNER_TTL", 3 * CLUSTER_HEARTBEAT_INTERVAL))
+
+# `method` value of router messages on the shared channel (the stock listener ignores it)
+ROUTE_METHOD = "stt_session"
+
+
+class AsyncMemoryManager(AsyncPubSubManager):
+    """Pub/sub manager over an in-process bus. Managers created with the same
+    channel behave like separate workers sharing a broker; messages are
+    JSON-encoded so they go through the same serialization as a real backend.
+    """
+    name = "asyncmemory"
+    _buses: dict[str, list[asyncio.Queue]] = {}
+
+    def __init__(self, url="memory://", channel="socketio", write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._buses.setdefault(channel, []).append(self._queue)
+
+    async def _publish(self, data):
+        message = self.json.dumps(data)
+        for queue in self._buses.get(self.channel, ()):
+            queue.put_nowait(message)
+
+    async def _listen(self):
+        while True:
+            yield await self._queue.get()
+
+    def detach(self) -> None:
+        """Leave the bus (tests)."""
+        bus = self._buses.get(self.channel, [])
+        if self._queue in bus:
+            bus.remove(self._queue)
+
+
+class _RoutingMixin:
+    """Diverts ROUTE_METHOD messages to the SessionRouter before the stock
+    pub/sub listener sees them; everything else passes through untouched.
+    """
+    router = None
+
+    async def _listen(self):
+        marker = ROUTE_METHOD.encode()
+        async for message in super()._listen():
+            if isinstance(message, (bytes, str)):
+                raw = message.encode() if isinstance(message, str) else message
+                if marker not in raw:  # cheap pre-check: leave ordinary emits undecoded
+                    yield message
+                    continue
+                try:
+                    data = json.loads(raw)
+                except ValueError:
+                    yield message
+                    continue
+            else:
+                data = message
+            if isinstance(data, dict) and data.get("method") == ROUTE_METHOD:
+                if self.router is not None and data.get("host_id") != self.host_id:
+                    try:
+                        await self.router._dispatch(data)
+                    except Exception:
+                        logger.exception("session router: failed to handle %s", data.get("op"))
+                continue
+            yield message
+
+
+def _manager_class(url: str):
+    scheme = url.split("://", 1)[0].split("+", 1)[0].lower()
+    if scheme in ("redis", "rediss", "valkey", "valkeys", "unix"):
+        return socketio.AsyncRedisManager
+    if scheme in ("amqp", "amqps"):
+        return socketio.AsyncAioPikaManager
+    if scheme == "memory":
+        return AsyncMemoryManager
+    raise ValueError(f"unsupported SOCKETIO_MESSAGE_QUEUE scheme: {scheme!r}")
+
+
+def make_client_manager(url: str = SOCKETIO_MESSAGE_QUEUE, channel: str = SOCKETIO_CHANNEL):
+    """Client manager for socketio.AsyncServer, or None for single-process mode."""
+    if not url:
+        return None
+    base = _manager_class(url)
+    routed = type(f"Routed{base.__name__}", (_RoutingMixin, base), {})
+    return routed(url, channel=channel)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SessionRouter:
+    """Tracks which worker owns each streaming sid and forwards commands to it.
+    A no-op when no client manager is configured (single worker).
+    """
+
+    def __init__(
+        self,
+        manager=None,
+        heartbeat_interval: float = CLUSTER_HEARTBEAT_INTERVAL,
+        owner_ttl: float = CLUSTER_OWNER_TTL,
+    ):
+        self.manager = manager
+        self.heartbeat_interval = heartbeat_interval
+        self.owner_ttl = owner_ttl
+        self.remote_owners: dict[str, str] = {}  # sid -> host_id of the owning worker
+        self._last_seen: dict[str, float] = {}  # host_id -> monotonic time of its last message
+        self._claimed: set[str] = set()
+        self._handlers = {}
+        self._heartbeat_task: asyncio.Task | None = None
+        self.forwarded = 0
+        self.received = 0
+        self.reaped = 0
+        if manager is not None:
+            manager.router = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.manager is not None
+
+    @property
+    def host_id(self) -> str | None:
+        return self.manager.host_id if self.manager else None
+
+    def on(self, command: str, handler) -> None:
+        """Register `async handler(sid, payload)` for commands forwarded to this worker
+        (or broadcast to all of them, with sid None).
+        """
+        self._handlers[command] = handler
+
+    def start(self, server) -> None:
+        """Start listening now rather than on the first client connect, so a
+        worker without clients still learns ownership (e.g. for HTTP stop), and
+        start the heartbeat. Call from a running event loop.
+        """
+        if not self.enabled:
+            return
+        if not server.manager_initialized:
+            server.manager_initialized = True
+            server.manager.initialize()
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def aclose(self) -> None:
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            try:
+                await self._publish("heartbeat", None, sids=sorted(self._claimed))
+            except Exception:
+                logger.exception("session router: heartbeat failed")
+            self._reap()
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _reap(self) -> None:
+        """Forget sids owned by workers silent for longer than owner_ttl."""
+        cutoff = time.monotonic() - self.owner_ttl
+        dead = {host for host, seen in self._last_seen.items() if seen < cutoff}
+        if not dead:
+            return
+        for host in dead:
+            del self._last_seen[host]
+        for sid, host in list(self.remote_owners.items()):
+            if host in dead:
+                del self.remote_owners[sid]
+                self.reaped += 1
+        logger.warning("session router: reclaimed sessions of silent worker(s) %s", ", ".join(sorted(dead)))
+
+    async def _publish(self, op: str, sid: str, **fields) -> None:
+        await self.manager._publish(
+            {"method": ROUTE_METHOD, "op": op, "sid": sid, "host_id": self.manager.host_id, **fields}
+        )
+
+    async def claim(self, sid: str) -> None:
+        if self.enabled:
+            self._claimed.add(sid)
+            await self._publish("claim", sid)
+
+    async def release(self, sid: str) -> None:
+        if self.enabled and sid in self._claimed:
+            self._claimed.discard(sid)
+            await self._publish("release", sid)
+
+    def owner(self, sid: str) -> str | None:
+        if sid in self._claimed:
+            return self.host_id
+        self._reap()
+        return self.remote_owners.get(sid)
+
+    async def forward(self, command: str, sid: str, payload=None) -> bool:
+        """Send a control `command` (JSON `payload`, not audio) to the worker owning `sid`.
+        False if no live worker owns it.
+        """
+        self._reap()
+        owner = self.remote_owners.get(sid)
+        if owner is None:
+            return False
+        await self._publish("command", sid, to=owner, command=command, payload=payload)
+        self.forwarded += 1
+        return True
+
+    async def broadcast(self, command: str, payload=None) -> None:
+        """Send `command` to every other worker; a no-op on a single worker."""
+        if self.enabled:
+            await self._publish("broadcast", None, command=command, payload=payload)
+
+    async def _dispatch(self, data: dict) -> None:
+        op, sid, host = data.get("op"), data.get("sid"), data.get("host_id")
+        self._last_seen[host] = time.monotonic()
+        if op == "claim":
+            self.remote_owners[sid] = host
+        elif op == "release":
+            if self.remote_owners.get(sid) == host:
+                del self.remote_owners[sid]
+        elif op == "heartbeat":
+            # The full list of the sender's sids: also repairs a missed claim or release
+            owned = set(data.get("sids") or ())
+            for other, owner in list(self.remote_owners.items()):
+                if owner == host and other not in owned:
+                    del self.remote_owners[other]
+            for other in owned:
+                self.remote_owners[other] = host
+        elif op == "broadcast" or (op == "command" and data.get("to") == self.host_id):
+            handler = self._handlers.get(data.get("command"))
+            if handler is None:
+                return
+            self.received += 1
+            await handler(sid, data.get("payload"))
+
+    def stats(self) -> dict:
+        self._reap()
+        return {
+            "enabled": self.enabled,
+            "worker": worker_id(),
+            "host_id": self.host_id,
+            "owned": len(self._claimed),
+            "remote_sessions": len(self.remote_owners),
+            "forwarded": self.forwarded,
+            "received": self.received,
+            "reaped": self.reaped,
+        }
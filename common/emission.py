@@ -0,0 +1,62 @@
+"""Per-session policy for `transcription_update` emission.
+
+Finals are always emitted immediately with the full transcript. Interims can be
+throttled to `max_rate` per second (superseded interims are dropped — the next
+interim or the final replaces them anyway) and delta-encoded against the last
+interim the client actually received:
+
+    {"is_final": false, "offset": 12, "delta": "suffix"}
+
+The client rebuilds the interim as previous[:offset] + delta. With no policy
+configured, every result is emitted in full, as before.
+"""
+import time
+
+# Session options carried in toggle_transcription params (stripped before Deepgram)
+EMISSION_PARAMS = ("interim_max_rate", "interim_delta")
+
+
+class InterimEmitter:
+    __slots__ = ("max_rate", "delta", "_min_interval", "_last_emit_at", "_last_interim",
+                 "emitted", "suppressed")
+
+    def __init__(self, max_rate: float | None = None, delta: bool = False):
+        self.max_rate = max_rate or None
+        self.delta = delta
+        self._min_interval = 1.0 / self.max_rate if self.max_rate else 0.0
+        self._last_emit_at = float("-inf")
+        self._last_interim = ""
+        self.emitted = 0
+        self.suppressed = 0
+
+    @classmethod
+    def from_params(cls, params: dict) -> "InterimEmitter":
+        max_rate = params.get("interim_max_rate")
+        return cls(
+            max_rate=float(max_rate) if max_rate else None,
+            delta=bool(params.get("interim_delta", False)),
+        )
+
+    def prepare(self, transcript: str, is_final: bool, now: float | None = None) -> dict | None:
+        """Return the payload to emit for this result, or None to suppress it."""
+        if is_final:
+            self._last_interim = ""
+            self.emitted += 1
+            return {"transcript": transcript, "is_final": True}
+
+        now = time.monotonic() if now is None else now
+        if now - self._last_emit_at < self._min_interval:
+            self.suppressed += 1
+            return None
+        self._last_emit_at = now
+        self.emitted += 1
+
+        if not self.delta:
+            return {"transcript": transcript, "is_final": False}
+
+        previous, self._last_interim = self._last_interim, transcript
+        offset = 0
+        limit = min(len(previous), len(transcript))
+        while offset < limit and previous[offset] == transcript[offset]:
+            offset += 1
+        return {"is_final": False, "offset": offset, "delta": transcript[offset:]}
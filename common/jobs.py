@@ -0,0 +1,228 @@
+"""Asynchronous batch jobs: submit now, poll (or get pushed) the result later.
+
+A JobManager owns a bounded queue and a fixed pool of asyncio workers; the pool
+size is the number of concurrent upstream batch requests jobs may make,
+independent of how many HTTP requests the server is handling. Every state
+change is written to JOBS_DIR/<id>.json (atomically), and on start-up jobs left
+queued or running by a previous process are queued again, up to
+JOB_MAX_ATTEMPTS runs in all (a job that keeps taking the process down fails).
+Only unfinished jobs are held in memory: a finished job is read back from disk
+when asked for, and deleted JOB_RETENTION seconds after it finished.
+
+Job lifecycle: queued -> running -> done | failed.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", 1000))
+# Default to the per-user state dir, not the temp dir: job state must survive reboots and tmp cleaners
+JOBS_DIR = os.getenv("JOBS_DIR") or str(
+    Path(os.getenv("XDG_STATE_HOME") or Path.home() / ".local" / "state") / "deepgram-stt" / "jobs"
+)
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", 7 * 86400))  # seconds to keep finished jobs
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))  # runs per job, counting restarts mid-job
+JOB_SWEEP_INTERVAL = float(os.getenv("JOB_SWEEP_INTERVAL", 3600))  # seconds between retention sweeps
+
+TERMINAL = ("done", "failed")
+
+
+class JobQueueFull(Exception):
+    """The job queue is at JOB_QUEUE_MAX; retry later."""
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _load_dir(directory: Path) -> list[dict]:
+    jobs = []
+    for path in directory.glob("*.json"):
+        try:
+            jobs.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            logger.warning("jobs: skipping unreadable %s", path.name)
+    return jobs
+
+
+class JobManager:
+    def __init__(
+        self,
+        runner,
+        directory: str | Path,
+        workers: int = JOB_WORKERS,
+        max_queue: int = JOB_QUEUE_MAX,
+        retention: float = JOB_RETENTION,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        sweep_interval: float = JOB_SWEEP_INTERVAL,
+        on_finished=None,
+    ):
+        """`runner(job) -> result` does the work; `on_finished(job)` is awaited after
+        each job reaches a terminal state (e.g. to push a Socket.IO event).
+        """
+        self.runner = runner
+        self.directory = Path(directory)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retention = retention
+        self.max_attempts = max(1, max_attempts)
+        self.sweep_interval = sweep_interval
+        self.on_finished = on_finished
+        self._jobs: dict[str, dict] = {}  # unfinished jobs
+        self._finished: dict[str, tuple[str, float]] = {}  # id -> (status, finished_at); the job is on disk
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._started = False
+
+    async def start(self) -> None:
+        """Load persisted jobs, re-queue interrupted ones and start the worker pool."""
+        if self._started:
+            return
+        self._started = True
+        self._queue = asyncio.Queue()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        for job in sorted(await asyncio.to_thread(_load_dir, self.directory), key=lambda j: j["created_at"]):
+            if job["status"] not in TERMINAL and job["attempts"] >= self.max_attempts:
+                # Interrupted on every run so far — stop retrying
+                job["status"] = "failed"
+                job["error"] = f"interrupted {job['attempts']} times; giving up"
+                job["finished_at"] = now
+                await self._persist(job)
+            if job["status"] in TERMINAL:
+                self._finished[job["id"]] = (job["status"], job.get("finished_at") or now)
+                continue
+            job["status"] = "queued"  # running when the last process stopped — run it again
+            job["started_at"] = None
+            self._jobs[job["id"]] = job
+            await self._persist(job)
+            self._queue.put_nowait(job["id"])
+        await self._expire()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._started = False
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    async def _persist(self, job: dict) -> None:
+        await asyncio.to_thread(_write_json, self._path(job["id"]), job)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, request: dict, sid: str | None = None) -> dict:
+        await self.start()
+        if self.depth >= self.max_queue:
+            raise JobQueueFull(f"job queue is full ({self.max_queue} waiting)")
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "request": request,
+            "sid": sid,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+        }
+        self._jobs[job["id"]] = job
+        await self._persist(job)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> dict | None:
+        job = self._jobs.get(job_id)
+        if job is None and job_id in self._finished:
+            job = await asyncio.to_thread(_read_json, self._path(job_id))
+        return job
+
+    async def _expire(self) -> None:
+        """Delete finished jobs older than `retention`."""
+        cutoff = time.time() - self.retention
+        for job_id, (_, finished_at) in list(self._finished.items()):
+            if finished_at < cutoff:
+                del self._finished[job_id]
+                await asyncio.to_thread(self._path(job_id).unlink, True)
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self._expire()
+            except OSError as e:
+                logger.warning("jobs: retention sweep failed: %s", e)
+
+    def position(self, job_id: str) -> int | None:
+        """1-based place in the queue for a queued job."""
+        if self._queue is None:
+            return None
+        for i, queued_id in enumerate(self._queue._queue, start=1):  # asyncio.Queue has no peek API
+            if queued_id == job_id:
+                return i
+        return None
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                continue
+            job["started_at"] = time.time()
+            job["attempts"] += 1
+            await self._persist({**job, "status": "running"})
+            job["status"] = "running"  # only once it is on disk, so a restart sees the attempt
+            try:
+                job["result"] = await self.runner(job)
+                job["status"] = "done"
+            except asyncio.CancelledError:
+                raise  # shutting down — left "running" on disk, re-queued on next start
+            except Exception as e:
+                logger.warning("job %s failed: %s", job_id, e)
+                job["status"] = "failed"
+                job["error"] = str(e) or type(e).__name__
+            job["finished_at"] = time.time()
+            await self._persist(job)
+            if self.on_finished:
+                try:
+                    await self.on_finished(job)
+                except Exception as e:
+                    logger.warning("job %s: on_finished failed: %s", job_id, e)
+            # Persisted: drop the result from memory, get() reads it back from disk
+            self._finished[job_id] = (job["status"], job["finished_at"])
+            del self._jobs[job_id]
+
+    def counts(self) -> dict:
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job["status"]] += 1
+        for status, _ in self._finished.values():
+            counts[status] += 1
+        return counts
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "queue_depth": self.depth, "max_queue": self.max_queue, **self.counts()}
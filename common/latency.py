@@ -0,0 +1,101 @@
+"""Per-session transcript latency: how far results trail the audio.
+
+Each Deepgram result covers audio up to `start + duration` seconds. The tracker
+knows when that audio position left (or, for a live mic, was captured by) the
+server, so latency = result arrival − that wall-clock time.
+
+Two ways to map audio position → wall clock:
+  - mark_sent(position): record after each upstream send (file streaming);
+    lookups interpolate between marks.
+  - start_realtime(t0): a real-time source (mic) — audio position p was
+    captured at t0 + p. This measures speech-to-transcript latency directly.
+"""
+import time
+from bisect import bisect_left
+from collections import deque
+
+MAX_SAMPLES = 2048
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    idx = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _summarize(samples) -> dict:
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": round(_percentile(values, 0.50), 4),
+        "p95": round(_percentile(values, 0.95), 4),
+        "max": round(values[-1], 4),
+    }
+
+
+class LatencyTracker:
+    __slots__ = ("_positions", "_times", "_anchor", "first_audio_at", "time_to_first_transcript",
+                 "interim", "final")
+
+    def __init__(self):
+        self._positions: deque[float] = deque()
+        self._times: deque[float] = deque()
+        self._anchor: float | None = None
+        self.first_audio_at: float | None = None
+        self.time_to_first_transcript: float | None = None
+        self.interim: deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.final: deque[float] = deque(maxlen=MAX_SAMPLES)
+
+    def start_realtime(self, anchor: float) -> None:
+        """Audio position p was captured at anchor + p (monotonic seconds)."""
+        self._anchor = anchor
+        if self.first_audio_at is None:
+            self.first_audio_at = anchor
+
+    def mark_sent(self, position: float, now: float | None = None) -> None:
+        """Audio up to `position` seconds has been forwarded upstream."""
+        now = time.monotonic() if now is None else now
+        if self.first_audio_at is None:
+            self.first_audio_at = now
+        self._positions.append(position)
+        self._times.append(now)
+
+    def _sent_at(self, position: float) -> float | None:
+        if self._anchor is not None:
+            return self._anchor + position
+        if not self._positions:
+            return None
+        i = bisect_left(self._positions, position)
+        if i >= len(self._positions):
+            return self._times[-1]  # result reaches past what we sent (rounding) — use latest
+        # Drop marks no later results can need (results arrive in audio order)
+        for _ in range(max(0, i - 1)):
+            self._positions.popleft()
+            self._times.popleft()
+        i = min(i, 1)
+        if i == 0:
+            return self._times[0]
+        p0, p1 = self._positions[0], self._positions[1]
+        t0, t1 = self._times[0], self._times[1]
+        return t0 + (t1 - t0) * ((position - p0) / (p1 - p0) if p1 > p0 else 1.0)
+
+    def observe(self, end: float, is_final: bool, has_text: bool, now: float | None = None) -> float | None:
+        """Record a result covering audio up to `end` seconds. Returns its latency, if known."""
+        now = time.monotonic() if now is None else now
+        if has_text and self.time_to_first_transcript is None and self.first_audio_at is not None:
+            self.time_to_first_transcript = now - self.first_audio_at
+        sent_at = self._sent_at(end)
+        if sent_at is None:
+            return None
+        latency = max(0.0, now - sent_at)
+        (self.final if is_final else self.interim).append(latency)
+        return latency
+
+    def summary(self) -> dict:
+        ttft = self.time_to_first_transcript
+        return {
+            "time_to_first_transcript": round(ttft, 4) if ttft is not None else None,
+            "interim": _summarize(self.interim),
+            "final": _summarize(self.final),
+        }
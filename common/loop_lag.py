@@ -0,0 +1,38 @@
+"""Event-loop lag sampling.
+
+Every socket read, emit and upstream send in app.py shares one asyncio loop, so
+anything that blocks it delays all sessions at once. The monitor sleeps for a
+fixed interval and records how late it woke up; sustained lag means the loop is
+saturated (or something is doing blocking work on it).
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    def __init__(self, observe, interval: float = 0.1):
+        self.observe = observe  # e.g. a Histogram child's observe
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, lag)
+            self.observe(lag)
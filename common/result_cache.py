@@ -0,0 +1,248 @@
+"""Content-addressed transcription result cache with request coalescing.
+
+Results are keyed by an audio identity (content hash, URL or TTS text) plus the
+normalized Deepgram params. Two tiers: an in-memory LRU and an optional on-disk
+JSON store with TTL and total-size eviction. Concurrent misses for the same key
+share one upstream call ("singleflight"). A URL key says nothing about the
+content behind it, so URL results get a short, memory-only RESULT_CACHE_URL_TTL.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 256))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 24 * 3600))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")  # empty = memory tier only
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+RESULT_CACHE_URL_TTL = float(os.getenv("RESULT_CACHE_URL_TTL", 300))  # remote files can change under one URL
+
+DISK_SWEEP_INTERVAL = 600.0  # seconds between full scans of the disk tier for expired entries
+DISK_LOW_WATER = 0.9  # evict down to this fraction of disk_max_bytes
+
+
+def _plain(value):
+    """Mappings (e.g. a profile's read-only wire params) as dicts and tuples as lists,
+    so json.dumps sorts and serializes them instead of falling back to repr().
+    """
+    if isinstance(value, Mapping):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def cache_key(kind: str, audio_id: str, params: Mapping) -> str:
+    """Stable key for (result kind, audio identity, normalized params)."""
+    blob = json.dumps([kind, audio_id, _plain(params)], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def text_id(*parts: str) -> str:
+    """Audio identity for synthesized audio: hash of the inputs that produce it."""
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl: float = RESULT_CACHE_TTL,
+        disk_dir: str | Path | None = RESULT_CACHE_DIR or None,
+        disk_max_bytes: int = RESULT_CACHE_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        # key -> (expires_at, result)
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        # Running total of the disk tier's size, set by each full scan and adjusted per
+        # write in between (approximate under concurrent writes; the next scan corrects it)
+        self._disk_bytes: int | None = None
+        self._next_sweep = 0.0
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "bypassed": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "expired": 0,
+        }
+
+    async def get_or_compute(
+        self, key: str, compute, bypass: bool = False, ttl: float | None = None,
+    ) -> tuple[dict, str]:
+        """Return (result, status) where status is hit | coalesced | miss | bypass.
+        `compute` is a zero-arg coroutine function making the upstream call.
+        bypass skips lookup and coalescing but still stores the fresh result.
+        A `ttl` shorter than the cache's own keeps the result in memory only.
+        Errors are never cached and propagate to every coalesced waiter.
+        """
+        if ttl is not None and ttl >= self.ttl:
+            ttl = None
+        if bypass:
+            self.counters["bypassed"] += 1
+            result = await compute()
+            await self._store(key, result, ttl)
+            return result, "bypass"
+
+        result = self._memory_get(key)
+        if result is not None:
+            self.counters["hits"] += 1
+            return result, "hit"
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(pending), "coalesced"
+
+        # Leader: register before any await so concurrent callers coalesce onto us
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._disk_get(key) if ttl is None else None
+            if result is not None:
+                self.counters["hits"] += 1
+                status = "hit"
+            else:
+                self.counters["misses"] += 1
+                result = await compute()
+                await self._store(key, result, ttl)
+                status = "miss"
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            future.set_result(result)
+            return result, status
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "disk": str(self.disk_dir) if self.disk_dir else None,
+            **self.counters,
+        }
+
+    # --- memory tier ---
+
+    def _memory_get(self, key: str) -> dict | None:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.time():
+            del self._memory[key]
+            self.counters["expired"] += 1
+            return None
+        self._memory.move_to_end(key)
+        return result
+
+    def _memory_put(self, key: str, result: dict, expires_at: float) -> None:
+        self._memory[key] = (expires_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    async def _store(self, key: str, result: dict, ttl: float | None = None) -> None:
+        if ttl is not None:
+            self._memory_put(key, result, time.time() + ttl)
+            return
+        self._memory_put(key, result, time.time() + self.ttl)
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._disk_put, key, result)
+            except OSError as e:
+                logger.warning("Result cache disk write failed: %s", e)
+
+    # --- disk tier ---
+
+    async def _disk_get(self, key: str) -> dict | None:
+        if not self.disk_dir:
+            return None
+        result = await asyncio.to_thread(self._disk_read, key)
+        if result is not None:
+            self.counters["disk_hits"] += 1
+            self._memory_put(key, result, time.time() + self.ttl)
+        return result
+
+    def _disk_read(self, key: str) -> dict | None:
+        path = self.disk_dir / f"{key}.json"
+        try:
+            st = path.stat()
+            if st.st_mtime + self.ttl < time.time():
+                path.unlink(missing_ok=True)
+                self.counters["expired"] += 1
+                if self._disk_bytes is not None:
+                    self._disk_bytes -= st.st_size
+                return None
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, result: dict) -> None:
+        path = self.disk_dir / f"{key}.json"
+        tmp = path.with_suffix(".tmp")
+        data = json.dumps(result).encode()
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        # Scan the directory only on the first write, when over budget, or every
+        # DISK_SWEEP_INTERVAL (for expiry), not on every put
+        if self._disk_bytes is None:
+            self._disk_evict()
+            return
+        self._disk_bytes += len(data) - replaced
+        if self._disk_bytes > self.disk_max_bytes or time.time() >= self._next_sweep:
+            self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        """Drop expired entries, then oldest entries until under the low-water mark
+        (DISK_LOW_WATER of disk_max_bytes) once the budget is exceeded.
+        """
+        now = time.time()
+        entries = []
+        for p in self.disk_dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            if st.st_mtime + self.ttl < now:
+                p.unlink(missing_ok=True)
+                self.counters["expired"] += 1
+            else:
+                entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        if total > self.disk_max_bytes:
+            for _, size, p in sorted(entries):
+                if total <= self.disk_max_bytes * DISK_LOW_WATER:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+                self.counters["disk_evictions"] += 1
+        self._disk_bytes = total
+        self._next_sweep = now + DISK_SWEEP_INTERVAL
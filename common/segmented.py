@@ -0,0 +1,262 @@
+"""Segmented batch transcription: split a long upload, transcribe the parts, stitch.
+
+`plan_segments()` cuts a file into pieces of roughly `target` seconds using its
+audio index (common/audio_index.py). 16-bit PCM WAV is cut in the middle of the
+longest quiet stretch (100 ms RMS windows, measured with NumPy) within `search`
+seconds of each target point. MP3 and Ogg are decoded once by ffmpeg's
+silencedetect filter and cut at the indexed frame/page boundary nearest the middle
+of the longest detected silence within `search` seconds; without ffmpeg (or with
+no silence in range) they are cut at the boundary nearest the target. The cut
+itself is still a byte range, nothing is re-encoded.
+`segment_body()` streams one piece as a standalone file (a fresh WAV
+header, or the Ogg header pages, in front of the slice). `merge_results()` joins the
+per-segment /v1/listen responses into one, shifting every timestamp by the segment's
+start:
+
+    segments = plan_segments(path, index, target=300.0)    # blocking
+    prefix = segment_prefix(path, index, segments[0])       # blocking
+    body = segment_body(path, segments[0], prefix)          # async byte iterator to POST
+    merged = merge_results(results, segments)
+
+Words, utterances and paragraphs are merged. Speaker labels are per segment (each
+request diarizes on its own), and whole-file features (summaries, topics, intents,
+sentiment) are not recombined.
+"""
+import asyncio
+import logging
+import os
+import re
+import shutil
+import struct
+import subprocess
+
+import numpy as np
+
+from .audio_index import SEEKABLE_CODECS, SeekError, offset_at, time_at
+from .silence_gate import SAMPLE_WIDTH, frame_levels
+
+SEGMENT_SECONDS = float(os.getenv("SEGMENT_SECONDS", 300))  # target segment length
+SEGMENT_SEARCH_SECONDS = float(os.getenv("SEGMENT_SEARCH_SECONDS", 10))  # look this far either side for a pause
+SEGMENT_CONCURRENCY = int(os.getenv("SEGMENT_CONCURRENCY", 4))  # segment requests in flight per call
+SEGMENT_MAX_CONCURRENCY = 16
+SEGMENT_SILENCE_DB = float(os.getenv("SEGMENT_SILENCE_DB", -35))  # silencedetect noise floor (MP3/Ogg)
+SILENCEDETECT_TIMEOUT = float(os.getenv("SILENCEDETECT_TIMEOUT", 600))  # seconds for the ffmpeg pass
+CUT_WINDOW_SECONDS = 0.1
+READ_CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[0-9.]+)")
+
+
+class Segment:
+    __slots__ = ("index", "start_offset", "end_offset", "start", "end")
+
+    def __init__(self, index: int, start_offset: int, end_offset: int, start: float, end: float):
+        self.index = index
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.start = start  # seconds on the file's timeline
+        self.end = end
+
+    def __repr__(self):
+        return f"Segment({self.index}, {self.start:.2f}-{self.end:.2f}s)"
+
+
+def _quietest_offset(f, index: dict, around: float, search: float) -> int:
+    """Byte offset to cut PCM at: the middle of the longest pause within `search` s of `around`."""
+    block = SAMPLE_WIDTH * index["channels"]
+    window_frames = max(1, round(index["sample_rate"] * CUT_WINDOW_SECONDS))
+    lo = offset_at(index, max(0.0, around - search))
+    hi = offset_at(index, around + search, after=True)
+    f.seek(lo)
+    pcm = f.read(hi - lo)
+    n = len(pcm) // (window_frames * block)
+    if n < 2:
+        return offset_at(index, around)
+    levels = frame_levels(pcm[:n * window_frames * block], n)
+    # Cut in the middle of the longest run of windows within 3 dB of the quietest one,
+    # so both segments keep some of the pause
+    quiet = np.concatenate(([0], (levels <= levels.min() + 3.0).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(quiet))
+    starts, ends = edges[0::2], edges[1::2]
+    longest = int(np.argmax(ends - starts))
+    return lo + (int(starts[longest] + ends[longest]) * window_frames // 2) * block
+
+
+def parse_silences(stderr: str, duration: float) -> list[tuple[float, float]]:
+    """(start, end) pairs from ffmpeg silencedetect log lines; an open silence runs to `duration`."""
+    silences, start = [], None
+    for kind, value in _SILENCE_RE.findall(stderr):
+        if kind == "start":
+            start = max(0.0, float(value))
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    if start is not None:
+        silences.append((start, duration))
+    return silences
+
+
+def detect_silences(path, duration: float) -> list[tuple[float, float]]:
+    """Silences in a compressed file via ffmpeg silencedetect, or [] when ffmpeg is
+    unavailable or fails. Blocking (decodes the whole file once).
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return []
+    cmd = [ffmpeg, "-hide_banner", "-nostats", "-vn", "-sn", "-dn", "-i", str(path),
+           "-af", f"silencedetect=noise={SEGMENT_SILENCE_DB}dB:d={2 * CUT_WINDOW_SECONDS}", "-f", "null", "-"]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=SILENCEDETECT_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning("silencedetect failed for %s: %s", path, e)
+        return []
+    if proc.returncode != 0:
+        logger.warning("silencedetect failed for %s: exit %s", path, proc.returncode)
+        return []
+    return parse_silences(proc.stderr, duration)
+
+
+def _silence_offset(index: dict, silences: list, around: float, search: float) -> int:
+    """Byte offset to cut compressed audio at: the frame boundary nearest the middle of
+    the longest silence overlapping `around` ± `search`, else the one nearest `around`.
+    """
+    lo, hi = around - search, around + search
+    best, best_length = None, 0.0
+    for start, end in silences:
+        start, end = max(start, lo), min(end, hi)
+        if end - start > best_length:
+            best, best_length = (start + end) / 2, end - start
+    return offset_at(index, around if best is None else best)
+
+
+def plan_segments(path, index: dict, target: float = SEGMENT_SECONDS,
+                  search: float = SEGMENT_SEARCH_SECONDS) -> list[Segment]:
+    """Cut points for `path` (with its audio index). Blocking.
+    Raises SeekError for files that cannot be cut (unknown or unsupported formats).
+    """
+    duration = index["duration"]
+    if not duration or not index["seek_offsets"]:
+        raise SeekError("segmented mode needs an audio file of known duration")
+    if index["codec"] not in SEEKABLE_CODECS:
+        raise SeekError(f"segmented mode is not supported for {index['codec']} files (WAV, MP3 or Ogg only)")
+    if target <= 0:
+        raise SeekError("segment_seconds must be positive")
+    search = min(search, target / 4)
+    end_of_audio = index["seek_offsets"][-1]
+    cuts = [index["data_offset"]]
+    pcm = index["codec"] == "pcm_s16le"
+    silences = [] if pcm or duration < target * 1.5 else detect_silences(path, duration)
+    with open(path, "rb") as f:
+        t = target
+        while t < duration - target / 2:  # don't leave a short tail segment
+            if pcm:
+                cut = _quietest_offset(f, index, t, search)
+            else:
+                cut = _silence_offset(index, silences, t, search)
+            if cut > cuts[-1]:
+                cuts.append(cut)
+            t = time_at(index, cut) + target
+    cuts.append(end_of_audio)
+    return [
+        Segment(i, a, b, time_at(index, a), time_at(index, b))
+        for i, (a, b) in enumerate(zip(cuts, cuts[1:]))
+    ]
+
+
+def wav_header(data_bytes: int, sample_rate: int, channels: int) -> bytes:
+    """A canonical 44-byte linear16 WAV header for `data_bytes` of PCM."""
+    block = SAMPLE_WIDTH * channels
+    return (b"RIFF" + struct.pack("<I", 36 + data_bytes) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, sample_rate * block, block, 16)
+            + b"data" + struct.pack("<I", data_bytes))
+
+
+def segment_prefix(path, index: dict, segment: Segment) -> bytes:
+    """Bytes that make a segment's slice a standalone file. Blocking (reads Ogg headers)."""
+    if index["codec"] == "pcm_s16le":
+        return wav_header(segment.end_offset - segment.start_offset, index["sample_rate"], index["channels"])
+    if index["codec"] in ("opus", "vorbis"):
+        with open(path, "rb") as f:
+            return f.read(index["data_offset"])  # identification and comment pages
+    return b""
+
+
+async def segment_body(path, segment: Segment, prefix: bytes):
+    """Yield `prefix` then the segment's byte range, reading off the event loop."""
+    if prefix:
+        yield prefix
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(f.seek, segment.start_offset)
+        remaining = segment.end_offset - segment.start_offset
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+def _shift(item: dict, offset: float, keys=("start", "end")) -> dict:
+    shifted = dict(item)
+    for key in keys:
+        if isinstance(shifted.get(key), (int, float)):
+            shifted[key] = round(shifted[key] + offset, 3)
+    return shifted
+
+
+def _shift_paragraphs(paragraphs: list, offset: float) -> list:
+    return [
+        {**_shift(p, offset), "sentences": [_shift(s, offset) for s in p.get("sentences", [])]}
+        for p in paragraphs
+    ]
+
+
+def merge_results(results: list[dict], segments: list[Segment]) -> dict:
+    """One /v1/listen response from per-segment responses, timestamps on the file's timeline."""
+    first = results[0]
+    merged_channels = []
+    for c, channel in enumerate(first.get("results", {}).get("channels", [])):
+        n_alts = len(channel.get("alternatives", []))
+        alternatives = []
+        for a in range(n_alts):
+            transcripts, words, paragraphs, para_texts = [], [], [], []
+            weighted, n_words = 0.0, 0
+            for result, segment in zip(results, segments):
+                try:
+                    alt = result["results"]["channels"][c]["alternatives"][a]
+                except (KeyError, IndexError):
+                    continue
+                if alt.get("transcript"):
+                    transcripts.append(alt["transcript"])
+                seg_words = [_shift(w, segment.start) for w in alt.get("words", [])]
+                words.extend(seg_words)
+                weighted += alt.get("confidence", 0.0) * len(seg_words)
+                n_words += len(seg_words)
+                if alt.get("paragraphs"):
+                    para_texts.append(alt["paragraphs"].get("transcript", ""))
+                    paragraphs.extend(_shift_paragraphs(alt["paragraphs"].get("paragraphs", []), segment.start))
+            merged = {**channel["alternatives"][a], "transcript": " ".join(transcripts),
+                      "confidence": round(weighted / n_words, 4) if n_words else 0.0, "words": words}
+            if paragraphs or para_texts:
+                merged["paragraphs"] = {"transcript": "".join(para_texts), "paragraphs": paragraphs}
+            alternatives.append(merged)
+        merged_channels.append({**channel, "alternatives": alternatives})
+
+    merged_results = {**first.get("results", {}), "channels": merged_channels}
+    if any("utterances" in r.get("results", {}) for r in results):
+        utterances = []
+        for result, segment in zip(results, segments):
+            for u in result.get("results", {}).get("utterances", []):
+                utterances.append({**_shift(u, segment.start),
+                                   "words": [_shift(w, segment.start) for w in u.get("words", [])]})
+        merged_results["utterances"] = utterances
+
+    metadata = dict(first.get("metadata", {}))
+    metadata["duration"] = round(segments[-1].end, 3)
+    metadata["request_ids"] = [r.get("metadata", {}).get("request_id") for r in results]
+    return {"metadata": metadata, "results": merged_results}
@@ -0,0 +1,214 @@
+"""Typed per-session state and an admission-controlled session registry.
+
+Every live Deepgram WebSocket belongs to one SessionState. The registry caps
+concurrent upstream streams per process and per API key; start requests over
+the limit wait in a bounded FIFO queue (up to a timeout) or are rejected at
+once with a retry-after hint, so a burst degrades predictably instead of
+exhausting file descriptors and upstream quota.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from collections.abc import MutableMapping
+
+from .audio_buffer import AudioBuffer
+
+MAX_UPSTREAM_STREAMS = int(os.getenv("MAX_UPSTREAM_STREAMS", 100))
+MAX_STREAMS_PER_KEY = int(os.getenv("MAX_STREAMS_PER_KEY", 100))
+SESSION_QUEUE_MAX = int(os.getenv("SESSION_QUEUE_MAX", 16))
+SESSION_QUEUE_TIMEOUT = float(os.getenv("SESSION_QUEUE_TIMEOUT", 10.0))
+SESSION_RETRY_AFTER = float(os.getenv("SESSION_RETRY_AFTER", 5.0))
+
+
+class SessionState:
+    __slots__ = ("sid", "kind", "stop_event", "api_key", "task", "ws", "request_id",
+                 "buffer", "backpressure", "started_at")
+
+    def __init__(
+        self,
+        sid: str,
+        kind: str,
+        api_key: str = "",
+        stop_event: asyncio.Event | None = None,
+        buffer: AudioBuffer | None = None,
+    ):
+        self.sid = sid
+        self.kind = kind  # "mic" | "file"
+        self.api_key = api_key
+        self.stop_event = stop_event or asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.ws = None  # AsyncV1SocketClient once connected
+        self.request_id: str | None = None
+        self.buffer = buffer  # mic sessions only
+        self.backpressure = False  # client currently told to slow down
+        self.started_at = time.monotonic()
+
+
+class AdmissionRejected(Exception):
+    """No upstream stream slot is available; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float = SESSION_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionCancelled(Exception):
+    """A queued start was withdrawn (client stopped or disconnected while waiting)."""
+
+
+def key_id(api_key: str) -> str:
+    """Non-reversible label for an API key (never expose the key itself)."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8] if api_key else "default"
+
+
+class SessionRegistry(MutableMapping):
+    """sid -> SessionState, with admission control on insertion via admit().
+    Removing a session (pop/del) frees its slot and admits queued starts.
+    """
+
+    def __init__(
+        self,
+        max_streams: int = MAX_UPSTREAM_STREAMS,
+        max_per_key: int = MAX_STREAMS_PER_KEY,
+        max_queue: int = SESSION_QUEUE_MAX,
+        queue_timeout: float = SESSION_QUEUE_TIMEOUT,
+    ):
+        self.max_streams = max_streams
+        self.max_per_key = max_per_key
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._states: dict[str, SessionState] = {}
+        self._per_key: dict[str, int] = {}
+        # sid -> (state, future); dicts keep insertion order, giving FIFO admission
+        self._waiters: dict[str, tuple[SessionState, asyncio.Future]] = {}
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    # --- mapping interface (get() is on the audio hot path, so it bypasses the mixin) ---
+
+    def get(self, sid, default=None):
+        return self._states.get(sid, default)
+
+    def __getitem__(self, sid: str) -> SessionState:
+        return self._states[sid]
+
+    def __setitem__(self, sid: str, state: SessionState) -> None:
+        """Insert without admission control (tests, internal use)."""
+        if sid in self._states:
+            del self[sid]
+        self._insert(state)
+
+    def __delitem__(self, sid: str) -> None:
+        state = self._states.pop(sid)
+        self._per_key[state.api_key] -= 1
+        if not self._per_key[state.api_key]:
+            del self._per_key[state.api_key]
+        self._wake()
+
+    def __iter__(self):
+        return iter(list(self._states))
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    # --- admission ---
+
+    def _has_capacity(self, api_key: str) -> bool:
+        return (
+            len(self._states) < self.max_streams
+            and self._per_key.get(api_key, 0) < self.max_per_key
+        )
+
+    def _insert(self, state: SessionState) -> None:
+        self._states[state.sid] = state
+        self._per_key[state.api_key] = self._per_key.get(state.api_key, 0) + 1
+
+    def _wake(self) -> None:
+        for sid, (state, future) in list(self._waiters.items()):
+            if future.done():
+                continue
+            if self._has_capacity(state.api_key):
+                self._insert(state)
+                future.set_result(None)
+            if len(self._states) >= self.max_streams:
+                break
+
+    def is_waiting(self, sid: str) -> bool:
+        return sid in self._waiters
+
+    def queue_position(self, sid: str) -> int | None:
+        for position, waiting_sid in enumerate(self._waiters, start=1):
+            if waiting_sid == sid:
+                return position
+        return None
+
+    async def admit(self, state: SessionState, on_queued=None) -> None:
+        """Register `state`, waiting for a free slot if necessary.
+        Raises AdmissionRejected (queue full or timed out) or AdmissionCancelled.
+        `on_queued(position)` is awaited once if the start has to wait.
+        """
+        if self._has_capacity(state.api_key) and not self._waiters:
+            self._insert(state)
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue or self.queue_timeout <= 0:
+            self.rejected += 1
+            raise AdmissionRejected("server at streaming capacity")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[state.sid] = (state, future)
+        self.queued += 1
+        try:
+            if on_queued:
+                await on_queued(len(self._waiters))
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if state.sid in self._states and self._states[state.sid] is state:
+                self.admitted += 1
+                return  # admitted in the same tick the timeout fired
+            future.cancel()
+            self.rejected += 1
+            raise AdmissionRejected("timed out waiting for a streaming slot")
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            elif self._states.get(state.sid) is state:
+                del self[state.sid]  # admitted just as we were cancelled — give the slot back
+            raise
+        finally:
+            self._waiters.pop(state.sid, None)
+        self.admitted += 1
+
+    def release(self, state: SessionState | None) -> None:
+        """Free `state`'s slot if it is still the registered session for its sid
+        (a finished task must not evict a newer session started on the same socket).
+        """
+        if state is not None and self._states.get(state.sid) is state:
+            del self[state.sid]
+
+    def cancel_wait(self, sid: str) -> bool:
+        """Withdraw a queued start. Returns True if one was waiting."""
+        entry = self._waiters.get(sid)
+        if entry is None or entry[1].done():
+            return False
+        entry[1].set_exception(AdmissionCancelled())
+        return True
+
+    def occupancy(self) -> dict:
+        by_kind: dict[str, int] = {}
+        for state in self._states.values():
+            by_kind[state.kind] = by_kind.get(state.kind, 0) + 1
+        return {
+            "active": len(self._states),
+            "max_streams": self.max_streams,
+            "max_per_key": self.max_per_key,
+            "by_key": {key_id(k): n for k, n in self._per_key.items()},
+            "by_kind": by_kind,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "admitted_total": self.admitted,
+            "queued_total": self.queued,
+            "rejected_total": self.rejected,
+        }
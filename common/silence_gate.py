@@ -0,0 +1,176 @@
+"""Opt-in silence skipping for raw PCM streams (params.silence_gate=true).
+
+The gate measures the RMS level of each 20 ms frame of 16-bit PCM (NumPy, a whole
+chunk at a time) and, once a silent stretch has lasted `min_silence` seconds, stops
+forwarding it upstream. The last `pad` seconds of a suppressed stretch are held back
+and sent just before speech resumes, so every pause still reaches Deepgram as at
+least min_silence + pad of silence (enough for endpointing and utterance_end_ms).
+Silences shorter than that pass through untouched, and nothing is delayed: frames
+are forwarded as soon as they are classified.
+
+Deepgram's timestamps then refer to the shortened audio. Each cut is recorded, and
+`to_original()` maps an upstream time back onto the original timeline:
+
+    gate = SilenceGate(sample_rate=16000)
+    await ws.send_media(gate.process(chunk))     # may be b"" while suppressing
+    start = gate.to_original(msg.start)
+
+The gate is limited to linear16 PCM. Compressed streams (WebM/Opus from
+MediaRecorder, MP3 uploads) are forwarded unchanged: measuring them would mean
+running them through ffmpeg (installed in the Docker image for pydub) on the hot
+path, and cutting them would mean re-encoding what Deepgram receives.
+"""
+import os
+from bisect import bisect_right
+
+import numpy as np
+
+SILENCE_THRESHOLD_DB = float(os.getenv("SILENCE_THRESHOLD_DB", -45))  # frames quieter than this are silent
+SILENCE_MIN_SECONDS = float(os.getenv("SILENCE_MIN_SECONDS", 1.0))  # silence passed through before gating
+SILENCE_PAD_SECONDS = float(os.getenv("SILENCE_PAD_SECONDS", 0.2))  # silence kept before speech resumes
+# While suppressing, a KeepAlive is sent if nothing has gone upstream for this long
+# (Deepgram closes a stream after ~10 s without audio)
+SILENCE_KEEPALIVE_SECONDS = float(os.getenv("SILENCE_KEEPALIVE_SECONDS", 5.0))
+
+# Session options carried in stream params (stripped before Deepgram)
+GATE_PARAMS = ("silence_gate", "silence_threshold_db", "silence_min_ms")
+
+FRAME_SECONDS = 0.02
+SAMPLE_WIDTH = 2  # linear16
+
+
+def frame_levels(pcm: bytes, n_frames: int) -> np.ndarray:
+    """RMS level in dBFS of each of `n_frames` equal frames of linear16 `pcm`."""
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // SAMPLE_WIDTH // n_frames * n_frames)
+    frames = samples.reshape(n_frames, -1).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(rms / 32768.0 + 1e-10)
+
+
+class SilenceGate:
+    __slots__ = (
+        "sample_rate", "channels", "threshold_db", "min_silence", "pad",
+        "_frame_bytes", "_min_frames", "_pad_frames", "_partial", "_silent_run", "_held", "_held_bytes",
+        "_cuts_at", "_cuts_removed", "bytes_in", "bytes_out", "gaps",
+    )
+
+    def __init__(
+        self,
+        sample_rate: int,
+        channels: int = 1,
+        threshold_db: float = SILENCE_THRESHOLD_DB,
+        min_silence: float = SILENCE_MIN_SECONDS,
+        pad: float = SILENCE_PAD_SECONDS,
+    ):
+        if sample_rate <= 0 or channels <= 0:
+            raise ValueError("sample_rate and channels must be positive")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.threshold_db = threshold_db
+        self.min_silence = min_silence
+        self.pad = pad
+        self._frame_bytes = max(1, round(sample_rate * FRAME_SECONDS)) * channels * SAMPLE_WIDTH
+        self._min_frames = round(min_silence / FRAME_SECONDS)
+        self._pad_frames = round(pad / FRAME_SECONDS)
+        self._partial = b""
+        self._silent_run = 0  # consecutive silent frames
+        self._held: list[bytes] = []  # tail of the suppressed stretch, sent when speech resumes
+        self._held_bytes = 0
+        # Cut k: upstream audio at or after _cuts_at[k] seconds is _cuts_removed[k] seconds late
+        self._cuts_at: list[float] = []
+        self._cuts_removed: list[float] = []
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.gaps = 0
+
+    @classmethod
+    def from_params(cls, params, sample_rate: int | None = None, channels: int | None = None) -> "SilenceGate | None":
+        """A gate for a stream with these params, or None when silence_gate is off or the
+        audio is not raw PCM. `sample_rate`/`channels` describe a WAV file's own PCM
+        (pass them for file streams); otherwise the stream must be encoding=linear16.
+        """
+        if not params.get("silence_gate"):
+            return None
+        if sample_rate is None:
+            if params.get("encoding") != "linear16":
+                return None
+            sample_rate = int(params.get("sample_rate") or 16000)
+            channels = int(params.get("channels") or 1)
+        threshold = params.get("silence_threshold_db")
+        min_ms = params.get("silence_min_ms")
+        return cls(
+            sample_rate,
+            channels or 1,
+            threshold_db=float(threshold) if threshold not in (None, "") else SILENCE_THRESHOLD_DB,
+            min_silence=float(min_ms) / 1000 if min_ms not in (None, "") else SILENCE_MIN_SECONDS,
+        )
+
+    def _seconds(self, n_bytes: int) -> float:
+        return n_bytes / (self.sample_rate * self.channels * SAMPLE_WIDTH)
+
+    @property
+    def suppressing(self) -> bool:
+        """True while a silent stretch is being held back."""
+        return self._silent_run > self._min_frames
+
+    def process(self, chunk: bytes) -> bytes:
+        """Classify `chunk` and return the bytes to forward now (possibly b"")."""
+        self.bytes_in += len(chunk)
+        data = self._partial + chunk
+        n = len(data) // self._frame_bytes
+        self._partial = data[n * self._frame_bytes:]
+        if not n:
+            return b""
+        silent = frame_levels(data[:n * self._frame_bytes], n) < self.threshold_db
+
+        out = bytearray()
+        for i in range(n):
+            frame = data[i * self._frame_bytes:(i + 1) * self._frame_bytes]
+            if silent[i]:
+                self._silent_run += 1
+                if self._silent_run <= self._min_frames:
+                    out += frame
+                    continue
+                self._held.append(frame)
+                if len(self._held) > self._pad_frames:
+                    self._held_bytes += len(self._held.pop(0))  # dropped for good
+                continue
+            if self._held_bytes:
+                # Speech resumes: everything upstream from here is shifted by the removed audio
+                upstream_at = self._seconds(self.bytes_out + len(out))
+                removed = self._seconds(self._held_bytes) + (self._cuts_removed[-1] if self._cuts_removed else 0.0)
+                self._cuts_at.append(upstream_at)
+                self._cuts_removed.append(removed)
+                self.gaps += 1
+            for held in self._held:
+                out += held
+            self._held.clear()
+            self._held_bytes = 0
+            self._silent_run = 0
+            out += frame
+        self.bytes_out += len(out)
+        return bytes(out)
+
+    def flush(self) -> bytes:
+        """End of stream: return the trailing partial frame. Trailing silence stays dropped."""
+        tail, self._partial = self._partial, b""
+        if not self.suppressing:
+            self.bytes_out += len(tail)
+            return tail
+        return b""
+
+    def to_original(self, t: float) -> float:
+        """Map a time on the upstream (gated) timeline to the original audio timeline."""
+        i = bisect_right(self._cuts_at, t)
+        return t + self._cuts_removed[i - 1] if i else t
+
+    def stats(self) -> dict:
+        seconds_in = self._seconds(self.bytes_in)
+        seconds_out = self._seconds(self.bytes_out)
+        return {
+            "seconds_in": round(seconds_in, 3),
+            "seconds_sent": round(seconds_out, 3),
+            "seconds_saved": round(max(0.0, seconds_in - seconds_out), 3),
+            "gaps": self.gaps,
+        }
+
@@ -0,0 +1,84 @@
+"""Fan one async audio byte stream out to several consumers.
+
+The source is pulled exactly once by a background task (started on first
+demand). Every consumer sees the complete stream: chunks already received are
+replayed from the buffer, later ones are delivered as they arrive.
+`read_all()` resolves with the whole buffer as soon as the source ends, so a
+batch consumer can start while live consumers are still draining; the buffer is
+joined once and the same bytes object is shared by every batch consumer.
+"""
+import asyncio
+
+
+class AudioTee:
+    def __init__(self, source_factory):
+        """`source_factory` is a zero-arg callable returning an async iterator of bytes."""
+        self._factory = source_factory
+        self._chunks: list[bytes] = []
+        self._done = False
+        self._error: BaseException | None = None
+        self._joined: bytes | None = None
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def _ensure_started(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._pump())
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _pump(self) -> None:
+        try:
+            async for chunk in self._factory():
+                if chunk:
+                    self._chunks.append(chunk)
+                    self._notify()
+        except Exception as e:
+            self._error = e
+        except BaseException as e:
+            # Cancelled (e.g. by aclose()): consumers must raise rather than end
+            # normally with a truncated stream that could be cached as complete.
+            self._error = e
+            raise
+        finally:
+            self._done = True
+            self._notify()
+
+    async def subscribe(self):
+        """Async iterator over the full stream for one consumer."""
+        self._ensure_started()
+        i = 0
+        while True:
+            while i < len(self._chunks):
+                yield self._chunks[i]
+                i += 1
+            if self._done:
+                if self._error:
+                    raise self._error
+                return
+            await self._changed.wait()
+
+    async def read_all(self) -> bytes:
+        """Wait for the source to finish and return every byte it produced."""
+        self._ensure_started()
+        await asyncio.shield(self._task)
+        if self._error:
+            raise self._error
+        if self._joined is None:
+            self._joined = b"".join(self._chunks)
+        return self._joined
+
+    @property
+    def size(self) -> int:
+        return sum(len(c) for c in self._chunks)
+
+    async def aclose(self) -> None:
+        """Cancel the source if it is still running (e.g. a consumer failed)."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
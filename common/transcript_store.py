@@ -0,0 +1,248 @@
+"""Server-side transcript of each live stream, kept in columnar form.
+
+`Transcript` accumulates one session's words as parallel columns: a list of words
+plus compact arrays for start/end (integer milliseconds), confidence (float32) and
+speaker (int16, -1 when not diarized), about 14 bytes per word beside the word
+itself. Finals are appended; the latest interim is held on the side and replaced
+by the next interim or final, so a snapshot is the finals so far plus the words
+still in flux. Past `max_words` the oldest finals are dropped (counted in
+`dropped`), which bounds memory per session.
+
+`TranscriptStore` maps sid -> Transcript for live streams and keeps finished ones
+for `retention` seconds (at most `max_finished`), so a reloaded page or a second
+tab can fetch a snapshot and the whole transcript can be exported after the end.
+Each transcript carries a random `token`, handed only to the stream's own client;
+anyone else must present it to read the transcript:
+
+    transcript = store.open(sid)                         # at stream start
+    transcript.add(words, is_final)                      # per result: (word, start, end, confidence, speaker)
+    transcript.authorized(token)                         # before serving another sid
+    snapshot = transcript.snapshot(since=0)              # get_transcript
+    store.finish(sid); transcript.export("text")         # at stream end
+    write_export(transcript, TRANSCRIPT_DIR)             # blocking; <sid>.json
+"""
+import hmac
+import json
+import os
+import secrets
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+TRANSCRIPT_MAX_WORDS = int(os.getenv("TRANSCRIPT_MAX_WORDS", 100_000))  # per session (~4 h of speech)
+TRANSCRIPT_RETENTION = float(os.getenv("TRANSCRIPT_RETENTION", 3600))  # seconds to keep finished transcripts
+TRANSCRIPT_MAX_FINISHED = int(os.getenv("TRANSCRIPT_MAX_FINISHED", 64))
+TRANSCRIPT_DIR = os.getenv("TRANSCRIPT_DIR", "")  # empty = no export to disk
+
+NO_SPEAKER = -1
+EXPORT_FORMATS = ("json", "text")
+
+
+class _Columns:
+    __slots__ = ("word", "start_ms", "end_ms", "confidence", "speaker")
+
+    def __init__(self):
+        self.word: list[str] = []
+        self.start_ms = array("I")
+        self.end_ms = array("I")
+        self.confidence = array("f")
+        self.speaker = array("h")
+
+    def __len__(self) -> int:
+        return len(self.word)
+
+    def append(self, word: str, start: float, end: float, confidence: float, speaker: int | None) -> None:
+        self.word.append(word)
+        self.start_ms.append(max(0, round(start * 1000)))
+        self.end_ms.append(max(0, round(end * 1000)))
+        self.confidence.append(confidence)
+        self.speaker.append(NO_SPEAKER if speaker is None else int(speaker))
+
+    def extend(self, other: "_Columns") -> None:
+        self.word.extend(other.word)
+        self.start_ms.extend(other.start_ms)
+        self.end_ms.extend(other.end_ms)
+        self.confidence.extend(other.confidence)
+        self.speaker.extend(other.speaker)
+
+    def drop_front(self, n: int) -> None:
+        for column in (self.word, self.start_ms, self.end_ms, self.confidence, self.speaker):
+            del column[:n]
+
+    def view(self, lo: int = 0) -> dict:
+        """JSON-ready columns from position `lo`; `speaker` is None when nothing was diarized."""
+        speakers = self.speaker[lo:]
+        return {
+            "word": self.word[lo:],
+            "start": [ms / 1000 for ms in self.start_ms[lo:]],
+            "end": [ms / 1000 for ms in self.end_ms[lo:]],
+            "confidence": [round(c, 4) for c in self.confidence[lo:]],
+            "speaker": list(speakers) if any(s != NO_SPEAKER for s in speakers) else None,
+        }
+
+
+class Transcript:
+    __slots__ = ("sid", "kind", "token", "max_words", "dropped", "live", "started_at", "finished_at",
+                 "_finals", "_interim")
+
+    def __init__(self, sid: str, kind: str = "", max_words: int = TRANSCRIPT_MAX_WORDS):
+        self.sid = sid
+        self.kind = kind  # "mic" | "file"
+        self.token = secrets.token_urlsafe(16)  # read access for anyone but the owning socket
+        self.max_words = max(1, max_words)
+        self.dropped = 0  # oldest final words dropped to stay under max_words
+        self.live = True
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self._finals = _Columns()
+        self._interim = _Columns()
+
+    @property
+    def final_words(self) -> int:
+        """Final words seen so far, including dropped ones (the next snapshot `since`)."""
+        return self.dropped + len(self._finals)
+
+    def authorized(self, token) -> bool:
+        """Whether `token` is this transcript's access token."""
+        return isinstance(token, str) and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def add(self, words, is_final: bool) -> None:
+        """Record one result's words as (word, start, end, confidence, speaker) tuples.
+        An interim replaces the previous interim; a final replaces it and is kept.
+        """
+        columns = _Columns()
+        for word, start, end, confidence, speaker in words:
+            columns.append(word, start, end, confidence, speaker)
+        if not is_final:
+            self._interim = columns
+            return
+        self._interim = _Columns()
+        self._finals.extend(columns)
+        excess = len(self._finals) - self.max_words
+        if excess > 0:
+            # Drop in blocks of at least 1/8 of the cap so trimming stays amortized O(1)
+            n = max(excess, self.max_words // 8)
+            self._finals.drop_front(n)
+            self.dropped += n
+
+    def snapshot(self, since: int = 0) -> dict:
+        """Finals from absolute word index `since` on, plus the current interim.
+        Pass the returned `final_words` back as `since` to fetch only what is new.
+        """
+        lo = max(0, since - self.dropped)
+        return {
+            "sid": self.sid,
+            "kind": self.kind,
+            "live": self.live,
+            "offset": self.dropped + lo,  # absolute index of the first word returned
+            "final_words": self.final_words,
+            "dropped": self.dropped,
+            **self._finals.view(lo),
+            "interim": self._interim.view() if len(self._interim) else None,
+        }
+
+    def text(self) -> str:
+        """Final words as text, one line per speaker turn when diarized."""
+        finals = self._finals
+        if all(s == NO_SPEAKER for s in finals.speaker):
+            return " ".join(finals.word)
+        lines, current, turn = [], None, []
+        for word, speaker in zip(finals.word, finals.speaker):
+            if speaker != current and turn:
+                lines.append(f"[Speaker {current}] " + " ".join(turn))
+                turn = []
+            current = speaker
+            turn.append(word)
+        if turn:
+            lines.append(f"[Speaker {current}] " + " ".join(turn))
+        return "\n".join(lines)
+
+    def export(self, fmt: str = "json") -> dict | str:
+        """The final transcript as columnar JSON (a dict) or plain text. Raises ValueError."""
+        if fmt == "text":
+            return self.text()
+        if fmt != "json":
+            raise ValueError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        snapshot = self.snapshot()
+        del snapshot["interim"]
+        return {**snapshot, "started_at": self.started_at, "finished_at": self.finished_at}
+
+    def stats(self) -> dict:
+        finals = self._finals
+        return {
+            "words": self.final_words,
+            "dropped": self.dropped,
+            "duration": finals.end_ms[-1] / 1000 if len(finals) else 0.0,
+        }
+
+
+class TranscriptStore:
+    def __init__(
+        self,
+        max_words: int = TRANSCRIPT_MAX_WORDS,
+        retention: float = TRANSCRIPT_RETENTION,
+        max_finished: int = TRANSCRIPT_MAX_FINISHED,
+    ):
+        self.max_words = max_words
+        self.retention = retention
+        self.max_finished = max_finished
+        self._live: dict[str, Transcript] = {}
+        self._finished: OrderedDict[str, Transcript] = OrderedDict()
+
+    def open(self, sid: str, kind: str = "") -> Transcript:
+        """A fresh transcript for a new stream on `sid` (replacing any earlier one)."""
+        self._finished.pop(sid, None)
+        transcript = self._live[sid] = Transcript(sid, kind, self.max_words)
+        return transcript
+
+    def get(self, sid: str) -> Transcript | None:
+        """The live transcript for `sid`, else its finished one if still retained."""
+        self._expire()
+        return self._live.get(sid) or self._finished.get(sid)
+
+    def finish(self, sid: str, transcript: Transcript | None = None) -> Transcript | None:
+        """Mark `sid`'s stream ended and retain its transcript for `retention` seconds.
+        Pass the stream's own `transcript` so a newer stream on the same sid is left alone.
+        """
+        current = self._live.get(sid)
+        if transcript is None:
+            transcript = current
+        if transcript is None:
+            return None
+        if current is transcript:
+            del self._live[sid]
+        transcript.live = False
+        transcript.finished_at = time.time()
+        if sid not in self._live:
+            self._finished[sid] = transcript
+            self._finished.move_to_end(sid)
+        self._expire()
+        return transcript
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.retention
+        while self._finished:
+            sid, oldest = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and oldest.finished_at >= cutoff:
+                break
+            del self._finished[sid]
+
+    def stats(self) -> dict:
+        self._expire()
+        return {
+            "live": len(self._live),
+            "finished": len(self._finished),
+            "words": sum(t.final_words - t.dropped for t in (*self._live.values(), *self._finished.values())),
+        }
+
+
+def write_export(transcript: Transcript, directory) -> Path:
+    """Write the JSON export to `directory`/<sid>.json (atomically). Blocking."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{Path(transcript.sid).name}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(transcript.export("json"), separators=(",", ":")))
+    tmp.replace(path)
+    return path
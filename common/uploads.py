@@ -0,0 +1,105 @@
+"""Chunked, size-bounded upload persistence and streamed file reads.
+
+Copies an uploaded body to disk in fixed-size chunks with all blocking file I/O
+off the event loop, hashing the bytes as they pass through, and reads stored
+files back the same way for upstream request bodies. Peak memory per transfer
+is one chunk regardless of file size.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from .audio_index import write_index
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 1024 * 1024 * 1024))  # 1 GiB
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured maximum size."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"upload exceeds maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+def safe_filename(filename: str | None) -> str:
+    """Strip any directory components so uploads can't escape TEMP_DIR."""
+    name = Path(filename or "").name
+    if not name or name in (".", ".."):
+        raise ValueError("invalid filename")
+    return name
+
+
+async def iter_file(source, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """Adapt anything with `async read(n)` (e.g. UploadFile) to an async chunk iterator."""
+    while True:
+        chunk = await source.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def capped(chunks, max_bytes: int):
+    """Pass the async byte iterator `chunks` through, raising UploadTooLarge as soon as
+    more than `max_bytes` have gone by (whatever Content-Length claimed, if anything).
+    """
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        yield chunk
+
+
+async def aiter_path(path: Path, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """Yield the contents of `path` in chunks, reading off the event loop."""
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+async def save_upload(chunks, dest: Path, max_bytes: int = UPLOAD_MAX_BYTES) -> dict:
+    """Stream the async byte iterator `chunks` into `dest`.
+
+    Writes to a sibling ".part" file and renames on success, so a failed or
+    oversized upload never replaces an existing file. The file's audio index
+    (common/audio_index.py) is built and persisted alongside it. Returns
+    {"size", "sha256", "duration", "codec", "sample_rate", "channels", "bitrate"}.
+    Raises UploadTooLarge once more than `max_bytes` have been received.
+    """
+    tmp = dest.with_name(dest.name + ".part")
+    digest = hashlib.sha256()
+    size = 0
+
+    def _write(f, chunk: bytes) -> None:
+        f.write(chunk)
+        digest.update(chunk)
+
+    f = await asyncio.to_thread(open, tmp, "wb")
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            await asyncio.to_thread(_write, f, chunk)
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.replace, tmp, dest)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(tmp.unlink, True)
+        raise
+
+    index = await asyncio.to_thread(write_index, dest, digest.hexdigest())
+    return {"size": size, "sha256": digest.hexdigest(),
+            **{k: index[k] for k in ("duration", "codec", "sample_rate", "channels", "bitrate")}}
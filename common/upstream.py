@@ -0,0 +1,133 @@
+"""Shared, pooled HTTP client for Deepgram REST calls.
+
+One httpx.AsyncClient is reused by every TTS / batch STT request so that
+TCP+TLS handshakes to Deepgram are paid once per pooled connection instead of
+once per request. The pool is owned by the FastAPI lifespan in app.py.
+"""
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEEPGRAM_BASE_URL = os.getenv("DEEPGRAM_BASE_URL", "https://api.deepgram.com")
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 100))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", 20))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", 30.0))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+# Streaming WebSocket base; by default the ws(s):// form of DEEPGRAM_BASE_URL
+DEEPGRAM_WS_URL = os.getenv("DEEPGRAM_WS_URL", "")
+
+
+def websocket_base(base_url: str = DEEPGRAM_BASE_URL) -> str:
+    """The WebSocket base matching a REST base URL: https -> wss, http -> ws."""
+    if DEEPGRAM_WS_URL:
+        return DEEPGRAM_WS_URL.rstrip("/")
+    scheme, sep, rest = base_url.rstrip("/").partition("://")
+    if not sep:
+        return f"wss://{scheme}"
+    return ("ws://" if scheme == "http" else "wss://") + rest
+
+
+class _CountingTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts new TCP connects and TLS handshakes.
+    Uses the httpcore "trace" request extension, so no private hooks are needed
+    for the counters themselves.
+    """
+
+    def __init__(self, counters: dict, **kwargs):
+        super().__init__(**kwargs)
+        self._counters = counters
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self._counters["connects"] += 1
+        elif event_name == "connection.start_tls.complete":
+            self._counters["tls_handshakes"] += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions = {**request.extensions, "trace": self._trace}
+        self._counters["requests"] += 1
+        return await super().handle_async_request(request)
+
+    def connections(self) -> list:
+        pool = getattr(self, "_pool", None)
+        return list(getattr(pool, "connections", []))
+
+
+class UpstreamPool:
+    """Lazily-created, pooled httpx.AsyncClient pointed at the Deepgram REST API.
+
+    The client is created on first use (so in-process ASGITransport tests that
+    never run the lifespan still work) and recreated if it was closed.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEEPGRAM_BASE_URL,
+        max_connections: int = UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive: int = UPSTREAM_MAX_KEEPALIVE,
+        keepalive_expiry: float = UPSTREAM_KEEPALIVE_EXPIRY,
+        http2: bool = UPSTREAM_HTTP2,
+        timeout: float = 60.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and _h2_available()
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._transport: _CountingTransport | None = None
+        self._counters = {"connects": 0, "tls_handshakes": 0, "requests": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            )
+            self._transport = _CountingTransport(self._counters, limits=limits, http2=self.http2)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                transport=self._transport,
+                timeout=self.timeout,
+            )
+            logger.info(
+                "Upstream pool opened: %s (max_connections=%d, keepalive=%d, http2=%s)",
+                self.base_url, self.max_connections, self.max_keepalive, self.http2,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+            logger.info("Upstream pool closed")
+
+    def stats(self) -> dict:
+        """Snapshot of pool occupancy and lifetime handshake counters."""
+        conns = self._transport.connections() if self._transport and self._client else []
+        in_use = sum(1 for c in conns if not c.is_idle())
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            "connections": len(conns),
+            "in_use": in_use,
+            "idle": len(conns) - in_use,
+            **self._counters,
+        }
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("UPSTREAM_HTTP2=true but the 'h2' package is not installed — using HTTP/1.1")
+        return False
+    return True
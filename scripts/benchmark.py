@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Socket.IO load / soak benchmark for the live transcription server.
+Usage: uv run scripts/benchmark.py [-n 50] [--session-seconds 10] [--speed 1] [--ramp 5] \
+           [--soak 600] [--save-baseline bench.json | --baseline bench.json] [--target URL]
+
+By default it starts scripts/mock_deepgram.py and the app (uvicorn app:app, pointed
+at the mock) as subprocesses. It then runs N simulated mic clients, each doing
+toggle_transcription(start), audio_stream frames at --speed x real time, then stop.
+With --soak S each client repeats sessions for S seconds.
+
+--target benchmarks a server that is already running. That server should use the
+mock upstream with matching --interim-interval / --final-interval. Pass --server-pid
+to also sample its RSS.
+
+Reported (JSON on stdout):
+  sessions        started / completed / failed, peak concurrently streaming ("sustained")
+  emit_latency_ms audio frame that triggers a result -> its transcription_update arriving
+                  (the mock's result cadence is replayed client-side to pair them up)
+  loop_lag_ms     server event-loop lag during the run (from /metrics)
+  rss_mb          server RSS before the run and at peak, and growth per peak session
+  audio           bytes sent and bytes the server dropped (stream_finished audio_stats)
+
+--save-baseline writes the report. --baseline compares against one and exits 1 on a
+regression beyond --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import httpx
+import socketio
+
+from scripts.mock_deepgram import ResultCadence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_RATE = 16000
+STREAM_PARAMS = {"model": "nova-3", "encoding": "linear16", "sample_rate": SAMPLE_RATE,
+                 "channels": 1, "interim_results": True}
+
+# (report path, worse when higher?, absolute slack) — a regression must exceed both
+# tolerance * baseline and the slack, so tiny baselines do not flag noise
+REGRESSION_CHECKS = (
+    ("sessions.failed", True, 0),
+    ("sessions.sustained", False, 0),
+    ("emit_latency_ms.p95", True, 5.0),
+    ("emit_latency_ms.p99", True, 10.0),
+    ("loop_lag_ms.p99", True, 5.0),
+    ("rss_mb.per_session_kb", True, 64.0),
+    ("audio.drop_ratio", True, 0.001),
+)
+
+
+def percentiles(values: list[float], qs=(0.5, 0.95, 0.99)) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    out = {"count": len(ordered)}
+    for q in qs:
+        out[f"p{round(q * 100)}"] = round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+    out["max"] = round(ordered[-1], 2)
+    return out
+
+
+def rss_mb(pid: int | None) -> float | None:
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+_BUCKET = re.compile(r'^stt_event_loop_lag_seconds_bucket\{le="([^"]+)"\} (\d+)', re.M)
+
+
+async def loop_lag_buckets(http: httpx.AsyncClient) -> dict[float, int] | None:
+    try:
+        text = (await http.get("/metrics")).text
+    except httpx.HTTPError:
+        return None
+    return {float(le): int(n) for le, n in _BUCKET.findall(text)} or None
+
+
+def lag_percentiles(before: dict | None, after: dict | None) -> dict:
+    """p50/p99 of event-loop lag from cumulative histogram deltas, as bucket upper bounds."""
+    if not before or not after:
+        return {"count": 0}
+    bounds = sorted(after)
+    delta = {b: after[b] - before.get(b, 0) for b in bounds}
+    total = delta[bounds[-1]]
+    if not total:
+        return {"count": 0}
+    out = {"count": total}
+    for q in (0.5, 0.99):
+        bound = next(b for b in bounds if delta[b] >= q * total)
+        out[f"p{round(q * 100)}"] = bound * 1000 if bound != float("inf") else None
+    return out
+
+
+class Stats:
+    def __init__(self):
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.errors: dict[str, int] = {}
+        self.active = 0
+        self.peak_active = 0
+        self.latencies: list[float] = []
+        self.updates = 0
+        self.bytes_sent = 0
+        self.bytes_dropped = 0
+        self.peak_rss = None
+
+    def error(self, cause: str) -> None:
+        self.failed += 1
+        self.errors[cause] = self.errors.get(cause, 0) + 1
+
+
+class SimClient:
+    """One simulated browser tab streaming mic audio."""
+
+    def __init__(self, target: str, stats: Stats, cadence_intervals: tuple[float, float],
+                 session_seconds: float, speed: float, frame_ms: int):
+        self.target = target
+        self.stats = stats
+        self.intervals = cadence_intervals
+        self.session_seconds = session_seconds
+        self.speed = speed
+        self.frame_ms = frame_ms
+        self.frame_bytes = SAMPLE_RATE * 2 * frame_ms // 1000
+        self.frame_interval = frame_ms / 1000 / speed
+
+    async def session(self) -> None:
+        stats = self.stats
+        sio = socketio.AsyncClient(reconnection=False)
+        started, finished = asyncio.Event(), asyncio.Event()
+        pending: deque[float] = deque()  # send times of frames that should produce a result
+        outcome = {"error": None, "audio_stats": {}}
+
+        @sio.on("stream_started")
+        async def on_started(data):
+            started.set()
+
+        @sio.on("transcription_update")
+        async def on_update(data):
+            stats.updates += 1
+            if pending:
+                stats.latencies.append((time.perf_counter() - pending.popleft()) * 1000)
+
+        @sio.on("stream_error")
+        async def on_error(data):
+            outcome["error"] = "capacity" if "retry_after" in (data or {}) else "stream_error"
+            started.set()
+            finished.set()
+
+        @sio.on("stream_finished")
+        async def on_finished(data):
+            outcome["audio_stats"] = (data or {}).get("audio_stats") or {}
+            finished.set()
+
+        try:
+            await sio.connect(self.target, transports=["websocket"])
+        except Exception:
+            stats.error("connect")
+            return
+        try:
+            await sio.emit("toggle_transcription", {"action": "start", "params": STREAM_PARAMS})
+            try:
+                await asyncio.wait_for(started.wait(), 30)
+            except asyncio.TimeoutError:
+                stats.error("start_timeout")
+                return
+            if outcome["error"]:
+                stats.error(outcome["error"])
+                return
+
+            stats.started += 1
+            stats.active += 1
+            stats.peak_active = max(stats.peak_active, stats.active)
+            cadence = ResultCadence(STREAM_PARAMS, *self.intervals)
+            frame = bytes(self.frame_bytes)
+            frames = round(self.session_seconds * 1000 / self.frame_ms)
+            t0 = time.perf_counter()
+            try:
+                for i in range(frames):
+                    # Absolute schedule: a slow send does not push every later frame back
+                    await asyncio.sleep(max(0.0, t0 + i * self.frame_interval - time.perf_counter()))
+                    await sio.emit("audio_stream", frame)
+                    stats.bytes_sent += len(frame)
+                    if cadence.feed(frame):
+                        pending.append(time.perf_counter())
+                if cadence.close():
+                    pending.append(time.perf_counter())
+                await sio.emit("toggle_transcription", {"action": "stop"})
+                try:
+                    await asyncio.wait_for(finished.wait(), 30)
+                except asyncio.TimeoutError:
+                    stats.error("finish_timeout")
+                    return
+            finally:
+                stats.active -= 1
+            if outcome["error"]:
+                stats.error(outcome["error"])
+                return
+            stats.completed += 1
+            stats.bytes_dropped += outcome["audio_stats"].get("dropped_bytes", 0)
+        finally:
+            await sio.disconnect()
+
+    async def run(self, deadline: float | None) -> None:
+        await self.session()
+        while deadline is not None and time.monotonic() < deadline:
+            await self.session()
+
+
+async def run(target: str, clients: int = 10, session_seconds: float = 5.0, speed: float = 1.0,
+              frame_ms: int = 100, ramp: float = 0.0, soak: float = 0.0,
+              cadence_intervals: tuple[float, float] = (1.0, 3.0), server_pid: int | None = None) -> dict:
+    """Drive `clients` simulated sessions against `target` and return the report dict."""
+    stats = Stats()
+    async with httpx.AsyncClient(base_url=target, timeout=10) as http:
+        lag_before = await loop_lag_buckets(http)
+        rss_before = rss_mb(server_pid)
+
+        async def sample_rss():
+            while True:
+                rss = rss_mb(server_pid)
+                if rss is not None and stats.active and (stats.peak_rss is None or rss > stats.peak_rss):
+                    stats.peak_rss = rss
+                await asyncio.sleep(0.25)
+
+        sampler = asyncio.create_task(sample_rss())
+        deadline = time.monotonic() + soak if soak else None
+        sims = [SimClient(target, stats, cadence_intervals, session_seconds, speed, frame_ms)
+                for _ in range(clients)]
+
+        async def launch(i, sim):
+            await asyncio.sleep(ramp * i / max(clients, 1))
+            await sim.run(deadline)
+
+        started = time.monotonic()
+        await asyncio.gather(*(launch(i, sim) for i, sim in enumerate(sims)))
+        elapsed = time.monotonic() - started
+        sampler.cancel()
+        lag_after = await loop_lag_buckets(http)
+
+    per_session_kb = None
+    if rss_before is not None and stats.peak_rss is not None and stats.peak_active:
+        per_session_kb = round(max(0.0, stats.peak_rss - rss_before) * 1024 / stats.peak_active, 1)
+    return {
+        "config": {"clients": clients, "session_seconds": session_seconds, "speed": speed,
+                   "frame_ms": frame_ms, "ramp": ramp, "soak": soak},
+        "elapsed_s": round(elapsed, 2),
+        "sessions": {"started": stats.started, "completed": stats.completed, "failed": stats.failed,
+                     "errors": stats.errors, "sustained": stats.peak_active},
+        "emit_latency_ms": percentiles(stats.latencies),
+        "updates": stats.updates,
+        "loop_lag_ms": lag_percentiles(lag_before, lag_after),
+        "rss_mb": {"before": rss_before and round(rss_before, 1),
+                   "peak": stats.peak_rss and round(stats.peak_rss, 1),
+                   "per_session_kb": per_session_kb},
+        "audio": {"bytes_sent": stats.bytes_sent, "bytes_dropped": stats.bytes_dropped,
+                  "drop_ratio": round(stats.bytes_dropped / stats.bytes_sent, 6) if stats.bytes_sent else 0.0},
+    }
+
+
+def _lookup(report: dict, path: str):
+    value = report
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.2) -> list[str]:
+    """Regressions of `report` against `baseline`, as readable lines (empty = none)."""
+    regressions = []
+    for path, higher_is_worse, slack in REGRESSION_CHECKS:
+        now, then = _lookup(report, path), _lookup(baseline, path)
+        if now is None or then is None:
+            continue
+        change = (now - then) if higher_is_worse else (then - now)
+        if change > max(abs(then) * tolerance, slack):
+            regressions.append(f"{path}: {then} -> {now}")
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as http:
+        while True:
+            try:
+                await http.get(url)
+                return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not come up")
+                await asyncio.sleep(0.1)
+
+
+def spawn_stack(args) -> tuple[str, list[subprocess.Popen]]:
+    """Start the mock upstream and the app; returns (app URL, processes)."""
+    mock_port, app_port = _free_port(), _free_port()
+    env = {**os.environ,
+           "MOCK_INTERIM_INTERVAL": str(args.interim_interval), "MOCK_FINAL_INTERVAL": str(args.final_interval)}
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "scripts", "mock_deepgram.py"), "--port", str(mock_port),
+         "--latency", str(args.mock_latency), "--jitter", str(args.mock_jitter)],
+        env=env,
+    )
+    app_env = {**os.environ, "DEEPGRAM_BASE_URL": f"http://127.0.0.1:{mock_port}",
+               "DEEPGRAM_API_KEY": os.getenv("DEEPGRAM_API_KEY") or "benchmark"}
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(app_port), "--log-level", "warning"],
+        cwd=ROOT, env=app_env,
+    )
+    return f"http://127.0.0.1:{app_port}", [app, mock]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO load / soak benchmark")
+    parser.add_argument("-n", "--clients", type=int, default=10, help="Concurrent simulated clients")
+    parser.add_argument("--session-seconds", type=float, default=5.0, help="Audio seconds per session")
+    parser.add_argument("--speed", type=float, default=1.0, help="Audio send rate, x real time")
+    parser.add_argument("--frame-ms", type=int, default=100, help="audio_stream frame size in ms")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which clients start")
+    parser.add_argument("--soak", type=float, default=0.0, help="Repeat sessions for this many seconds")
+    parser.add_argument("--target", help="Benchmark an already-running server instead of spawning one")
+    parser.add_argument("--server-pid", type=int, help="PID of --target, for RSS sampling")
+    parser.add_argument("--mock-latency", type=float, default=0.0, help="Spawned mock: result latency (s)")
+    parser.add_argument("--mock-jitter", type=float, default=0.0, help="Spawned mock: latency jitter (s)")
+    parser.add_argument("--interim-interval", type=float, default=1.0, help="Mock interim cadence (audio s)")
+    parser.add_argument("--final-interval", type=float, default=3.0, help="Mock final cadence (audio s)")
+    parser.add_argument("--baseline", help="Compare against this saved report; exit 1 on regression")
+    parser.add_argument("--save-baseline", help="Write the report to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    processes = []
+    target, server_pid = args.target, args.server_pid
+    try:
+        if not target:
+            target, processes = spawn_stack(args)
+            server_pid = processes[0].pid
+            asyncio.run(_wait_ready(target + "/metrics"))
+        report = asyncio.run(run(
+            target, clients=args.clients, session_seconds=args.session_seconds, speed=args.speed,
+            frame_ms=args.frame_ms, ramp=args.ramp, soak=args.soak,
+            cadence_intervals=(args.interim_interval, args.final_interval), server_pid=server_pid,
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(10)
+
+    print(json.dumps(report, indent=2))
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
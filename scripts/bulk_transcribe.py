@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Bulk pre-recorded transcription with bounded concurrency and resume.
+Usage: uv run scripts/bulk_transcribe.py recordings/ "more/**/*.mp3" --manifest list.txt \
+           --out results.jsonl [--out-dir results/] [-j 16] [--model nova-3] [--param smart_format=true]
+
+Sources are directories (searched recursively for audio files), glob patterns, URLs,
+or a --manifest of paths/URLs (one per line, or JSONL with a "path" or "url" field).
+Results go to one JSONL file (--out) or one JSON file per source (--out-dir). Sources
+that already have a successful result are skipped, so an interrupted run can be
+re-run as-is. Transient failures (network errors, 429, 5xx) are retried with backoff.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from hashlib import sha1
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import requests
+from dotenv import load_dotenv
+load_dotenv()
+
+from stt.client import STTClient
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm", ".aac", ".mp4", ".wma", ".amr"}
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def discover(sources: list[str], manifest: str | None = None) -> list[str]:
+    """Expand directories, globs and a manifest into an ordered, de-duplicated source list."""
+    found: list[str] = []
+    for source in sources:
+        if source.startswith(("http://", "https://")):
+            found.append(source)
+        elif os.path.isdir(source):
+            found.extend(
+                str(p) for p in sorted(Path(source).rglob("*"))
+                if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS
+            )
+        elif glob.has_magic(source):
+            found.extend(sorted(p for p in glob.glob(source, recursive=True) if os.path.isfile(p)))
+        else:
+            found.append(source)
+    if manifest:
+        with open(manifest) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if line.startswith("{"):
+                    entry = json.loads(line)
+                    line = entry.get("url") or entry.get("path")
+                found.append(line)
+    return list(dict.fromkeys(found))
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUSES
+    return False
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def transcribe_with_retry(client, source: str, params: dict, retries: int, backoff: float, timeout: float):
+    """Returns (result, attempts). Re-raises the last error when retries run out."""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return client.transcribe_batch(source, params, timeout=timeout), attempt
+        except Exception as e:
+            if attempt > retries or not is_transient(e):
+                e.attempts = attempt
+                raise
+            delay = _retry_after(e) or backoff * 2 ** (attempt - 1)
+            time.sleep(delay * random.uniform(0.8, 1.2))
+
+
+def audio_duration(result: dict) -> float:
+    return float((result.get("metadata") or {}).get("duration") or 0.0)
+
+
+class JsonlSink:
+    """All results in one JSONL file; resume skips sources with an "ok" line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def pending(self, sources: list[str]) -> list[str]:
+        done = set()
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from an interrupted run
+                    if record.get("status") == "ok":
+                        done.add(record["source"])
+        return [s for s in sources if s not in done]
+
+    def write(self, record: dict) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+class DirSink:
+    """One <name>.json per source; failures go to <name>.error.json and are retried on resume."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _name(self, source: str) -> str:
+        stem = Path(source.split("?")[0]).stem or "audio"
+        return f"{stem}-{sha1(source.encode()).hexdigest()[:10]}"
+
+    def pending(self, sources: list[str]) -> list[str]:
+        done = {p.stem for p in self.directory.glob("*.json") if not p.name.endswith(".error.json")}
+        return [s for s in sources if self._name(s) not in done]
+
+    def write(self, record: dict) -> None:
+        name = self._name(record["source"])
+        suffix = ".json" if record["status"] == "ok" else ".error.json"
+        path = self.directory / (name + suffix)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(record))
+        os.replace(tmp, path)
+        if record["status"] == "ok":
+            (self.directory / (name + ".error.json")).unlink(missing_ok=True)
+
+
+class Progress:
+    def __init__(self, total: int, stream=sys.stderr, interval: float = 5.0):
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.started = time.monotonic()
+        self._last_report = self.started
+        self.ok = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.retries = 0
+
+    def record(self, record: dict) -> None:
+        if record["status"] == "ok":
+            self.ok += 1
+            self.audio_seconds += record["duration"]
+        else:
+            self.failed += 1
+        self.retries += record["attempts"] - 1
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            print(self.line(), file=self.stream, flush=True)
+
+    def summary(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "files": self.ok + self.failed,
+            "ok": self.ok,
+            "failed": self.failed,
+            "retries": self.retries,
+            "elapsed_s": round(elapsed, 2),
+            "files_per_s": round((self.ok + self.failed) / elapsed, 3),
+            "audio_hours": round(self.audio_seconds / 3600, 4),
+            "audio_hours_per_s": round(self.audio_seconds / 3600 / elapsed, 5),
+        }
+
+    def line(self) -> str:
+        s = self.summary()
+        return (f"[{s['files']}/{self.total}] ok={s['ok']} failed={s['failed']} "
+                f"{s['files_per_s']} files/s, {s['audio_hours_per_s']} audio-h/s "
+                f"({s['audio_hours']} h in {s['elapsed_s']} s)")
+
+
+def run(client, sources: list[str], params: dict, sink, concurrency: int = 8, retries: int = 3,
+        backoff: float = 1.0, timeout: float = 600, progress: Progress | None = None) -> dict:
+    """Transcribe `sources` through `client` with at most `concurrency` requests in flight.
+    Results are written (and progress recorded) from this thread only.
+    """
+    pending = sink.pending(sources)
+    skipped = len(sources) - len(pending)
+    progress = progress or Progress(len(pending))
+    progress.total = len(pending)
+
+    def work(source: str) -> dict:
+        started = time.monotonic()
+        try:
+            result, attempts = transcribe_with_retry(client, source, params, retries, backoff, timeout)
+            return {"source": source, "status": "ok", "duration": audio_duration(result),
+                    "elapsed": round(time.monotonic() - started, 3), "attempts": attempts, "result": result}
+        except Exception as e:
+            return {"source": source, "status": "error", "duration": 0.0,
+                    "elapsed": round(time.monotonic() - started, 3),
+                    "attempts": getattr(e, "attempts", 1), "error": str(e)}
+
+    # Submit lazily: only `concurrency` futures exist at a time, however long the list
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        queue = iter(pending)
+        in_flight = set()
+        for source in queue:
+            in_flight.add(pool.submit(work, source))
+            if len(in_flight) >= concurrency:
+                break
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                sink.write(record)
+                progress.record(record)
+                next_source = next(queue, None)
+                if next_source is not None:
+                    in_flight.add(pool.submit(work, next_source))
+
+    return {**progress.summary(), "skipped": skipped}
+
+
+def _parse_value(value: str):
+    lowered = value.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk Deepgram pre-recorded transcription")
+    parser.add_argument("sources", nargs="*", help="Audio files, directories, glob patterns or URLs")
+    parser.add_argument("--manifest", help="File listing sources (one per line, or JSONL with path/url)")
+    out = parser.add_mutually_exclusive_group(required=True)
+    out.add_argument("--out", help="Append results to this JSONL file")
+    out.add_argument("--out-dir", help="Write one JSON result per source into this directory")
+    parser.add_argument("-j", "--concurrency", type=int, default=8, help="Requests in flight (default 8)")
+    parser.add_argument("--model", default="nova-3")
+    parser.add_argument("--param", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra Deepgram param; repeat for more (e.g. --param smart_format=true)")
+    parser.add_argument("--retries", type=int, default=3, help="Retries for transient failures (default 3)")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-request timeout in seconds")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    api_key = os.getenv("DEEPGRAM_API_KEY")
+    if not api_key:
+        print("Error: DEEPGRAM_API_KEY not set")
+        sys.exit(1)
+
+    sources = discover(args.sources, args.manifest)
+    if not sources:
+        print("Error: no sources found")
+        sys.exit(1)
+
+    params = {"model": args.model}
+    for item in args.param:
+        key, _, value = item.partition("=")
+        params[key] = _parse_value(value)
+
+    sink = JsonlSink(args.out) if args.out else DirSink(args.out_dir)
+    client = STTClient(api_key, pool_size=args.concurrency)
+    progress = Progress(len(sources), interval=args.progress_interval)
+    try:
+        summary = run(client, sources, params, sink, concurrency=args.concurrency,
+                      retries=args.retries, timeout=args.timeout, progress=progress)
+    finally:
+        client.close()
+    print(json.dumps(summary))
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
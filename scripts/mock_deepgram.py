@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Deepgram API, for offline load and latency testing.
+Usage: uv run scripts/mock_deepgram.py [--port 8080] [--latency 0.2] [--jitter 0.05] \
+           [--error-rate 0.01] [--throughput 2000000] [--max-streams 50]
+
+Then point the app at it:
+    DEEPGRAM_BASE_URL=http://127.0.0.1:8080 uv run uvicorn app:app
+
+Implements POST /v1/listen (JSON {"url"} or a raw audio body), the /v1/listen
+WebSocket protocol (interim/final Results, KeepAlive, CloseStream, Metadata) and
+POST /v1/speak as a streamed response of silent MP3 frames. Transcripts are
+synthetic: their length follows the audio duration, estimated from the
+encoding/sample_rate params, a WAV header, or a default byte rate.
+
+Every MOCK_* setting can be changed at runtime with POST /mock/config (JSON),
+and GET /mock/stats reports request, stream and error counters.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import struct
+import time
+import uuid
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+WORDS = ("the quick brown fox jumps over the lazy dog while a mock deepgram server "
+         "streams synthetic words at a steady rate for testing").split()
+WORDS_PER_SECOND = 2.5
+DEFAULT_BYTES_PER_SECOND = 32000  # 16 kHz 16-bit mono, when the format is unknown
+MP3_BYTES_PER_SECOND = 16000  # the 128 kbps frames produced by /v1/speak
+# One silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, mono, 1152 samples (26 ms)
+_MP3_FRAME = b"\xff\xfb\x90\xc0" + bytes(413)
+_MP3_FRAME_SECONDS = 1152 / 44100
+TTS_CHARS_PER_SECOND = 15
+
+
+class MockConfig:
+    """Behaviour knobs. Defaults come from MOCK_* environment variables."""
+
+    __slots__ = ("latency", "jitter", "error_rate", "error_status", "drop_rate", "throughput",
+                 "max_streams", "interim_interval", "final_interval", "idle_timeout", "require_auth")
+
+    def __init__(self, **overrides):
+        self.latency = float(os.getenv("MOCK_LATENCY", 0.0))          # seconds added to every response/result
+        self.jitter = float(os.getenv("MOCK_JITTER", 0.0))            # +/- uniform seconds on top of latency
+        self.error_rate = float(os.getenv("MOCK_ERROR_RATE", 0.0))    # share of requests/connects that fail
+        self.error_status = int(os.getenv("MOCK_ERROR_STATUS", 503))  # status used for injected errors
+        self.drop_rate = float(os.getenv("MOCK_DROP_RATE", 0.0))      # chance a stream drops at each final
+        self.throughput = int(os.getenv("MOCK_THROUGHPUT", 0))        # bytes/s per request or stream, 0 = unlimited
+        self.max_streams = int(os.getenv("MOCK_MAX_STREAMS", 0))      # concurrent WebSockets, 0 = unlimited
+        self.interim_interval = float(os.getenv("MOCK_INTERIM_INTERVAL", 1.0))  # audio seconds per interim
+        self.final_interval = float(os.getenv("MOCK_FINAL_INTERVAL", 3.0))      # audio seconds per final
+        self.idle_timeout = float(os.getenv("MOCK_IDLE_TIMEOUT", 10.0))
+        self.require_auth = os.getenv("MOCK_REQUIRE_AUTH", "true").lower() == "true"
+        self.update(overrides)
+
+    def update(self, values: dict) -> None:
+        for key, value in values.items():
+            if key not in self.__slots__:
+                raise ValueError(f"unknown setting: {key}")
+            if isinstance(getattr(self, key, None), bool) and isinstance(value, str):
+                value = value.lower() == "true"
+            setattr(self, key, type(getattr(self, key))(value))
+
+    def as_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+class Throttle:
+    """Paces a byte stream to `rate` bytes/s (0 = unlimited)."""
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.started = time.monotonic()
+        self.bytes = 0
+
+    async def consume(self, n: int) -> None:
+        if self.rate <= 0:
+            return
+        self.bytes += n
+        ahead = self.bytes / self.rate - (time.monotonic() - self.started)
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+
+
+def bytes_per_second(params, head: bytes = b"", content_type: str = "") -> float:
+    """Audio byte rate from raw-audio params, a WAV header, or the content type."""
+    if params.get("encoding") in ("linear16", "linear32", "mulaw", "alaw"):
+        width = {"linear16": 2, "linear32": 4}.get(params["encoding"], 1)
+        return int(params.get("sample_rate", 16000)) * int(params.get("channels", 1)) * width
+    if head[:4] == b"RIFF" and len(head) >= 32:
+        return struct.unpack_from("<I", head, 28)[0] or DEFAULT_BYTES_PER_SECOND
+    if "mp3" in content_type or "mpeg" in content_type or head[:2] == b"\xff\xfb":
+        return MP3_BYTES_PER_SECOND
+    return DEFAULT_BYTES_PER_SECOND
+
+
+class ResultCadence:
+    """When a mock stream emits Results. feed() each audio chunk as it arrives and
+    close() on CloseStream; each returns a (start, end, is_final) span to send, or None.
+    scripts/benchmark.py replays the same cadence client-side to match every
+    transcription_update with the audio frame that triggered it.
+    """
+
+    def __init__(self, params, interim_interval: float, final_interval: float):
+        self.params = params
+        self.interim = params.get("interim_results") in (True, "true")
+        self.interim_interval = interim_interval
+        self.final_interval = final_interval
+        self.rate = None
+        self.received = 0
+        self.final_at = 0.0  # audio seconds covered by finals so far
+        self.interim_at = 0.0
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.received / self.rate if self.rate else 0.0
+
+    def feed(self, chunk: bytes) -> tuple | None:
+        self.rate = self.rate or bytes_per_second(self.params, chunk)
+        self.received += len(chunk)
+        audio_at = self.audio_seconds
+        if audio_at - self.final_at >= self.final_interval:
+            span = (self.final_at, audio_at, True)
+            self.final_at = self.interim_at = audio_at
+            return span
+        if self.interim and audio_at - self.interim_at >= self.interim_interval:
+            self.interim_at = audio_at
+            return (self.final_at, audio_at, False)
+        return None
+
+    def close(self) -> tuple | None:
+        end = self.audio_seconds
+        if end > self.final_at:
+            span, self.final_at = (self.final_at, end, True), end
+            return span
+        return None
+
+
+def words_between(start: float, end: float) -> list[dict]:
+    """Synthetic words for the audio span [start, end), deterministic by position."""
+    first, last = int(start * WORDS_PER_SECOND), int(end * WORDS_PER_SECOND)
+    return [
+        {"word": WORDS[i % len(WORDS)], "start": round(i / WORDS_PER_SECOND, 3),
+         "end": round((i + 1) / WORDS_PER_SECOND, 3), "confidence": 0.99}
+        for i in range(first, last)
+    ]
+
+
+def _alternative(words: list[dict]) -> dict:
+    return {"transcript": " ".join(w["word"] for w in words), "confidence": 0.99 if words else 0.0,
+            "words": words}
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"err_code": "MOCK_ERROR", "err_msg": message, "request_id": str(uuid.uuid4())},
+                        status_code=status)
+
+
+async def _deny(ws: WebSocket, response: Response) -> None:
+    """Reject a WebSocket handshake with an HTTP status, as Deepgram does (401, 429...).
+    Servers without the denial-response extension get a policy-violation close instead.
+    """
+    try:
+        await ws.send_denial_response(response)
+    except RuntimeError:
+        await ws.close(code=1008)
+
+
+def create_app(config: MockConfig | None = None) -> FastAPI:
+    config = config or MockConfig()
+    stats = {"batch_requests": 0, "speak_requests": 0, "streams_opened": 0, "streams_active": 0,
+             "streams_rejected": 0, "errors_injected": 0, "drops_injected": 0, "audio_bytes": 0}
+    app = FastAPI(title="mock-deepgram")
+    app.state.config = config
+    app.state.stats = stats
+
+    def unauthorized(headers) -> bool:
+        return config.require_auth and not headers.get("authorization", "").lower().startswith(("token ", "bearer "))
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return {**stats, "config": config.as_dict()}
+
+    @app.post("/mock/config")
+    async def mock_config(request: Request):
+        try:
+            config.update(await request.json())
+        except (TypeError, ValueError) as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        return config.as_dict()
+
+    @app.post("/v1/listen")
+    async def listen_batch(request: Request):
+        stats["batch_requests"] += 1
+        if unauthorized(request.headers):
+            return _error(401, "Invalid credentials.")
+        if config.fail():
+            stats["errors_injected"] += 1
+            return _error(config.error_status, "Injected error")
+
+        content_type = request.headers.get("content-type", "")
+        throttle = Throttle(config.throughput)
+        size, head = 0, b""
+        if content_type.startswith("application/json"):
+            body = await request.json()
+            if not body.get("url"):
+                return _error(400, "url is required")
+            duration = 30.0  # remote audio is not fetched
+        else:
+            async for chunk in request.stream():
+                if len(head) < 64:
+                    head += chunk[:64 - len(head)]
+                size += len(chunk)
+                await throttle.consume(len(chunk))
+            header = 44 if head[:4] == b"RIFF" else 0  # canonical WAV header
+            duration = max(0, size - header) / bytes_per_second(request.query_params, head, content_type)
+        stats["audio_bytes"] += size
+        await asyncio.sleep(config.delay())
+
+        words = words_between(0, duration)
+        request_id = str(uuid.uuid4())
+        return JSONResponse({
+            "metadata": {"request_id": request_id, "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                         "duration": round(duration, 3), "channels": 1,
+                         "models": [request.query_params.get("model", "nova-3")]},
+            "results": {"channels": [{"alternatives": [_alternative(words)]}]},
+        }, headers={"dg-request-id": request_id})
+
+    @app.post("/v1/speak")
+    async def speak(request: Request):
+        stats["speak_requests"] += 1
+        if unauthorized(request.headers):
+            return _error(401, "Invalid credentials.")
+        if config.fail():
+            stats["errors_injected"] += 1
+            return _error(config.error_status, "Injected error")
+        text = (await request.json()).get("text", "")
+        if not text:
+            return _error(400, "text is required")
+        frames = max(1, int(len(text) / TTS_CHARS_PER_SECOND / _MP3_FRAME_SECONDS))
+        first_byte_delay = config.delay()
+
+        async def audio():
+            await asyncio.sleep(first_byte_delay)
+            throttle = Throttle(config.throughput)
+            for start in range(0, frames, 8):
+                chunk = _MP3_FRAME * min(8, frames - start)
+                await throttle.consume(len(chunk))
+                yield chunk
+
+        return StreamingResponse(audio(), media_type="audio/mpeg",
+                                 headers={"dg-request-id": str(uuid.uuid4())})
+
+    @app.websocket("/v1/listen")
+    async def listen_stream(ws: WebSocket):
+        if unauthorized(ws.headers):
+            await _deny(ws, _error(401, "Invalid credentials."))
+            return
+        if config.fail():
+            stats["errors_injected"] += 1
+            await _deny(ws, _error(config.error_status, "Injected error"))
+            return
+        if config.max_streams and stats["streams_active"] >= config.max_streams:
+            stats["streams_rejected"] += 1
+            await _deny(ws, _error(429, "Too many concurrent requests."))
+            return
+
+        params = ws.query_params
+        request_id = str(uuid.uuid4())
+        await ws.accept(headers=[(b"dg-request-id", request_id.encode())])
+        stats["streams_opened"] += 1
+        stats["streams_active"] += 1
+        try:
+            await _run_stream(ws, params, request_id, config, stats)
+        finally:
+            stats["streams_active"] -= 1
+
+    return app
+
+
+async def _run_stream(ws: WebSocket, params, request_id: str, config: MockConfig, stats: dict) -> None:
+    """Deepgram-style session: interims every interim_interval of audio (with
+    interim_results=true), a final every final_interval, and on CloseStream a final
+    for the rest, then Metadata and a normal close. Results go out after the
+    configured latency, in order.
+    """
+    cadence = ResultCadence(params, config.interim_interval, config.final_interval)
+    outbox: asyncio.Queue = asyncio.Queue()
+    last_due = 0.0
+    throttle = Throttle(config.throughput)
+    loop = asyncio.get_running_loop()
+
+    def schedule(message: dict | None, close: tuple | None = None) -> None:
+        nonlocal last_due
+        last_due = max(last_due, loop.time() + config.delay())  # jitter never reorders results
+        outbox.put_nowait((last_due, message, close))
+
+    def results(start: float, end: float, is_final: bool) -> dict:
+        return {"type": "Results", "channel_index": [0, 1], "duration": round(end - start, 3),
+                "start": round(start, 3), "is_final": is_final, "speech_final": is_final,
+                "channel": {"alternatives": [_alternative(words_between(start, end))]},
+                "metadata": {"request_id": request_id}}
+
+    async def sender():
+        while True:
+            due, message, close = await outbox.get()
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            if message is not None:
+                await ws.send_text(json.dumps(message))
+            if close is not None:
+                await ws.close(*close)
+                return
+
+    send_task = asyncio.create_task(sender())
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(ws.receive(), config.idle_timeout)
+            except asyncio.TimeoutError:
+                schedule(None, (1011, "Deepgram did not receive audio data or a text message within the timeout window."))
+                break
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                chunk = message["bytes"]
+                stats["audio_bytes"] += len(chunk)
+                await throttle.consume(len(chunk))
+                span = cadence.feed(chunk)
+                if span:
+                    schedule(results(*span))
+                    if span[2] and config.drop_rate and random.random() < config.drop_rate:
+                        stats["drops_injected"] += 1
+                        schedule(None, (1011, "Injected drop"))
+                        break
+                continue
+            try:
+                control = json.loads(message.get("text") or "{}")
+            except ValueError:
+                continue
+            if control.get("type") == "CloseStream":
+                span = cadence.close()
+                if span:
+                    schedule(results(*span))
+                schedule({"type": "Metadata", "request_id": request_id, "duration": round(cadence.audio_seconds, 3),
+                          "channels": 1, "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+                         (1000, ""))
+                break
+            # KeepAlive (and anything else) only resets the idle timer
+        await send_task
+    except (WebSocketDisconnect, RuntimeError, OSError):
+        pass  # client went away
+    finally:
+        send_task.cancel()
+
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Deepgram API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, help="Seconds added to each response / result")
+    parser.add_argument("--jitter", type=float, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, help="Share of requests and connects that fail (0-1)")
+    parser.add_argument("--error-status", type=int, help="HTTP status for injected errors (default 503)")
+    parser.add_argument("--drop-rate", type=float, help="Chance a stream is dropped at each final result")
+    parser.add_argument("--throughput", type=int, help="Bytes/s per request or stream (0 = unlimited)")
+    parser.add_argument("--max-streams", type=int, help="Concurrent WebSockets before 429 (0 = unlimited)")
+    args = parser.parse_args()
+
+    import uvicorn
+    overrides = {k: v for k, v in vars(args).items() if k not in ("host", "port") and v is not None}
+    app.state.config.update(overrides)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
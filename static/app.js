@@ -163,6 +163,11 @@ function appData() {
 
     // ---- Transcript helpers ----
     _applyTranscriptUpdate(data) {
+      // Delta-encoded interims (interim_delta param): rebuild from the last interim
+      if (data.delta != null) {
+        data.transcript = (this._lastInterimText || '').slice(0, data.offset) + data.delta;
+      }
+      this._lastInterimText = data.is_final ? '' : (data.transcript || '');
       const text = data.transcript || '';
       const prefix = (data.speaker != null) ? `<span class="speaker-label">[Speaker ${data.speaker}]</span> ` : '';
       if (data.is_final) {
@@ -185,12 +190,36 @@ function appData() {
       }
     },
 
+    // After a page reload, refill the transcript from the server-side copy of the last stream
+    _restoreTranscript() {
+      const prev = sessionStorage.getItem('dgTranscriptSid');
+      const token = sessionStorage.getItem('dgTranscriptToken');
+      if (!prev || !token || prev === this.socket.id || this.finalTranscript) return;
+      this.socket.emit('get_transcript', { sid: prev, token }, (snap) => {
+        if (!snap || snap.error || !snap.word.length || this.finalTranscript) return;
+        let turn = null, line = [];
+        const flush = () => {
+          if (!line.length) return;
+          const prefix = turn != null ? `<span class="speaker-label">[Speaker ${turn}]</span> ` : '';
+          this.finalTranscript += prefix + this.escapeHtml(line.join(' ')) + '\n';
+          line = [];
+        };
+        snap.word.forEach((w, i) => {
+          const speaker = snap.speaker ? snap.speaker[i] : null;
+          if (speaker !== turn) { flush(); turn = speaker; }
+          line.push(w);
+        });
+        flush();
+      });
+    },
+
     // ---- SocketIO ----
     setupSocket() {
       this.socket = io(window.location.origin, { transports: ['websocket', 'polling'] });
 
       this.socket.on('connect', () => {
         this.connected = true;
+        this._restoreTranscript();
       });
 
       this.socket.on('disconnect', () => {
@@ -205,6 +234,9 @@ function appData() {
 
       this.socket.on('stream_started', (data) => {
         this.streamUrl = data.url || '';
+        // The server keeps this stream's transcript; a reload can fetch it by this id and token
+        sessionStorage.setItem('dgTranscriptSid', this.socket.id);
+        if (data.transcript_token) sessionStorage.setItem('dgTranscriptToken', data.transcript_token);
         if (this.fileStreamState === 'idle') this.fileStreamState = 'streaming';
         // Flush any audio buffered before the connection was ready
         if (this._pendingAudio && this._pendingAudio.length > 0) {
@@ -224,6 +256,10 @@ function appData() {
         }
       });
 
+      this.socket.on('stream_queued', (data) => {
+        this.showToast(`Server busy — queued (position ${data.position})`, 'info');
+      });
+
       this.socket.on('stream_error', (data) => {
         console.error('[DG] stream_error:', data.message);
         // Stop MediaRecorder and release mic so next Start works cleanly
@@ -234,8 +270,10 @@ function appData() {
         this.streamUrl = '';
         this.fileStreamState = 'error';
         this.recording = false;
-        this.showToast(data.message || 'Stream error', 'error');
-        const msg = data.message || 'Stream error';
+        const msg = data.retry_after
+          ? `${data.message || 'Server busy'} — retry in ${Math.ceil(data.retry_after)}s`
+          : (data.message || 'Stream error');
+        this.showToast(msg, 'error');
         this.responses.push({ type: 'error', data: { message: msg }, timestamp: new Date().toLocaleTimeString(), preview: msg, open: true });
         this.rightTab = 'responses';
         this.$nextTick(() => { const el = this.$refs.responsesList; if (el) el.scrollTop = el.scrollHeight; });
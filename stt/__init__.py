@@ -2,6 +2,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from .async_client import AsyncSTTClient
     from .client import STTClient
+    from .multiplexer import StreamMultiplexer
 
-__all__ = ["STTClient"]
+__all__ = ["STTClient", "AsyncSTTClient", "StreamMultiplexer"]
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import mimetypes
+import os
+from contextlib import asynccontextmanager
+
+import httpx
+from websockets.asyncio.client import connect as ws_connect
+from websockets.exceptions import ConnectionClosed
+
+from .options import Mode, listen_url
+
+logger = logging.getLogger(__name__)
+
+_READ_CHUNK = 1024 * 1024
+
+
+async def _aiter_file(path, chunk_size: int = _READ_CHUNK):
+    """Read a file in chunks off the event loop (request body streaming)."""
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
+class AsyncStream:
+    """One live Deepgram stream. Iterate it for (results_message, is_final) pairs,
+    the same arguments STTClient.open_stream passes to on_transcript.
+    """
+
+    def __init__(self, ws):
+        self._ws = ws
+        self._closing = False
+        self.request_id = None  # from the Metadata message, once received
+
+    async def send_media(self, data: bytes):
+        """Send a binary audio chunk."""
+        if not self._closing:
+            await self._ws.send(data)
+
+    async def send_keep_alive(self):
+        """Keep an idle stream open (Deepgram closes after ~10s without audio)."""
+        if not self._closing:
+            await self._ws.send(json.dumps({"type": "KeepAlive"}))
+
+    async def send_close_stream(self):
+        """Send the Deepgram CloseStream control message; final results still arrive."""
+        if not self._closing:
+            self._closing = True
+            await self._ws.send(json.dumps({"type": "CloseStream"}))
+
+    async def __aiter__(self):
+        try:
+            async for msg in self._ws:
+                if isinstance(msg, bytes):
+                    continue
+                try:
+                    data = json.loads(msg)
+                except ValueError:
+                    continue
+                msg_type = data.get("type")
+                if msg_type == "Results":
+                    try:
+                        transcript = data["channel"]["alternatives"][0].get("transcript", "")
+                    except (KeyError, IndexError) as e:
+                        logger.warning("Error parsing transcript: %s", e)
+                        continue
+                    yield data, bool(transcript) and bool(data.get("is_final", False))
+                elif msg_type == "Metadata":
+                    self.request_id = data.get("request_id")
+                    logger.debug("Deepgram metadata: %s", data)
+                else:
+                    logger.debug("Deepgram message type=%s", msg_type)
+        except ConnectionClosed as e:
+            logger.debug("Deepgram WebSocket closed: %s", e)
+
+
+class AsyncSTTClient:
+    """asyncio counterpart to STTClient: no threads, no blocking I/O.
+    Batch requests share one pooled httpx.AsyncClient; each stream is its own WebSocket.
+
+        async with AsyncSTTClient(api_key) as client:
+            async with client.open_stream(params) as stream:
+                await stream.send_media(chunk)
+                await stream.send_close_stream()
+                async for data, is_final in stream:
+                    ...
+    """
+
+    def __init__(self, api_key: str, base_url: str = "api.deepgram.com", max_connections: int = 100):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self._http: httpx.AsyncClient | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared keep-alive HTTP client (created on first use)."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={"Authorization": f"Token {self.api_key}"},
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def build_url(self, params: dict, mode: Mode) -> str:
+        """Return the full Deepgram URL that would be used for these params."""
+        return listen_url(params, mode, params.get("base_url", self.base_url))
+
+    @asynccontextmanager
+    async def open_stream(self, params: dict):
+        """Open a streaming WebSocket; yields an AsyncStream. On exit, CloseStream is
+        sent (if it was not already) and the socket is closed.
+        """
+        url = self.build_url(params, Mode.STREAMING)
+        logger.info("Opening Deepgram stream: %s", url)
+        try:
+            ws = await ws_connect(url, additional_headers={"Authorization": f"Token {self.api_key}"})
+        except Exception as e:
+            raise RuntimeError(f"Deepgram connection failed: {e}")
+
+        stream = AsyncStream(ws)
+        try:
+            yield stream
+        finally:
+            try:
+                await stream.send_close_stream()
+            except ConnectionClosed:
+                pass
+            await ws.close()
+            logger.info("Deepgram WebSocket closed")
+
+    async def transcribe_batch(self, audio_source, params: dict, timeout: float = 600) -> dict:
+        """
+        Transcribe audio using the pre-recorded (batch) API.
+        audio_source: file path (str / PathLike), URL (str starting with http), or bytes
+        Returns full Deepgram response dict. Files are streamed, not read into memory.
+        """
+        url = self.build_url(params, Mode.BATCH)
+        headers = {"Accept": "application/json"}
+
+        if isinstance(audio_source, str) and audio_source.startswith("http"):
+            response = await self.http.post(url, headers=headers, json={"url": audio_source}, timeout=timeout)
+        elif isinstance(audio_source, bytes):
+            headers["Content-Type"] = "audio/wav"
+            response = await self.http.post(url, headers=headers, content=audio_source, timeout=timeout)
+        else:
+            content_type, _ = mimetypes.guess_type(str(audio_source))
+            headers["Content-Type"] = content_type or "audio/wav"
+            headers["Content-Length"] = str(os.path.getsize(audio_source))  # avoid chunked encoding
+            response = await self.http.post(url, headers=headers, content=_aiter_file(audio_source), timeout=timeout)
+
+        response.raise_for_status()
+        return response.json()
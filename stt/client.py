@@ -2,41 +2,46 @@ import json
 import logging
 import mimetypes
 import threading
-import urllib.parse
 
 import requests
+from requests.adapters import HTTPAdapter
 import websocket  # websocket-client (NOT the websockets package)
 
-from .options import Mode, clean_params
+from .options import Mode, listen_url
 
 logger = logging.getLogger(__name__)
 
 
 class STTClient:
-    def __init__(self, api_key: str, base_url: str = "api.deepgram.com"):
+    def __init__(self, api_key: str, base_url: str = "api.deepgram.com", pool_size: int = 10):
         self.api_key = api_key
         self.base_url = base_url
+        self.pool_size = pool_size  # keep-alive connections per host for batch requests
         self._ws = None       # active WebSocket (from create_connection)
         self._stream_thread = None
+        self._session = None  # pooled requests.Session, created on first batch call
+
+    @property
+    def session(self) -> requests.Session:
+        """Shared keep-alive session, so repeated/concurrent batch calls reuse connections."""
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def close(self):
+        """Close the pooled HTTP session and any active stream."""
+        self.close_stream()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
     def build_url(self, params: dict, mode: Mode) -> str:
         """Return the full Deepgram URL that would be used for these params."""
-        clean = clean_params(params, mode)
-        protocol = "wss" if mode == Mode.STREAMING else "https"
-        base = params.get("base_url", self.base_url)
-
-        parts = []
-        for k, v in clean.items():
-            if isinstance(v, list):
-                for item in v:
-                    val = str(item).lower() if isinstance(item, bool) else str(item)
-                    parts.append(f"{k}={urllib.parse.quote(val)}")
-            else:
-                val = str(v).lower() if isinstance(v, bool) else str(v)
-                parts.append(f"{k}={urllib.parse.quote(val)}")
-
-        qs = "&".join(parts)
-        return f"{protocol}://{base}/v1/listen?{qs}" if qs else f"{protocol}://{base}/v1/listen"
+        return listen_url(params, mode, params.get("base_url", self.base_url))
 
     def open_stream(self, params: dict, on_transcript, on_error=None, on_close=None):
         """
@@ -127,15 +132,13 @@ class STTClient:
             except Exception:
                 pass
 
-    def transcribe_batch(self, audio_source, params: dict) -> dict:
+    def transcribe_batch(self, audio_source, params: dict, timeout: float = 600) -> dict:
         """
         Transcribe audio using the pre-recorded (batch) API.
         audio_source: file path (str), URL (str starting with http), or bytes
-        Returns full Deepgram response dict.
+        Returns full Deepgram response dict. Safe to call from several threads.
         """
-        clean = clean_params(params, Mode.BATCH)
-        base = params.get("base_url", self.base_url)
-        url = f"https://{base}/v1/listen"
+        url = self.build_url(params, Mode.BATCH)  # http:// bases (e.g. the mock server) stay plain
 
         headers = {
             "Authorization": f"Token {self.api_key}",
@@ -144,15 +147,15 @@ class STTClient:
 
         if isinstance(audio_source, str) and audio_source.startswith("http"):
             headers["Content-Type"] = "application/json"
-            response = requests.post(url, headers=headers, json={"url": audio_source}, params=clean, timeout=600)
+            response = self.session.post(url, headers=headers, json={"url": audio_source}, timeout=timeout)
         elif isinstance(audio_source, bytes):
             headers["Content-Type"] = "audio/wav"
-            response = requests.post(url, headers=headers, data=audio_source, params=clean, timeout=600)
+            response = self.session.post(url, headers=headers, data=audio_source, timeout=timeout)
         else:
             content_type, _ = mimetypes.guess_type(str(audio_source))
             headers["Content-Type"] = content_type or "audio/wav"
             with open(audio_source, "rb") as f:
-                response = requests.post(url, headers=headers, data=f, params=clean, timeout=600)
+                response = self.session.post(url, headers=headers, data=f, timeout=timeout)
 
         response.raise_for_status()
         return response.json()
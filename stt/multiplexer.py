@@ -0,0 +1,422 @@
+"""Many Deepgram streams, one I/O thread.
+
+STTClient runs one recv thread per stream. StreamMultiplexer instead connects
+each stream with the same blocking websocket-client handshake, then hands the
+socket to a single selector-driven I/O thread that reads and decodes frames for
+all streams. Callbacks run on a small worker pool, serialized per stream so a
+stream's transcripts arrive in order (and never concurrently with each other).
+The I/O thread only reads: KeepAlives, pongs and close replies are written from
+the pool, and every socket has an `io_timeout`, so a peer that stops reading or
+sends half a TLS record stalls (and then fails) its own stream, not all of them.
+
+    mux = StreamMultiplexer(api_key)
+    handle = mux.open_stream(params, on_transcript=lambda data, is_final: ...)
+    handle.send_media(chunk)          # from any thread
+    handle.send_close_stream()        # graceful: final results still arrive
+    handle.wait(timeout=10)           # until Deepgram closes the socket
+    mux.close()
+"""
+import itertools
+import json
+import logging
+import queue
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import websocket  # websocket-client (NOT the websockets package)
+
+from .options import Mode, listen_url
+
+logger = logging.getLogger(__name__)
+
+_OP_CONT, _OP_TEXT, _OP_BINARY, _OP_CLOSE, _OP_PING, _OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+_READ_SIZE = 65536
+
+
+class _FrameReader:
+    """Incremental decoder for server-to-client WebSocket frames (RFC 6455)."""
+
+    __slots__ = ("_buf", "_fragments", "_fragment_op")
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._fragments: list[bytes] = []
+        self._fragment_op = None
+
+    def feed(self, data: bytes):
+        """Append received bytes; returns complete (opcode, payload) messages."""
+        self._buf += data
+        messages = []
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return messages
+            fin, opcode, payload = frame
+            if opcode >= _OP_CLOSE:  # control frames are never fragmented
+                messages.append((opcode, payload))
+            elif opcode == _OP_CONT:
+                self._fragments.append(payload)
+                if fin:
+                    messages.append((self._fragment_op, b"".join(self._fragments)))
+                    self._fragments, self._fragment_op = [], None
+            elif fin:
+                messages.append((opcode, payload))
+            else:
+                self._fragments, self._fragment_op = [payload], opcode
+
+    def _next_frame(self):
+        buf = self._buf
+        if len(buf) < 2:
+            return None
+        fin, opcode = buf[0] & 0x80, buf[0] & 0x0F
+        masked, length = buf[1] & 0x80, buf[1] & 0x7F
+        offset = 2
+        if length == 126:
+            if len(buf) < 4:
+                return None
+            length = struct.unpack_from("!H", buf, 2)[0]
+            offset = 4
+        elif length == 127:
+            if len(buf) < 10:
+                return None
+            length = struct.unpack_from("!Q", buf, 2)[0]
+            offset = 10
+        mask = None
+        if masked:
+            if len(buf) < offset + 4:
+                return None
+            mask = buf[offset:offset + 4]
+            offset += 4
+        if len(buf) < offset + length:
+            return None
+        payload = bytes(buf[offset:offset + length])
+        del buf[:offset + length]
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return bool(fin), opcode, payload
+
+
+def _quietly(fn, *args) -> None:
+    """Best-effort socket call from the pool (pong, close reply, shutdown)."""
+    try:
+        fn(*args)
+    except Exception:
+        pass
+
+
+class StreamHandle:
+    """One multiplexed stream. send_* methods are safe to call from any thread."""
+
+    def __init__(self, mux: "StreamMultiplexer", stream_id: int, ws, on_transcript, on_error, on_close):
+        self.id = stream_id
+        self.request_id = None  # from the Metadata message, once received
+        self._mux = mux
+        self._ws = ws
+        self._reader = _FrameReader()
+        self._on_transcript = on_transcript
+        self._on_error = on_error
+        self._on_close = on_close
+        self._callbacks: deque = deque()
+        self._callbacks_lock = threading.Lock()
+        self._callbacks_scheduled = False
+        self._close_sent = False
+        self.last_send = time.monotonic()
+        self.closed = threading.Event()
+
+    def _send(self, payload, opcode) -> bool:
+        if self.closed.is_set():
+            return False
+        try:
+            self._ws.send(payload, opcode)  # websocket-client serializes senders (enable_multithread)
+            self.last_send = time.monotonic()
+            return True
+        except Exception as e:
+            logger.error("[stream %s] send failed: %s", self.id, e)
+            return False
+
+    def send_media(self, data: bytes) -> bool:
+        """Send a binary audio chunk."""
+        if self._close_sent:
+            return False
+        return self._send(data, websocket.ABNF.OPCODE_BINARY)
+
+    def send_keep_alive(self) -> bool:
+        return self._send(json.dumps({"type": "KeepAlive"}), websocket.ABNF.OPCODE_TEXT)
+
+    def send_close_stream(self) -> bool:
+        """Ask Deepgram to flush final results and close; wait() for the socket to close."""
+        if self._close_sent:
+            return False
+        self._close_sent = True
+        return self._send(json.dumps({"type": "CloseStream"}), websocket.ABNF.OPCODE_TEXT)
+
+    def close(self) -> None:
+        """Close now (sends CloseStream first, but does not wait for final results)."""
+        self.send_close_stream()
+        self._mux._request_close(self)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the stream has closed and its on_close callback has run."""
+        return self.closed.wait(timeout)
+
+    # --- called by the multiplexer ---
+
+    def _dispatch(self, fn, *args) -> None:
+        """Queue a callback; the worker pool runs a stream's callbacks one at a time, in order."""
+        with self._callbacks_lock:
+            self._callbacks.append((fn, args))
+            if self._callbacks_scheduled:
+                return
+            self._callbacks_scheduled = True
+        if not self._mux._submit(self._run_callbacks):
+            self._run_callbacks()  # pool already shut down (close() timed out): run inline
+
+    def _run_callbacks(self) -> None:
+        while True:
+            with self._callbacks_lock:
+                if not self._callbacks:
+                    self._callbacks_scheduled = False
+                    return
+                fn, args = self._callbacks.popleft()
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("[stream %s] callback failed", self.id)
+
+    def _handle_text(self, text: bytes) -> None:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        msg_type = data.get("type")
+        if msg_type == "Results":
+            try:
+                transcript = data["channel"]["alternatives"][0].get("transcript", "")
+            except (KeyError, IndexError) as e:
+                logger.warning("Error parsing transcript: %s", e)
+                return
+            is_final = bool(transcript) and bool(data.get("is_final", False))
+            self._dispatch(self._on_transcript, data, is_final)
+        elif msg_type == "Metadata":
+            self.request_id = data.get("request_id")
+        else:
+            logger.debug("[stream %s] Deepgram message type=%s", self.id, msg_type)
+
+    def _finish(self, error: str | None = None) -> None:
+        self._dispatch(_quietly, self._ws.shutdown)  # off the I/O thread, after queued writes
+        if error and self._on_error:
+            self._dispatch(self._on_error, error)
+        self._dispatch(self._mark_closed)
+
+    def _mark_closed(self) -> None:
+        # Runs after every queued transcript callback for this stream
+        try:
+            if self._on_close:
+                self._on_close()
+        finally:
+            self.closed.set()
+
+
+class StreamMultiplexer:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "api.deepgram.com",
+        callback_workers: int = 4,
+        keepalive_interval: float | None = 8.0,
+        io_timeout: float | None = 10.0,
+    ):
+        """keepalive_interval: send KeepAlive on streams that have sent nothing for this
+        many seconds (Deepgram closes idle streams after ~10s); None disables it.
+        io_timeout: seconds any one socket operation (handshake, send, read) may block
+        before its stream fails; None waits forever.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.keepalive_interval = keepalive_interval
+        self.io_timeout = io_timeout
+        self.callback_workers = callback_workers
+        self._pool = ThreadPoolExecutor(max_workers=callback_workers, thread_name_prefix="stt-mux-cb")
+        self._pool_lock = threading.Lock()
+        self._pool_closed = False
+        self._selector = selectors.DefaultSelector()
+        self._handles: dict[int, StreamHandle] = {}
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()  # ("add" | "close", handle)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._ids = itertools.count(1)
+        self._running = True
+        self.bytes_received = 0
+        self.messages_received = 0
+        self._thread = threading.Thread(target=self._io_loop, name="stt-mux-io", daemon=True)
+        self._thread.start()
+
+    def build_url(self, params: dict, mode: Mode = Mode.STREAMING) -> str:
+        return listen_url(params, mode, params.get("base_url", self.base_url))
+
+    def open_stream(self, params: dict, on_transcript, on_error=None, on_close=None) -> StreamHandle:
+        """Connect a stream (blocking handshake in the calling thread) and start
+        servicing it from the shared I/O thread.
+        """
+        if not self._running:
+            raise RuntimeError("multiplexer is closed")
+        url = self.build_url(params, Mode.STREAMING)
+        logger.info("Opening Deepgram stream: %s", url)
+        try:
+            ws = websocket.create_connection(
+                url, header={"Authorization": f"Token {self.api_key}"}, enable_multithread=True,
+                timeout=self.io_timeout,
+            )
+        except Exception as e:
+            raise RuntimeError(f"Deepgram connection failed: {e}")
+        handle = StreamHandle(self, next(self._ids), ws, on_transcript, on_error, on_close)
+        self._pending.put(("add", handle))
+        self._wake()
+        return handle
+
+    @property
+    def streams(self) -> int:
+        return len(self._handles)
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def _submit(self, fn, *args) -> bool:
+        """Run `fn` on the callback pool. False (and not run) once the pool has shut down."""
+        with self._pool_lock:
+            if self._pool_closed:
+                return False
+            self._pool.submit(fn, *args)
+            return True
+
+    def _request_close(self, handle: StreamHandle) -> None:
+        self._pending.put(("close", handle))
+        self._wake()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Close every stream, stop the I/O thread and the callback pool. Streams are
+        closed without waiting for final results — wait() on handles first for that.
+        """
+        if not self._running:
+            return
+        for handle in list(self._handles.values()):
+            handle.send_close_stream()
+        self._running = False
+        self._wake()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Still inside a socket call (bounded by io_timeout); it exits on its own and
+            # runs any last callbacks inline, since the pool no longer takes work
+            logger.warning("multiplexer I/O thread did not stop within %ss", timeout)
+        with self._pool_lock:
+            self._pool_closed = True
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- I/O thread ---
+
+    def _io_loop(self) -> None:
+        while self._running:
+            timeout = 1.0 if self.keepalive_interval else None
+            for key, _ in self._selector.select(timeout):
+                handle = key.data
+                if handle is None:
+                    self._drain_wakeups()
+                else:
+                    self._read(handle)
+            self._apply_pending()
+            if self.keepalive_interval:
+                self._send_keepalives()
+        for handle in list(self._handles.values()):
+            self._remove(handle, None)
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _drain_wakeups(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def _apply_pending(self) -> None:
+        while True:
+            try:
+                op, handle = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            if op == "add":
+                self._handles[handle.id] = handle
+                self._selector.register(handle._ws.sock, selectors.EVENT_READ, handle)
+            elif handle.id in self._handles:
+                self._remove(handle, None)
+
+    def _send_keepalives(self) -> None:
+        now = time.monotonic()
+        for handle in list(self._handles.values()):
+            if not handle._close_sent and now - handle.last_send >= self.keepalive_interval:
+                handle.last_send = now  # one KeepAlive in flight per interval
+                self._submit(handle.send_keep_alive)
+
+    def _read(self, handle: StreamHandle) -> None:
+        sock = handle._ws.sock
+        try:
+            # The socket stays blocking (for senders), but a readable socket returns
+            # what is available; TLS may hold decrypted bytes select() cannot see.
+            # A partial TLS record can still block: io_timeout bounds that.
+            data = sock.recv(_READ_SIZE)
+            while data and hasattr(sock, "pending") and sock.pending():
+                data += sock.recv(sock.pending())
+        except Exception as e:
+            self._remove(handle, str(e))
+            return
+        if not data:
+            self._remove(handle, None)
+            return
+        self.bytes_received += len(data)
+        for opcode, payload in handle._reader.feed(data):
+            self.messages_received += 1
+            if opcode == _OP_TEXT:
+                handle._handle_text(payload)
+            elif opcode == _OP_PING:
+                self._submit(_quietly, handle._ws.pong, payload)
+            elif opcode == _OP_CLOSE:
+                # Queued ahead of the shutdown _remove queues for this stream
+                handle._dispatch(_quietly, handle._ws.send_close)
+                self._remove(handle, None)
+                return
+
+    def _remove(self, handle: StreamHandle, error: str | None) -> None:
+        if self._handles.pop(handle.id, None) is None:
+            return
+        try:
+            self._selector.unregister(handle._ws.sock)
+        except (KeyError, ValueError, AttributeError):
+            pass
+        if error:
+            logger.error("[stream %s] recv error: %s", handle.id, error)
+        handle._finish(error)
+
+    def stats(self) -> dict:
+        return {
+            "streams": len(self._handles),
+            "bytes_received": self.bytes_received,
+            "messages_received": self.messages_received,
+            "io_threads": 1,
+            "callback_workers": self.callback_workers,
+        }
@@ -1,3 +1,4 @@
+import urllib.parse
 from enum import Enum
 
 
@@ -14,7 +15,11 @@ STREAMING_ONLY = {"interim_results", "vad_events", "endpointing", "utterance_end
 BATCH_ONLY = {"paragraphs", "topics", "intents", "sentiment", "utterances"}
 
 # Params that should never be sent to Deepgram (handled by client)
-INTERNAL_PARAMS = {"base_url"}
+# interim_max_rate / interim_delta: per-session transcription_update emission policy (server-side)
+# latency_stats: emit a latency_stats event at stream end (server-side)
+# silence_gate / silence_threshold_db / silence_min_ms: skip long silences in PCM streams (server-side)
+INTERNAL_PARAMS = {"base_url", "interim_max_rate", "interim_delta", "latency_stats",
+                   "silence_gate", "silence_threshold_db", "silence_min_ms"}
 
 
 def clean_params(params: dict, mode: Mode) -> dict:
@@ -47,3 +52,30 @@ def clean_params(params: dict, mode: Mode) -> dict:
         result.update(extra)
 
     return result
+
+
+def listen_url(params: dict, mode: Mode, base: str = "api.deepgram.com") -> str:
+    """Full /v1/listen URL for these params. `base` is a host ("api.deepgram.com") or a
+    URL whose http/https scheme selects plain or TLS transport ("http://localhost:8080").
+    Booleans are lowercased and list values become repeated keys. Params are not
+    validated (unlike stt.profiles.compile_profile), so any value a caller passes is
+    encoded as-is.
+    """
+    secure = True
+    if "://" in base:
+        scheme, base = base.split("://", 1)
+        secure = scheme in ("https", "wss")
+        base = base.rstrip("/")
+    if mode == Mode.STREAMING:
+        protocol = "wss" if secure else "ws"
+    else:
+        protocol = "https" if secure else "http"
+
+    parts = []
+    for k, v in clean_params(params, mode).items():
+        for item in (v if isinstance(v, (list, tuple)) else [v]):
+            val = str(item).lower() if isinstance(item, bool) else str(item)
+            parts.append(f"{k}={urllib.parse.quote(val)}")
+
+    qs = "&".join(parts)
+    return f"{protocol}://{base}/v1/listen?{qs}" if qs else f"{protocol}://{base}/v1/listen"
@@ -0,0 +1,211 @@
+"""Compiled parameter profiles.
+
+A profile is a param set (the shape of config/defaults.json) validated and split by
+mode once, then cached: the cleaned batch query params, the streaming SDK kwargs and
+the ready /v1/listen query strings are computed on first use of that param set and
+shared by every later request or stream that uses it.
+
+    profile = compile_profile({"model": "nova-3", "smart_format": True})
+    profile.id                      # stable content hash — the same params give the same id
+    profile.streaming               # read-only SDK kwargs for listen.v1.connect(**...)
+    profile.batch                   # read-only query params for POST /v1/listen
+    profile.query(Mode.STREAMING)   # "model=nova-3&smart_format=true"
+    get_profile(profile.id)         # look a compiled profile up again by id
+
+Compiled profiles live in a bounded LRU cache, so an id seen only through inline
+params may be dropped. register_profile() pins a profile in a separate store the
+cache never evicts; ids handed out to clients should come from there. Both are
+per process: app.py shares registrations between workers over the cluster channel.
+"""
+import hashlib
+import json
+import threading
+import urllib.parse
+from collections import OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+
+from .options import Mode, clean_params
+
+DEFAULTS_PATH = Path(__file__).resolve().parent.parent / "config" / "defaults.json"
+MAX_PROFILES = 1024  # compiled profiles kept (least recently used are dropped)
+MAX_REGISTERED = 4096  # registered profiles kept; further registrations are refused
+
+# Server-side params (options.INTERNAL_PARAMS) are not in defaults.json
+_INTERNAL_TYPES = {"base_url": str, "interim_max_rate": (int, float, str), "interim_delta": bool,
+                   "latency_stats": bool, "silence_gate": bool, "silence_threshold_db": (int, float, str),
+                   "silence_min_ms": (int, float, str)}
+_SCALARS = (str, int, float, bool)
+
+
+class ProfileError(ValueError):
+    """A param set that does not fit the schema, or an unknown profile id."""
+
+
+def _load_schema(path: Path = DEFAULTS_PATH) -> dict:
+    """Expected value type per known param, taken from the types of the shipped defaults."""
+    try:
+        defaults = json.loads(path.read_text())
+    except (OSError, ValueError):
+        defaults = {}  # used as a library without the app's config/
+    schema = {}
+    for key, value in defaults.items():
+        if isinstance(value, bool):
+            schema[key] = bool
+        elif isinstance(value, (int, float)):
+            schema[key] = (int, float, str)  # numeric strings are passed through as-is
+        else:
+            schema[key] = type(value)
+    schema.update(_INTERNAL_TYPES)
+    return schema
+
+
+SCHEMA = _load_schema()
+
+
+def validate(params: dict) -> None:
+    """Raise ProfileError for values of the wrong type. Unknown keys are allowed (newer
+    Deepgram params) as long as they are scalars or lists of scalars.
+    """
+    if not isinstance(params, dict):
+        raise ProfileError("params must be an object")
+    for key, value in params.items():
+        if value is None:
+            continue
+        expected = SCHEMA.get(key)
+        if expected is list or (expected is None and isinstance(value, (list, tuple))):
+            if not isinstance(value, (list, tuple)) or not all(isinstance(v, _SCALARS) for v in value):
+                raise ProfileError(f"{key} must be a list of strings")
+        elif expected is dict:
+            if not isinstance(value, dict) or not all(isinstance(v, _SCALARS) for v in value.values()):
+                raise ProfileError(f"{key} must be an object of scalar values")
+        elif expected is None:
+            if not isinstance(value, _SCALARS):
+                raise ProfileError(f"{key} must be a scalar")
+        elif expected is bool:
+            if not isinstance(value, bool):
+                raise ProfileError(f"{key} must be true or false")
+        elif not isinstance(value, expected):  # numbers also take bools (endpointing=false)
+            raise ProfileError(f"{key} has the wrong type ({type(value).__name__})")
+
+
+def _wire_params(params: dict, mode: Mode, default_model: str | None) -> dict:
+    """clean_params for `mode`, with bools as "true"/"false", numbers as strings and
+    lists frozen to tuples — the form both httpx and the SDK query encoder accept.
+    """
+    wire = {}
+    for k, v in clean_params(params, mode).items():
+        if isinstance(v, bool):
+            wire[k] = "true" if v else "false"
+        elif isinstance(v, (list, tuple)):
+            wire[k] = tuple(v)
+        elif isinstance(v, str):
+            wire[k] = v
+        else:
+            wire[k] = str(v)
+    if default_model:
+        wire.setdefault("model", default_model)
+    return wire
+
+
+def _query_string(wire: dict) -> str:
+    parts = []
+    for k, v in wire.items():
+        for item in (v if isinstance(v, tuple) else (v,)):
+            parts.append(f"{k}={urllib.parse.quote(item)}")
+    return "&".join(parts)
+
+
+class Profile:
+    """An immutable, validated param set with its per-mode wire forms precomputed."""
+
+    __slots__ = ("id", "params", "streaming", "batch", "_queries")
+
+    def __init__(self, profile_id: str, params: dict, default_model: str | None = None):
+        validate(params)
+        streaming = _wire_params(params, Mode.STREAMING, default_model)
+        batch = _wire_params(params, Mode.BATCH, default_model)
+        set_ = object.__setattr__
+        set_(self, "id", profile_id)
+        # Internal (server-side) options stay readable, e.g. params.get("interim_max_rate")
+        set_(self, "params", MappingProxyType(json.loads(json.dumps(params))))
+        set_(self, "streaming", MappingProxyType(streaming))
+        set_(self, "batch", MappingProxyType(batch))
+        set_(self, "_queries", {Mode.STREAMING: _query_string(streaming), Mode.BATCH: _query_string(batch)})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Profile is immutable")
+
+    def query(self, mode: Mode) -> str:
+        """The urlencoded /v1/listen query string for `mode` (lists as repeated keys)."""
+        return self._queries[Mode(mode)]
+
+    def __repr__(self):
+        return f"Profile({self.id!r}, {dict(self.params)!r})"
+
+
+def profile_id(params: dict, default_model: str | None = None) -> str:
+    """Content hash of a param set: the same params give the same id in every process
+    (with the same default_model), so a registration replayed on another worker keeps its id.
+    """
+    canonical = json.dumps([params, default_model], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+_profiles: "OrderedDict[str, Profile]" = OrderedDict()
+_registered: dict[str, Profile] = {}
+_lock = threading.Lock()
+
+
+def compile_profile(params, default_model: str | None = None) -> Profile:
+    """Validate and compile `params` (or return the cached profile for an identical set).
+    A Profile passed in is returned unchanged. Raises ProfileError on invalid params.
+    """
+    if isinstance(params, Profile):
+        return params
+    pid = profile_id(params, default_model)
+    with _lock:
+        profile = _profiles.get(pid)
+        if profile is not None:
+            _profiles.move_to_end(pid)
+            return profile
+    profile = Profile(pid, params, default_model)
+    with _lock:
+        _profiles[pid] = profile
+        while len(_profiles) > MAX_PROFILES:
+            _profiles.popitem(last=False)
+    return profile
+
+
+def register_profile(params, default_model: str | None = None) -> Profile:
+    """Compile `params` and pin the profile so get_profile() finds it for the life of the
+    process. Raises ProfileError on invalid params or once MAX_REGISTERED ids are pinned.
+    """
+    profile = compile_profile(params, default_model)
+    with _lock:
+        if profile.id not in _registered:
+            if len(_registered) >= MAX_REGISTERED:
+                raise ProfileError(f"too many registered profiles (max {MAX_REGISTERED})")
+            _registered[profile.id] = profile
+    return profile
+
+
+def registered_profiles() -> list[Profile]:
+    """Every pinned profile, oldest first (e.g. to replay them to a new worker)."""
+    with _lock:
+        return list(_registered.values())
+
+
+def get_profile(pid: str) -> Profile:
+    """The registered or compiled profile with this id. Raises ProfileError if it was never
+    registered here and is not (or no longer) in the compile cache.
+    """
+    with _lock:
+        profile = _registered.get(pid)
+        if profile is not None:
+            return profile
+        profile = _profiles.get(pid)
+        if profile is None:
+            raise ProfileError(f"unknown profile: {pid}")
+        _profiles.move_to_end(pid)
+        return profile
@@ -11,6 +11,7 @@ from app import app  # socketio.ASGIApp instance — NOT fastapi_app
 HOST = "127.0.0.1"
 PORT = 9765  # distinct from dev server port (8001) and environment port 8765
 BASE_URL = f"http://{HOST}:{PORT}"
+MOCK_PORT = 9766  # scripts/mock_deepgram.py stand-in for the Deepgram API
 
 
 class UvicornTestServer(uvicorn.Server):
@@ -51,3 +52,14 @@ async def sio_client(server):
     yield client
     await client.disconnect()
     await client.wait()  # CRITICAL: prevents hang (python-socketio issue #263)
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def mock_deepgram():
+    """scripts/mock_deepgram.py served on MOCK_PORT, with fast result cadence."""
+    from scripts.mock_deepgram import MockConfig, create_app
+    mock_app = create_app(MockConfig(interim_interval=0.5, final_interval=1.0))
+    srv = UvicornTestServer(mock_app, port=MOCK_PORT)
+    await srv.start_up()
+    yield mock_app
+    await srv.tear_down()
@@ -3,6 +3,8 @@ import asyncio
 import os
 from io import BytesIO
 
+import pytest
+
 os.environ.setdefault("DEEPGRAM_API_KEY", "test-key")
 
 from httpx import AsyncClient, ASGITransport
@@ -196,3 +198,246 @@ async def test_audio_stream_when_not_streaming_does_not_crash(sio_client):
     await sio_client.emit("audio_stream", b"\x00\x01\x02\x03\xff\xfe")
     await asyncio.sleep(0.1)
     assert sio_client.connected
+
+
+async def test_upload_returns_hash_and_strips_directories():
+    import hashlib
+    payload = b"fake audio " * 1000
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        resp = await client.post(
+            "/upload",
+            files={"file": ("../../escape.wav", BytesIO(payload), "audio/wav")},
+        )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["filename"] == "escape.wav"
+    assert body["size"] == len(payload)
+    assert body["sha256"] == hashlib.sha256(payload).hexdigest()
+    assert "duration" in body
+
+
+async def test_upload_raw_body_streams_to_disk():
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        resp = await client.post("/upload?filename=raw.wav", content=b"raw audio bytes")
+    assert resp.status_code == 200
+    assert resp.json()["size"] == len(b"raw audio bytes")
+
+
+async def test_upload_over_limit_returns_413(monkeypatch):
+    """Body without Content-Length precheck headroom is rejected mid-stream."""
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "UPLOAD_MAX_BYTES", 8)
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        resp = await client.post("/upload?filename=big.wav", content=b"x" * 64)
+    assert resp.status_code == 413
+    assert not (app_module.TEMP_DIR / "big.wav.part").exists()
+
+
+async def test_chunked_multipart_over_limit_is_cut_off_mid_stream(monkeypatch):
+    """Multipart without Content-Length skips the precheck; the cap must hold while parsing."""
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "UPLOAD_MAX_BYTES", 1024)
+    monkeypatch.setattr(app_module, "_MULTIPART_OVERHEAD", 1024)
+    sent = []
+
+    async def body():
+        yield (b'--b\r\nContent-Disposition: form-data; name="file"; filename="huge.wav"\r\n'
+               b"Content-Type: audio/wav\r\n\r\n")
+        for _ in range(100):
+            sent.append(1)
+            yield b"x" * 1024
+
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        resp = await client.post(
+            "/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"},
+        )
+    assert resp.status_code == 413
+    assert len(sent) < 100 and not (app_module.TEMP_DIR / "huge.wav").exists()
+
+
+async def test_transcribe_filename_streams_body_from_disk(monkeypatch):
+    """/transcribe with a local filename sends the file from disk with an explicit
+    Content-Length (not chunked), without reading it into memory first."""
+    import httpx
+    import app as app_module
+    from common.uploads import aiter_path
+
+    payload = b"\x01\x02" * 50_000
+    (app_module.TEMP_DIR / "stream_body.wav").write_bytes(payload)
+    seen = {}
+    reads = []
+
+    async def recording_aiter_path(path, chunk_size=64 * 1024):
+        async for chunk in aiter_path(path, chunk_size):
+            reads.append(len(chunk))
+            yield chunk
+
+    async def handler(request: httpx.Request):
+        seen["headers"] = request.headers
+        seen["body"] = await request.aread()
+        return httpx.Response(200, json={"results": {}})
+
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    monkeypatch.setattr(app_module, "aiter_path", recording_aiter_path)
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        resp = await client.post("/transcribe", json={"filename": "stream_body.wav"})
+    await mock.aclose()
+
+    assert resp.status_code == 200
+    assert seen["body"] == payload
+    assert seen["headers"]["content-length"] == str(len(payload))
+    assert "transfer-encoding" not in seen["headers"]
+    assert len(reads) > 1 and max(reads) <= 64 * 1024
+
+
+async def test_transcribe_repeat_is_served_from_cache(monkeypatch):
+    """Identical /transcribe requests hit upstream once; no_cache forces a refresh."""
+    import httpx
+    import app as app_module
+
+    (app_module.TEMP_DIR / "cached.wav").write_bytes(b"cache me")
+    upstream_calls = []
+
+    async def handler(request: httpx.Request):
+        upstream_calls.append(request)
+        return httpx.Response(200, json={"results": {"n": len(upstream_calls)}})
+
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    payload = {"filename": "cached.wav", "params": {"model": "nova-3", "smart_format": True}}
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        first = await client.post("/transcribe", json=payload)
+        second = await client.post("/transcribe", json=payload)
+        third = await client.post("/transcribe", json={**payload, "no_cache": True})
+        stats = (await client.get("/api/cache-stats")).json()
+    await mock.aclose()
+
+    assert first.headers["x-cache"] == "miss"
+    assert second.headers["x-cache"] == "hit"
+    assert second.json() == first.json()
+    assert third.headers["x-cache"] == "bypass"
+    assert len(upstream_calls) == 2
+    assert "hits" in stats and "misses" in stats
+
+
+@pytest.mark.parametrize("path", ["/transcribe", "/api/tts-transcribe", "/api/fanout", "/jobs", "/api/profiles"])
+async def test_malformed_json_is_a_bad_request(path):
+    async with AsyncClient(transport=ASGITransport(app=fastapi_app), base_url="http://test") as client:
+        broken = await client.post(path, content=b"{not json", headers={"Content-Type": "application/json"})
+        array = await client.post(path, json=["not", "an", "object"])
+    assert broken.status_code == array.status_code == 400 and "error" in broken.json()
+
+
+async def test_stop_session_over_http(monkeypatch):
+    """POST /api/sessions/{sid}/stop stops a local stream for the admin token; unknown sids are 404."""
+    import app as app_module
+    from common.sessions import SessionState
+
+    admin = {"Authorization": "Bearer s3cret"}
+    async with AsyncClient(transport=ASGITransport(app=fastapi_app), base_url="http://test") as client:
+        disabled = await client.post("/api/sessions/any/stop", headers=admin)
+    assert disabled.status_code == 403
+
+    monkeypatch.setattr(app_module, "SESSIONS_ADMIN_TOKEN", "s3cret")
+    state = SessionState("http-stop-sid", "file")
+    app_module._sessions["http-stop-sid"] = state
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=fastapi_app), base_url="http://test"
+        ) as client:
+            anonymous = await client.post("/api/sessions/http-stop-sid/stop")
+            wrong = await client.post("/api/sessions/http-stop-sid/stop", headers={"Authorization": "Bearer nope"})
+            assert not state.stop_event.is_set()
+            stopped = await client.post("/api/sessions/http-stop-sid/stop", headers=admin)
+            missing = await client.post("/api/sessions/nope/stop", headers=admin)
+            listing = (await client.get("/api/sessions")).json()
+    finally:
+        app_module._sessions.pop("http-stop-sid", None)
+
+    assert anonymous.status_code == wrong.status_code == 401
+    assert stopped.status_code == 202 and state.stop_event.is_set()
+    assert missing.status_code == 404
+    assert listing["sessions"]["http-stop-sid"]["kind"] == "file"
+    assert listing["cluster"]["enabled"] is False
+
+
+async def test_transcribe_by_registered_profile(monkeypatch):
+    """POST /api/profiles compiles params once; /transcribe can then send just profile_id."""
+    import httpx
+    import app as app_module
+
+    (app_module.TEMP_DIR / "profiled.wav").write_bytes(b"profile me")
+    seen = []
+
+    async def handler(request: httpx.Request):
+        seen.append(request)
+        return httpx.Response(200, json={"results": {}})
+
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        registered = await client.post("/api/profiles", json={"params": {"smart_format": True, "interim_results": True}})
+        profile_id = registered.json()["profile_id"]
+        ok = await client.post("/transcribe", json={"filename": "profiled.wav", "profile_id": profile_id, "no_cache": True})
+        unknown = await client.post("/transcribe", json={"filename": "profiled.wav", "profile_id": "nope"})
+        invalid = await client.post("/transcribe", json={"filename": "profiled.wav", "params": {"smart_format": "yes"}})
+    await mock.aclose()
+
+    assert registered.status_code == 201
+    assert registered.json()["batch"] == {"smart_format": "true", "model": "nova-2"}
+    assert ok.status_code == 200
+    assert dict(seen[0].url.params) == {"smart_format": "true", "model": "nova-2"}
+    assert unknown.status_code == 400 and invalid.status_code == 400
+    assert len(seen) == 1
+
+
+async def test_registered_profiles_are_shared_with_other_workers(monkeypatch):
+    """A registration is broadcast, replayed under the same id elsewhere, and resent to new workers."""
+    from collections import OrderedDict
+
+    import app as app_module
+    from stt import profiles
+    from stt.profiles import ProfileError
+
+    sent = []
+
+    async def broadcast(command, payload=None):
+        sent.append((command, payload))
+
+    monkeypatch.setattr(app_module.router, "broadcast", broadcast)
+    monkeypatch.setattr(profiles, "_registered", {})
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        registered = await client.post("/api/profiles", json={"params": {"filler_words": True}})
+    pid = registered.json()["profile_id"]
+    assert sent == [("profiles", [{"id": pid, "params": {"filler_words": True}}])]
+
+    # another worker, which has never seen it
+    monkeypatch.setattr(profiles, "_registered", {})
+    monkeypatch.setattr(profiles, "_profiles", OrderedDict())
+    with pytest.raises(ProfileError):
+        app_module._request_profile({"profile_id": pid})
+    await app_module._on_profiles(None, sent[0][1])
+    assert app_module._request_profile({"profile_id": pid}).id == pid
+
+    sent.clear()
+    await app_module._on_profiles_sync(None, None)
+    assert sent == [("profiles", [{"id": pid, "params": {"filler_words": True}}])]
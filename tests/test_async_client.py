@@ -0,0 +1,83 @@
+# tests/test_async_client.py
+# Tests for stt/async_client.py against a local WebSocket server and httpx.MockTransport
+import json
+
+import httpx
+import pytest
+from websockets.asyncio.server import serve
+
+from stt.async_client import AsyncSTTClient
+from stt.client import STTClient
+from stt.options import Mode
+
+
+def _results(transcript, is_final):
+    return json.dumps({"type": "Results", "is_final": is_final,
+                       "channel": {"alternatives": [{"transcript": transcript}]}})
+
+
+async def fake_listen(ws):
+    """Minimal Deepgram listen endpoint: an interim per audio chunk, a final on CloseStream."""
+    assert ws.request.headers["Authorization"] == "Token test-key"
+    await ws.send(json.dumps({"type": "Metadata", "request_id": "req-1"}))
+    received = b""
+    async for msg in ws:
+        if isinstance(msg, bytes):
+            received += msg
+            await ws.send(_results(f"heard {len(received)}", False))
+        elif json.loads(msg)["type"] == "CloseStream":
+            await ws.send(_results(f"final {len(received)}", True))
+            await ws.close()
+
+
+async def test_build_url_matches_sync_client():
+    params = {"model": "nova-3", "smart_format": True, "redact": ["pci", "ssn"], "paragraphs": True}
+    for mode in (Mode.STREAMING, Mode.BATCH):
+        assert AsyncSTTClient("k").build_url(params, mode) == STTClient("k").build_url(params, mode)
+
+
+async def test_stream_round_trip():
+    async with serve(fake_listen, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        client = AsyncSTTClient("test-key", base_url=f"http://127.0.0.1:{port}")
+        async with client.open_stream({"model": "nova-3", "interim_results": True}) as stream:
+            await stream.send_media(b"\x00" * 320)
+            await stream.send_media(b"\x00" * 320)
+            await stream.send_close_stream()
+            events = [(data["channel"]["alternatives"][0]["transcript"], is_final)
+                      async for data, is_final in stream]
+        assert stream.request_id == "req-1"
+    assert events == [("heard 320", False), ("heard 640", False), ("final 640", True)]
+
+
+async def test_connect_failure_raises_runtime_error():
+    client = AsyncSTTClient("test-key", base_url="http://127.0.0.1:9")
+    with pytest.raises(RuntimeError, match="connection failed"):
+        async with client.open_stream({"model": "nova-3"}):
+            pass
+
+
+async def test_transcribe_batch_streams_file_over_shared_pool(tmp_path):
+    audio = tmp_path / "clip.wav"
+    audio.write_bytes(b"RIFF" + b"\x00" * 5000)
+    seen = []
+
+    async def handler(request: httpx.Request):
+        seen.append(request)
+        return httpx.Response(200, json={"results": {"ok": True}})
+
+    client = AsyncSTTClient("test-key")
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler),
+                                     headers={"Authorization": "Token test-key"})
+    async with client:
+        http = client.http
+        by_file = await client.transcribe_batch(str(audio), {"model": "nova-3", "smart_format": True})
+        by_url = await client.transcribe_batch("https://example.com/a.wav", {"model": "nova-3"})
+        assert client.http is http  # one pooled client across calls
+
+    assert by_file == by_url == {"results": {"ok": True}}
+    file_req, url_req = seen
+    assert file_req.url.params["smart_format"] == "true"
+    assert file_req.headers["Content-Length"] == "5004" and file_req.content == audio.read_bytes()
+    assert json.loads(url_req.content) == {"url": "https://example.com/a.wav"}
+    assert url_req.headers["Authorization"] == "Token test-key"
@@ -0,0 +1,71 @@
+# tests/test_audio_buffer.py
+# Tests for the bounded per-session mic audio buffer (common/audio_buffer.py)
+import asyncio
+
+import pytest
+
+from common.audio_buffer import AudioBuffer
+
+
+async def collect(buffer: AudioBuffer) -> list[bytes]:
+    return [chunk async for chunk in buffer.drain()]
+
+
+async def test_coalesces_small_frames():
+    buf = AudioBuffer(max_bytes=1000, flush_bytes=10, max_delay=10)
+    for _ in range(5):
+        buf.push(b"abcd")
+    buf.close()
+    chunks = await collect(buf)
+    assert chunks == [b"abcd" * 3, b"abcd" * 2]
+    assert buf.stats()["sends"] == 2
+
+
+async def test_holds_frames_until_sender_starts():
+    buf = AudioBuffer(max_bytes=1000, flush_bytes=100, max_delay=0.01)
+    buf.push(b"early")
+    await asyncio.sleep(0.05)  # upstream still connecting
+    sender = asyncio.create_task(collect(buf))
+    await asyncio.sleep(0.05)
+    buf.close()
+    assert await sender == [b"early"]
+
+
+async def test_max_delay_flushes_partial_chunk():
+    buf = AudioBuffer(max_bytes=1000, flush_bytes=100, max_delay=0.02)
+    received = []
+
+    async def sender():
+        async for chunk in buf.drain():
+            received.append(chunk)
+
+    task = asyncio.create_task(sender())
+    buf.push(b"tiny")
+    await asyncio.sleep(0.1)
+    assert received == [b"tiny"]
+    buf.close()
+    await task
+
+
+async def test_drop_oldest_keeps_header_frame():
+    buf = AudioBuffer(max_bytes=10, flush_bytes=100, policy="drop_oldest")
+    assert buf.push(b"HDR")
+    assert buf.push(b"aaaa")
+    assert buf.push(b"bbbb")  # evicts "aaaa", never "HDR"
+    buf.close()
+    assert await collect(buf) == [b"HDRbbbb"]
+    assert buf.stats()["dropped_bytes"] == 4
+
+
+async def test_backpressure_refuses_new_frames():
+    buf = AudioBuffer(max_bytes=8, flush_bytes=100, policy="backpressure")
+    assert buf.push(b"1234")
+    assert buf.push(b"5678")
+    assert not buf.push(b"9")
+    assert buf.stats()["dropped_frames"] == 1
+    assert buf.depth == 8
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        AudioBuffer(policy="block")
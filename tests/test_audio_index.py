@@ -0,0 +1,188 @@
+# tests/test_audio_index.py
+# Tests for common/audio_index.py — per-format probing (WAV, VBR MP3, Ogg Opus),
+# seek-table lookups, persistence/staleness, and reuse by /upload and /transcribe.
+import os
+import struct
+import wave
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from common.audio_index import (
+    SeekError, build_index, byte_range, get_index, index_path, load_index, load_resume_point, offset_at,
+    save_resume_point, time_at, write_index,
+)
+
+os.environ.setdefault("DEEPGRAM_API_KEY", "test-key")
+
+
+def mp3_frame(kbps: int) -> bytes:
+    """One silent MPEG-1 Layer III frame, 44.1 kHz stereo, at `kbps`."""
+    index = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320).index(kbps)
+    header = bytes((0xFF, 0xFB, index << 4, 0x00))
+    return header + bytes(144 * kbps * 1000 // 44100 - 4)
+
+
+def ogg_page(granule: int, body: bytes) -> bytes:
+    segments = [255] * (len(body) // 255) + [len(body) % 255]
+    return (b"OggS" + bytes(2) + struct.pack("<qIII", granule, 1, 0, 0)
+            + bytes([len(segments)]) + bytes(segments) + body)
+
+
+def test_wav_index_is_exact(tmp_path):
+    path = tmp_path / "a.wav"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1), w.setsampwidth(2), w.setframerate(16000)
+        w.writeframes(bytes(32000 * 2))
+    index = build_index(path)
+    assert (index["codec"], index["content_type"], index["sample_rate"], index["channels"]) == (
+        "pcm_s16le", "audio/wav", 16000, 1)
+    assert index["duration"] == 2.0 and index["data_offset"] == 44 and index["bitrate"] == 256000
+    assert time_at(index, 44 + 32000) == 1.0
+    assert offset_at(index, 1.5) == 44 + 48000  # PCM seeks are exact to the sample
+
+
+def test_vbr_mp3_seek_table_follows_frames(tmp_path):
+    # 2 s at 320 kbps then 2 s at 32 kbps: a bytes-to-seconds ratio puts the midpoint at ~3.6 s
+    frames_per_2s = round(2 * 44100 / 1152)
+    loud, quiet = mp3_frame(320) * frames_per_2s, mp3_frame(32) * frames_per_2s
+    path = tmp_path / "vbr.mp3"
+    path.write_bytes(b"ID3\x03\x00\x00\x00\x00\x00\x10" + bytes(16) + loud + quiet + b"TAG" + bytes(125))
+    index = build_index(path)
+
+    assert index["codec"] == "mp3" and index["content_type"] == "audio/mpeg"
+    assert index["data_offset"] == 26
+    assert index["duration"] == pytest.approx(2 * frames_per_2s * 1152 / 44100)
+    assert index["bitrate"] == 176000
+    mid = 26 + len(loud)
+    # Within one seek interval of the truth, where the whole-file ratio is ~1.6 s off
+    assert time_at(index, mid) == pytest.approx(frames_per_2s * 1152 / 44100, abs=0.25)
+    assert all(b - a <= 0.55 for a, b in zip(index["seek_times"], index["seek_times"][1:]))
+    assert offset_at(index, 3.0) > mid  # seek points land on frame boundaries past the switch
+    assert (offset_at(index, 3.0) - mid) % len(mp3_frame(32)) == 0
+
+
+def test_ogg_opus_pages_give_timestamps(tmp_path):
+    head = b"OpusHead" + bytes([1, 2]) + struct.pack("<HIhB", 312, 48000, 0, 0)
+    pages = [ogg_page(0, head), ogg_page(0, b"OpusTags" + bytes(8))]
+    pages += [ogg_page(312 + 48000 * (i + 1) // 2, bytes(300)) for i in range(6)]  # 0.5 s per page
+    path = tmp_path / "a.ogg"
+    path.write_bytes(b"".join(pages))
+    index = build_index(path)
+
+    assert (index["codec"], index["sample_rate"], index["channels"]) == ("opus", 48000, 2)
+    assert index["duration"] == 3.0
+    assert index["data_offset"] == len(pages[0]) + len(pages[1])
+    assert time_at(index, index["data_offset"] + len(pages[2])) == 0.5
+
+
+def test_unknown_bytes_get_an_empty_table(tmp_path):
+    path = tmp_path / "x.wav"
+    path.write_bytes(b"fake audio")
+    index = build_index(path)
+    assert index["codec"] is None and index["content_type"] is None and index["seek_offsets"] == []
+    assert time_at(index, 5) == 0.0
+
+
+def test_index_is_persisted_and_rebuilt_when_stale(tmp_path):
+    path = tmp_path / "a.mp3"
+    path.write_bytes(mp3_frame(128) * 10)
+    written = write_index(path, sha256="abc")
+    assert index_path(path).exists() and load_index(path) == written
+    assert get_index(path)["sha256"] == "abc"  # served from disk, not re-hashed
+
+    path.write_bytes(mp3_frame(128) * 20)
+    assert load_index(path) is None
+    assert get_index(path)["duration"] == pytest.approx(20 * 1152 / 44100)
+
+
+def test_byte_range_snaps_to_frames_and_rejects_bad_ranges(tmp_path):
+    frame = mp3_frame(128)
+    path = tmp_path / "a.mp3"
+    path.write_bytes(frame * 200)  # ~5.2 s
+    index = build_index(path)
+
+    assert byte_range(index) == (0, len(frame) * 200, 0.0)
+    start, end, base = byte_range(index, 2.0, 3.0)
+    assert start % len(frame) == 0 and end % len(frame) == 0
+    assert 1.5 < base <= 2.0  # the seek point at or before 2 s
+    assert time_at(index, end) >= 3.0
+    assert byte_range(index, 0.1)[0] == 0  # before the first seek point: from the top
+
+    with pytest.raises(SeekError, match="past the end"):
+        byte_range(index, 60.0)
+    with pytest.raises(SeekError, match="after start_time"):
+        byte_range(index, 3.0, 2.0)
+    with pytest.raises(SeekError, match="known duration"):
+        byte_range({**index, "seek_offsets": [], "duration": None}, 1.0)
+    with pytest.raises(SeekError, match="not supported"):
+        byte_range({**index, "codec": "webm"}, 1.0)
+
+
+def test_resume_point_round_trip_and_staleness(tmp_path):
+    path = tmp_path / "a.mp3"
+    path.write_bytes(mp3_frame(128) * 10)
+    assert load_resume_point(path) is None
+    save_resume_point(path, 12.5)
+    assert load_resume_point(path) == 12.5
+    path.write_bytes(mp3_frame(128) * 11)  # re-uploaded under the same name
+    assert load_resume_point(path) is None
+    save_resume_point(path, None)
+    assert not (tmp_path / ".index" / "a.mp3.resume.json").exists()
+
+
+async def test_upload_indexes_and_transcribe_reuses_it(monkeypatch):
+    import httpx
+    import app as app_module
+
+    seen = {}
+
+    async def handler(request: httpx.Request):
+        seen["headers"] = request.headers
+        return httpx.Response(200, json={"results": {}})
+
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    async with AsyncClient(transport=ASGITransport(app=app_module.fastapi_app), base_url="http://test") as client:
+        uploaded = (await client.post("/upload?filename=indexed.mp3", content=mp3_frame(64) * 40)).json()
+        resp = await client.post("/transcribe", json={"filename": "indexed.mp3", "no_cache": True})
+    await mock.aclose()
+
+    assert uploaded["codec"] == "mp3" and uploaded["bitrate"] == 64000
+    assert uploaded["duration"] == pytest.approx(40 * 1152 / 44100)
+    assert load_index(app_module.TEMP_DIR / "indexed.mp3")["sha256"] == uploaded["sha256"]
+    assert resp.status_code == 200
+    assert seen["headers"]["content-type"] == "audio/mpeg"
+
+
+async def test_traversal_filenames_never_index_or_resume_outside_temp_dir(monkeypatch, tmp_path):
+    """get_index and the resume point write next to the file, so a ../ filename must be
+    confined to TEMP_DIR (where it does not exist) by /transcribe and start_file_streaming.
+    """
+    from unittest.mock import AsyncMock
+
+    import app as app_module
+    from tests.test_streaming import MockAsyncDeepgramClient, MockAsyncV1SocketClient
+
+    victim = tmp_path / "victim-traversal.mp3"
+    victim.write_bytes(mp3_frame(64) * 40)
+    escape = os.path.relpath(victim, app_module.TEMP_DIR)
+    assert escape.startswith("..") and not (app_module.TEMP_DIR / victim.name).exists()
+
+    async with AsyncClient(transport=ASGITransport(app=app_module.fastapi_app), base_url="http://test") as client:
+        resp = await client.post("/transcribe", json={"filename": escape, "no_cache": True})
+    assert resp.status_code in (400, 404)
+
+    monkeypatch.setattr(app_module.sio, "emit", AsyncMock())
+    monkeypatch.setattr(app_module, "AsyncDeepgramClient",
+                        lambda **kw: MockAsyncDeepgramClient(MockAsyncV1SocketClient([])))
+    await app_module.on_start_file_streaming("sid-traversal", {"filename": escape, "resume": True, "pace": "max"})
+    state = app_module._sessions.get("sid-traversal")
+    if state is not None:
+        await state.task
+    errors = [c.args[1] for c in app_module.sio.emit.call_args_list if c.args[0] == "stream_error"]
+    assert errors  # the file is not found inside TEMP_DIR
+
+    assert load_resume_point(victim) is None
+    assert not (tmp_path / ".index").exists()
+    assert not list(tmp_path.rglob("*.json"))
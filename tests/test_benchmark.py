@@ -0,0 +1,51 @@
+# tests/test_benchmark.py
+# Tests for scripts/benchmark.py — report maths, baseline comparison, and a small
+# end-to-end run against the in-process app pointed at the mock Deepgram server.
+import os
+
+from deepgram import DeepgramClientEnvironment
+
+from scripts import benchmark
+from tests.conftest import BASE_URL, HOST, MOCK_PORT
+
+
+def test_lag_percentiles_use_histogram_deltas():
+    before = {0.001: 10, 0.01: 10, 0.1: 10, float("inf"): 10}
+    after = {0.001: 108, 0.01: 109, 0.1: 110, float("inf"): 110}
+    assert benchmark.lag_percentiles(before, after) == {"count": 100, "p50": 1.0, "p99": 10.0}
+    assert benchmark.lag_percentiles(None, after) == {"count": 0}
+
+
+def test_compare_flags_only_regressions_beyond_tolerance_and_slack():
+    baseline = {"sessions": {"failed": 0, "sustained": 50},
+                "emit_latency_ms": {"p95": 40.0, "p99": 80.0},
+                "loop_lag_ms": {"p99": 2.5}, "audio": {"drop_ratio": 0.0}}
+    same_ish = {"sessions": {"failed": 0, "sustained": 48},
+                "emit_latency_ms": {"p95": 45.0, "p99": 70.0},
+                "loop_lag_ms": {"p99": 5.0}, "audio": {"drop_ratio": 0.0005}}
+    assert benchmark.compare(same_ish, baseline) == []
+
+    worse = {"sessions": {"failed": 2, "sustained": 30},
+             "emit_latency_ms": {"p95": 60.0, "p99": 80.0},
+             "loop_lag_ms": {"p99": 25.0}, "audio": {"drop_ratio": 0.01}}
+    assert benchmark.compare(worse, baseline) == [
+        "sessions.failed: 0 -> 2", "sessions.sustained: 50 -> 30", "emit_latency_ms.p95: 40.0 -> 60.0",
+        "loop_lag_ms.p99: 2.5 -> 25.0", "audio.drop_ratio: 0.0 -> 0.01",
+    ]
+
+
+async def test_run_reports_sessions_latency_lag_and_rss(server, mock_deepgram, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setenv("DEEPGRAM_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "DEEPGRAM_ENVIRONMENT", DeepgramClientEnvironment(
+        base=f"http://{HOST}:{MOCK_PORT}", production=f"ws://{HOST}:{MOCK_PORT}", agent=f"ws://{HOST}:{MOCK_PORT}",
+    ))
+    report = await benchmark.run(BASE_URL, clients=3, session_seconds=1.0, speed=4.0,
+                                 cadence_intervals=(0.5, 1.0), server_pid=os.getpid())
+
+    assert report["sessions"] == {"started": 3, "completed": 3, "failed": 0, "errors": {}, "sustained": 3}
+    assert report["emit_latency_ms"]["count"] == report["updates"] == 3 * 2  # interim + final each
+    assert report["loop_lag_ms"]["count"] > 0
+    assert report["rss_mb"]["before"] > 0
+    assert report["audio"] == {"bytes_sent": 3 * 32000, "bytes_dropped": 0, "drop_ratio": 0.0}
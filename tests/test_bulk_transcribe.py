@@ -0,0 +1,107 @@
+# tests/test_bulk_transcribe.py
+# Tests for scripts/bulk_transcribe.py — discovery, bounded concurrency, resume, retries
+import io
+import json
+import threading
+import time
+
+import requests
+
+from scripts import bulk_transcribe as bulk
+
+
+class FakeClient:
+    """Stands in for STTClient.transcribe_batch; fails the first `flaky` calls per source."""
+
+    def __init__(self, flaky=0, status=503, delay=0.01):
+        self.flaky = flaky
+        self.status = status
+        self.delay = delay
+        self.calls: dict[str, int] = {}
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def transcribe_batch(self, source, params, timeout=600):
+        with self._lock:
+            self.calls[source] = self.calls.get(source, 0) + 1
+            attempt = self.calls[source]
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if attempt <= self.flaky:
+                response = requests.Response()
+                response.status_code = self.status
+                raise requests.HTTPError(response=response)
+            return {"metadata": {"duration": 1800.0}, "results": {"source": source}}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _quiet():
+    return bulk.Progress(0, stream=io.StringIO(), interval=3600)
+
+
+def test_discover_dirs_globs_and_manifest(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "one.wav").write_bytes(b"x")
+    (tmp_path / "a" / "notes.txt").write_text("skip")
+    (tmp_path / "two.mp3").write_bytes(b"x")
+    manifest = tmp_path / "list.txt"
+    manifest.write_text('# comment\nhttps://example.com/x.wav\n{"path": "p.wav"}\n')
+
+    found = bulk.discover([str(tmp_path / "a"), str(tmp_path / "*.mp3"), str(tmp_path / "two.mp3")], str(manifest))
+    assert found == [
+        str(tmp_path / "a" / "one.wav"), str(tmp_path / "two.mp3"), "https://example.com/x.wav", "p.wav",
+    ]
+
+
+def test_run_bounds_concurrency_and_reports_throughput(tmp_path):
+    client = FakeClient()
+    sources = [f"file{i}.wav" for i in range(12)]
+    sink = bulk.JsonlSink(str(tmp_path / "out.jsonl"))
+
+    summary = bulk.run(client, sources, {"model": "nova-3"}, sink, concurrency=3, progress=_quiet())
+
+    assert client.peak == 3
+    assert summary["ok"] == 12 and summary["failed"] == 0 and summary["skipped"] == 0
+    assert summary["audio_hours"] == 6.0 and summary["audio_hours_per_s"] > 0
+    lines = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    assert sorted(r["source"] for r in lines) == sorted(sources)
+
+
+def test_resume_skips_completed_and_retries_failures(tmp_path):
+    out = tmp_path / "out.jsonl"
+    out.write_text(
+        json.dumps({"source": "done.wav", "status": "ok"}) + "\n"
+        + json.dumps({"source": "failed.wav", "status": "error"}) + "\n"
+        + '{"source": "torn'  # interrupted mid-write
+    )
+    client = FakeClient()
+    summary = bulk.run(client, ["done.wav", "failed.wav", "new.wav"], {}, bulk.JsonlSink(str(out)),
+                       progress=_quiet())
+    assert summary["skipped"] == 1
+    assert set(client.calls) == {"failed.wav", "new.wav"}
+
+
+def test_transient_errors_are_retried(tmp_path):
+    client = FakeClient(flaky=2)
+    summary = bulk.run(client, ["a.wav"], {}, bulk.DirSink(str(tmp_path)), retries=3, backoff=0.001,
+                       progress=_quiet())
+    assert summary["ok"] == 1 and summary["retries"] == 2
+
+    # Resume: result already on disk — nothing to do
+    again = FakeClient()
+    assert bulk.run(again, ["a.wav"], {}, bulk.DirSink(str(tmp_path)), progress=_quiet())["skipped"] == 1
+    assert again.calls == {}
+
+
+def test_permanent_errors_are_not_retried(tmp_path):
+    client = FakeClient(flaky=5, status=400)
+    sink = bulk.DirSink(str(tmp_path))
+    summary = bulk.run(client, ["bad.wav"], {}, sink, retries=3, backoff=0.001, progress=_quiet())
+    assert summary["failed"] == 1 and client.calls == {"bad.wav": 1}
+    assert len(list(tmp_path.glob("*.error.json"))) == 1
+    assert sink.pending(["bad.wav"]) == ["bad.wav"]
@@ -0,0 +1,123 @@
+# tests/test_cluster.py
+# Tests for common/cluster.py — pub/sub client manager and cross-worker session routing
+import asyncio
+import uuid
+
+import pytest
+import socketio
+
+from common.cluster import AsyncMemoryManager, SessionRouter, make_client_manager
+
+
+def test_no_queue_means_single_process():
+    assert make_client_manager("") is None
+    assert not SessionRouter(None).enabled
+
+
+def test_manager_selection():
+    assert isinstance(make_client_manager("memory://", channel=uuid.uuid4().hex), AsyncMemoryManager)
+    with pytest.raises(ValueError):
+        make_client_manager("kafka://broker:9092")
+
+
+async def _worker(channel, **kwargs):
+    """One simulated worker: its own AsyncServer + router on a shared in-memory bus."""
+    manager = make_client_manager("memory://", channel=channel)
+    server = socketio.AsyncServer(async_mode="asgi", client_manager=manager)
+    router = SessionRouter(manager, **kwargs)
+    router.start(server)
+    return router
+
+
+async def _shutdown(*routers):
+    for router in routers:
+        await router.aclose()
+        router.manager.thread.cancel()
+        router.manager.detach()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_commands_are_routed_to_owning_worker():
+    channel = uuid.uuid4().hex
+    owner, other = await _worker(channel), await _worker(channel)
+    received = []
+
+    async def on_stop(sid, payload):
+        received.append(("stop", sid, payload))
+
+    owner.on("stop", on_stop)
+    other.on("stop", on_stop)  # must not fire on the non-owner
+    try:
+        await owner.claim("sid-1")
+        await _settle()
+        assert other.remote_owners == {"sid-1": owner.host_id}
+        assert owner.owner("sid-1") == other.owner("sid-1") == owner.host_id
+
+        assert await other.forward("stop", "sid-1")
+        await _settle()
+        assert received == [("stop", "sid-1", None)]
+
+        await owner.release("sid-1")
+        await _settle()
+        assert "sid-1" not in other.remote_owners
+        assert not await other.forward("stop", "sid-1")
+    finally:
+        await _shutdown(owner, other)
+
+
+async def test_broadcasts_reach_every_other_worker():
+    channel = uuid.uuid4().hex
+    sender, a, b = await _worker(channel), await _worker(channel), await _worker(channel)
+    received = []
+
+    async def on_note(sid, payload):
+        received.append((sid, payload))
+
+    for router in (sender, a, b):
+        router.on("note", on_note)
+    try:
+        await sender.broadcast("note", {"n": 1})
+        await _settle()
+        assert received == [(None, {"n": 1})] * 2
+        await SessionRouter(None).broadcast("note")  # single worker: nothing to do
+    finally:
+        await _shutdown(sender, a, b)
+
+
+async def test_heartbeat_repairs_and_reclaims_ownership():
+    channel = uuid.uuid4().hex
+    owner = await _worker(channel, heartbeat_interval=0.02)
+    other = await _worker(channel, heartbeat_interval=0.02, owner_ttl=0.1)
+    try:
+        owner._claimed.add("missed-claim")  # as if the claim message had been lost
+        other.remote_owners["missed-release"] = owner.host_id
+        await asyncio.sleep(0.06)
+        assert other.remote_owners == {"missed-claim": owner.host_id}
+
+        await owner.aclose()  # the owner dies without releasing
+        await asyncio.sleep(0.15)
+        assert not await other.forward("stop", "missed-claim")
+        assert other.remote_owners == {} and other.stats()["reaped"] == 1
+    finally:
+        await _shutdown(owner, other)
+
+
+async def test_emits_still_pass_through_routing_listener():
+    """Ordinary Socket.IO emits on the shared channel reach the stock handler."""
+    channel = uuid.uuid4().hex
+    a, b = await _worker(channel), await _worker(channel)
+    seen = asyncio.Event()
+
+    async def handle_emit(message):
+        seen.set()
+
+    b.manager._handle_emit = handle_emit
+    try:
+        await a.manager.emit("transcription_update", {"transcript": "hi"}, namespace="/", room="x")
+        await asyncio.wait_for(seen.wait(), 1.0)
+    finally:
+        await _shutdown(a, b)
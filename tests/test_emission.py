@@ -0,0 +1,47 @@
+# tests/test_emission.py
+# Tests for the per-session transcription_update emission policy (common/emission.py)
+from common.emission import InterimEmitter
+
+
+def test_default_policy_emits_everything_in_full():
+    em = InterimEmitter()
+    assert em.prepare("hel", False, now=0.0) == {"transcript": "hel", "is_final": False}
+    assert em.prepare("hello", False, now=0.0) == {"transcript": "hello", "is_final": False}
+    assert em.prepare("hello.", True, now=0.0) == {"transcript": "hello.", "is_final": True}
+
+
+def test_interims_throttled_finals_always_emitted():
+    em = InterimEmitter(max_rate=2)  # at most one interim per 0.5 s
+    assert em.prepare("a", False, now=0.0) is not None
+    assert em.prepare("a b", False, now=0.2) is None
+    assert em.prepare("a b c", True, now=0.3) is not None
+    assert em.prepare("d", False, now=0.6) is not None
+    assert (em.emitted, em.suppressed) == (3, 1)
+
+
+def test_delta_encoding_against_last_emitted_interim():
+    em = InterimEmitter(delta=True)
+    first = em.prepare("the quick", False, now=0.0)
+    assert first == {"is_final": False, "offset": 0, "delta": "the quick"}
+    second = em.prepare("the quick brown", False, now=1.0)
+    assert second == {"is_final": False, "offset": 9, "delta": " brown"}
+    # Revision: client keeps previous[:offset] and appends delta
+    third = em.prepare("the quack", False, now=2.0)
+    assert "the quick brown"[:third["offset"]] + third["delta"] == "the quack"
+    # A final resets the baseline
+    em.prepare("the quack.", True, now=3.0)
+    assert em.prepare("next", False, now=4.0)["offset"] == 0
+
+
+def test_suppressed_interims_do_not_move_delta_baseline():
+    em = InterimEmitter(max_rate=1, delta=True)
+    em.prepare("one", False, now=0.0)
+    assert em.prepare("one two", False, now=0.5) is None
+    payload = em.prepare("one two three", False, now=1.0)
+    assert "one"[:payload["offset"]] + payload["delta"] == "one two three"
+
+
+def test_from_params():
+    em = InterimEmitter.from_params({"interim_max_rate": "4", "interim_delta": True, "model": "nova-3"})
+    assert em.max_rate == 4.0 and em.delta
+    assert InterimEmitter.from_params({}).max_rate is None
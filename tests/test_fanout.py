@@ -0,0 +1,170 @@
+# tests/test_fanout.py
+# Tests for profile fan-out (POST /api/fanout and the `fanout` socket event): file legs
+# streamed from disk, URLs passed by reference, TTS synthesized once, per-leg results
+# and latency, and leg failure isolation.
+import os
+
+import httpx
+import pytest
+import socketio
+from deepgram import DeepgramClientEnvironment
+from httpx import ASGITransport, AsyncClient
+
+from tests.conftest import BASE_URL, HOST, MOCK_PORT
+from tests.test_streaming import MockAsyncDeepgramClient, MockAsyncV1SocketClient, make_results
+
+os.environ.setdefault("DEEPGRAM_API_KEY", "test-key")
+
+
+def _listen_handler(bodies: list):
+    """Mock /v1/listen answering with the requested model; model=broken fails."""
+    async def handler(request: httpx.Request):
+        model = request.url.params.get("model")
+        bodies.append(await request.aread())
+        if model == "url":
+            return httpx.Response(200, json={"metadata": {"model": model}, "results": {}})
+        if model == "broken":
+            return httpx.Response(400, json={"err_msg": "bad model"})
+        return httpx.Response(200, json={
+            "metadata": {"model": model, "smart_format": request.url.params.get("smart_format")},
+            "results": {"channels": [{"alternatives": [{"transcript": f"heard by {model}"}]}]},
+        })
+    return handler
+
+
+async def test_fanout_streams_the_file_to_each_leg_and_reports_it(monkeypatch):
+    import app as app_module
+
+    audio = b"RIFF-not-really" + bytes(50_000)
+    (app_module.TEMP_DIR / "fanout.wav").write_bytes(audio)
+    reads = []
+    real_aiter_path = app_module.aiter_path
+
+    def counting_aiter_path(path, *args, **kwargs):
+        reads.append(path)
+        return real_aiter_path(path, *args, **kwargs)
+
+    bodies = []
+    mock_ws = MockAsyncV1SocketClient([make_results("streamed words", 0.0, 1.0, True)])
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(_listen_handler(bodies)), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    monkeypatch.setattr(app_module, "aiter_path", counting_aiter_path)
+    monkeypatch.setattr(app_module, "AsyncDeepgramClient", lambda **kw: MockAsyncDeepgramClient(mock_ws))
+
+    async with AsyncClient(transport=ASGITransport(app=app_module.fastapi_app), base_url="http://test") as client:
+        resp = await client.post("/api/fanout", json={
+            "filename": "fanout.wav",
+            "no_cache": True,
+            "profiles": [
+                {"name": "nova-3", "params": {"model": "nova-3"}},
+                {"name": "nova-2 formatted", "params": {"model": "nova-2", "smart_format": True}},
+                {"name": "live", "params": {"model": "nova-3"}, "mode": "streaming"},
+                {"name": "bad", "params": {"model": "broken"}},
+            ],
+        })
+    await mock.aclose()
+
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    # Every leg streams the upload from disk itself; nothing holds the whole file
+    assert len(reads) == 4 and data["source"] == {"kind": "file", "filename": "fanout.wav", "bytes": len(audio)}
+    assert bodies == [audio] * 3 and b"".join(mock_ws.send_media_calls) == audio
+
+    legs = data["legs"]
+    assert [leg["name"] for leg in legs] == ["nova-3", "nova-2 formatted", "live", "bad"]
+    assert legs[0]["result"]["metadata"]["model"] == "nova-3"
+    assert legs[1]["result"]["metadata"] == {"model": "nova-2", "smart_format": "true"}
+    assert legs[2]["result"]["transcript"] == "streamed words"
+    assert "400" in legs[3]["error"] and "result" not in legs[3]
+    assert all(leg["latency"]["seconds"] <= data["wall_seconds"] for leg in legs)
+    assert "upstream_seconds" in legs[0]["latency"] and "first_final_seconds" in legs[2]["latency"]
+
+
+async def test_fanout_cached_legs_skip_the_source(monkeypatch):
+    import app as app_module
+
+    speaks, bodies = [], []
+    listen = _listen_handler(bodies)
+
+    async def handler(request: httpx.Request):
+        if request.url.path == "/v1/speak":
+            speaks.append(request)
+            return httpx.Response(200, content=b"mp3" * 1000)
+        return await listen(request)
+
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    body = {"text": "fan me out", "profiles": [{"params": {"model": "nova-3"}}, {"params": {"model": "nova-2"}}]}
+    async with AsyncClient(transport=ASGITransport(app=app_module.fastapi_app), base_url="http://test") as client:
+        first = (await client.post("/api/fanout", json=body)).json()
+        second = (await client.post("/api/fanout", json=body)).json()
+    await mock.aclose()
+
+    assert len(speaks) == 1 and len(bodies) == 2
+    assert [leg["cache"] for leg in first["legs"]] == ["miss", "miss"]
+    assert [leg["cache"] for leg in second["legs"]] == ["hit", "hit"]
+    assert second["source"]["bytes"] == 0  # nothing synthesized the second time
+
+
+async def test_fanout_url_legs_pass_the_url_to_deepgram(monkeypatch):
+    import app as app_module
+
+    bodies = []
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(_listen_handler(bodies)), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    async with AsyncClient(transport=ASGITransport(app=app_module.fastapi_app), base_url="http://test") as client:
+        resp = await client.post("/api/fanout", json={
+            "url": "https://example.com/a.wav", "no_cache": True, "profiles": [{"params": {"model": "url"}}],
+        })
+    await mock.aclose()
+
+    assert resp.status_code == 200, resp.text
+    assert bodies == [b'{"url":"https://example.com/a.wav"}']
+    assert resp.json()["source"] == {"kind": "url", "url": "https://example.com/a.wav"}
+
+
+@pytest.mark.parametrize("body,status", [
+    ({"profiles": [{"params": {}}]}, 400),
+    ({"text": "hi", "profiles": []}, 400),
+    ({"text": "hi", "profiles": [{"params": {}}] * 9}, 400),
+    ({"text": "hi", "profiles": [{"params": {}, "mode": "both"}]}, 400),
+    ({"text": "hi", "profiles": [{"profile_id": "nope"}]}, 400),
+    ({"filename": "missing.wav", "profiles": [{"params": {}}]}, 404),
+    ({"url": "https://example.com/a.wav", "profiles": [{"params": {}, "mode": "streaming"}]}, 400),
+])
+async def test_fanout_rejects_bad_requests(body, status):
+    import app as app_module
+
+    async with AsyncClient(transport=ASGITransport(app=app_module.fastapi_app), base_url="http://test") as client:
+        resp = await client.post("/api/fanout", json=body)
+    assert resp.status_code == status and "error" in resp.json()
+
+
+async def test_fanout_socket_event_streams_legs_as_they_finish(server, mock_deepgram, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setenv("DEEPGRAM_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "DEEPGRAM_ENVIRONMENT", DeepgramClientEnvironment(
+        base=f"http://{HOST}:{MOCK_PORT}", production=f"ws://{HOST}:{MOCK_PORT}", agent=f"ws://{HOST}:{MOCK_PORT}",
+    ))
+    (app_module.TEMP_DIR / "fanout_socket.raw").write_bytes(bytes(64000))  # 2 s of 16 kHz linear16
+
+    client = socketio.AsyncClient()
+    seen = []
+    client.on("fanout_leg", lambda data: seen.append(data["name"]))
+    await client.connect(BASE_URL, transports=["websocket"])
+    try:
+        params = {"model": "nova-3", "encoding": "linear16", "sample_rate": 16000}
+        ack = await client.call("fanout", {
+            "filename": "fanout_socket.raw", "no_cache": True,
+            "profiles": [{"name": "a", "params": params, "mode": "streaming"},
+                         {"name": "b", "params": {**params, "punctuate": True}, "mode": "streaming"}],
+        }, timeout=15)
+        bad = await client.call("fanout", {"profiles": [{"params": {}}]}, timeout=5)
+    finally:
+        await client.disconnect()
+
+    assert sorted(seen) == ["a", "b"]
+    assert [leg["result"]["transcript"] != "" for leg in ack["legs"]] == [True, True]
+    assert ack["source"]["bytes"] == 64000
+    assert "error" in bad
@@ -0,0 +1,183 @@
+# tests/test_jobs.py
+# Tests for common/jobs.py and the /jobs API
+import asyncio
+import json
+import os
+
+os.environ.setdefault("DEEPGRAM_API_KEY", "test-key")
+
+import httpx
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from common.jobs import JobManager, JobQueueFull
+
+
+async def _wait_for(manager, job_id, status="done", timeout=1.0):
+    async def poll():
+        while (await manager.get(job_id))["status"] != status:
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+    return await manager.get(job_id)
+
+
+async def test_job_runs_and_is_persisted(tmp_path):
+    finished = []
+
+    async def runner(job):
+        return {"echo": job["request"]["url"]}
+
+    async def on_finished(job):
+        finished.append(job["id"])
+
+    manager = JobManager(runner, tmp_path, workers=2, on_finished=on_finished)
+    job = await manager.submit({"url": "https://x/a.wav"}, sid="sid-1")
+    assert job["status"] == "queued"
+    done = await _wait_for(manager, job["id"])
+    await manager.aclose()
+
+    assert done["result"] == {"echo": "https://x/a.wav"} and done["attempts"] == 1
+    assert finished == [job["id"]]
+    on_disk = json.loads((tmp_path / f"{job['id']}.json").read_text())
+    assert on_disk["status"] == "done" and on_disk["sid"] == "sid-1"
+    assert job["id"] not in manager._jobs and manager.counts()["done"] == 1  # served from disk
+
+
+async def test_finished_jobs_expire_from_disk(tmp_path):
+    async def runner(job):
+        return {}
+
+    manager = JobManager(runner, tmp_path, workers=1, retention=0.05, sweep_interval=0.02)
+    job = await manager.submit({"url": "a"})
+    await _wait_for(manager, job["id"])
+    await asyncio.sleep(0.1)
+    await manager.aclose()
+    assert await manager.get(job["id"]) is None and not list(tmp_path.glob("*.json"))
+
+
+async def test_failed_job_records_error(tmp_path):
+    async def runner(job):
+        raise FileNotFoundError("File not found: gone.wav")
+
+    manager = JobManager(runner, tmp_path, workers=1)
+    job = await manager.submit({"filename": "gone.wav"})
+    failed = await _wait_for(manager, job["id"], "failed")
+    await manager.aclose()
+    assert failed["error"] == "File not found: gone.wav"
+
+
+async def test_worker_pool_bounds_concurrency(tmp_path):
+    running = 0
+    peak = 0
+
+    async def runner(job):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return {}
+
+    manager = JobManager(runner, tmp_path, workers=2)
+    submitted = [await manager.submit({"url": f"u{i}"}) for i in range(6)]
+    for job in submitted:
+        await _wait_for(manager, job["id"])
+    await manager.aclose()
+    assert peak == 2
+
+
+async def test_interrupted_jobs_resume_after_restart(tmp_path):
+    release = asyncio.Event()
+
+    async def slow(job):
+        await release.wait()
+        return {}
+
+    first = JobManager(slow, tmp_path, workers=1)
+    running = await first.submit({"url": "a"})
+    queued = await first.submit({"url": "b"})
+    await _wait_for(first, running["id"], "running")
+    await first.aclose()  # simulated shutdown mid-job
+
+    async def fast(job):
+        return {"url": job["request"]["url"]}
+
+    second = JobManager(fast, tmp_path, workers=1)
+    await second.start()
+    resumed = await _wait_for(second, running["id"])
+    assert (await _wait_for(second, queued["id"]))["result"] == {"url": "b"}
+    await second.aclose()
+    assert resumed["attempts"] == 2
+
+
+async def test_repeatedly_interrupted_job_gives_up(tmp_path):
+    async def hang(job):
+        await asyncio.Event().wait()
+
+    job_id = None
+    for _ in range(2):
+        manager = JobManager(hang, tmp_path, workers=1, max_attempts=2)
+        job_id = job_id or (await manager.submit({"url": "a"}))["id"]
+        await manager.start()
+        await _wait_for(manager, job_id, "running")
+        await manager.aclose()  # the process dies mid-job
+
+    manager = JobManager(hang, tmp_path, workers=1, max_attempts=2)
+    await manager.start()
+    failed = await manager.get(job_id)
+    await manager.aclose()
+    assert failed["status"] == "failed" and failed["attempts"] == 2 and "giving up" in failed["error"]
+
+
+async def test_queue_full_rejects(tmp_path):
+    async def runner(job):
+        await asyncio.sleep(1)
+
+    manager = JobManager(runner, tmp_path, workers=0, max_queue=1)
+    await manager.submit({"url": "a"})
+    with pytest.raises(JobQueueFull):
+        await manager.submit({"url": "b"})
+    await manager.aclose()
+
+
+async def test_jobs_api_submit_and_poll(monkeypatch, tmp_path):
+    import app as app_module
+
+    async def handler(request: httpx.Request):
+        return httpx.Response(200, json={"results": {"job": True}})
+
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    monkeypatch.setattr(app_module.jobs, "directory", tmp_path)
+    emitted = []
+
+    async def fake_emit(event, data, to=None):
+        emitted.append((event, data, to))
+
+    monkeypatch.setattr(app_module.sio, "emit", fake_emit)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app_module.fastapi_app), base_url="http://test"
+    ) as client:
+        missing = await client.post("/jobs", json={"params": {}})
+        escaped = await client.post("/jobs", json={"filename": "../../etc/passwd", "params": {}})
+        resp = await client.post("/jobs", json={
+            "url": "https://example.com/long.wav", "params": {"model": "nova-3"},
+            "sid": "sid-jobs", "no_cache": True,
+        })
+        assert resp.status_code == 202
+        job_id = resp.json()["id"]
+        assert resp.headers["location"] == f"/jobs/{job_id}"
+        for _ in range(100):
+            job = (await client.get(f"/jobs/{job_id}")).json()
+            if job["status"] == "done":
+                break
+            await asyncio.sleep(0.01)
+        not_found = await client.get("/jobs/nope")
+    await app_module.jobs.aclose()
+    await mock.aclose()
+
+    assert missing.status_code == 400 and escaped.status_code == 404
+    assert job["result"] == {"results": {"job": True}}
+    assert not_found.status_code == 404
+    assert emitted and emitted[0][0] == "job_finished" and emitted[0][2] == "sid-jobs"
@@ -0,0 +1,46 @@
+# tests/test_latency.py
+# Tests for per-session transcript latency tracking (common/latency.py)
+from common.latency import LatencyTracker
+
+
+def test_file_mode_interpolates_send_times():
+    t = LatencyTracker()
+    t.mark_sent(1.0, now=10.0)
+    t.mark_sent(2.0, now=11.0)
+    t.mark_sent(3.0, now=12.0)
+    # Audio up to 1.5 s left the server at 10.5 — result arrives at 11.0
+    assert t.observe(1.5, is_final=False, has_text=True, now=11.0) == 0.5
+    assert t.observe(3.0, is_final=True, has_text=True, now=12.25) == 0.25
+    summary = t.summary()
+    assert summary["interim"]["count"] == 1
+    assert summary["final"]["count"] == 1
+    assert summary["time_to_first_transcript"] == 1.0  # first mark at 10.0, first text at 11.0
+
+
+def test_realtime_mode_measures_from_capture():
+    t = LatencyTracker()
+    t.start_realtime(100.0)
+    assert t.observe(2.0, is_final=True, has_text=True, now=102.5) == 0.5
+
+
+def test_empty_results_do_not_set_time_to_first_transcript():
+    t = LatencyTracker()
+    t.start_realtime(0.0)
+    t.observe(1.0, is_final=True, has_text=False, now=1.5)
+    assert t.time_to_first_transcript is None
+    t.observe(2.0, is_final=True, has_text=True, now=2.5)
+    assert t.time_to_first_transcript == 2.5
+
+
+def test_no_audio_sent_yields_no_latency():
+    t = LatencyTracker()
+    assert t.observe(1.0, is_final=True, has_text=True, now=1.0) is None
+    assert t.summary()["final"] == {"count": 0}
+
+
+def test_marks_are_pruned_as_results_advance():
+    t = LatencyTracker()
+    for i in range(1, 101):
+        t.mark_sent(float(i), now=float(i))
+    t.observe(90.0, is_final=True, has_text=True, now=91.0)
+    assert len(t._positions) <= 12
@@ -0,0 +1,66 @@
+# tests/test_metrics.py
+# Tests for the Prometheus text exposition (common/metrics.py) and the /metrics route
+import os
+
+os.environ.setdefault("DEEPGRAM_API_KEY", "test-key")
+
+import httpx
+from httpx import AsyncClient, ASGITransport
+
+from common.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_and_gauge_render():
+    reg = Registry()
+    c = Counter("req_total", "Requests.", ["route"], registry=reg)
+    c.labels("a").inc()
+    c.labels("a").inc(2)
+    Gauge("live", "Live things.", registry=reg, fn=lambda: 7)
+    text = reg.render()
+    assert "# TYPE req_total counter" in text
+    assert 'req_total{route="a"} 3' in text
+    assert "live 7" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = Registry()
+    h = Histogram("lat_seconds", "Latency.", registry=reg, buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 5.0):
+        h.observe(v)
+    text = reg.render()
+    assert 'lat_seconds_bucket{le="0.1"} 2' in text
+    assert 'lat_seconds_bucket{le="1.0"} 3' in text
+    assert 'lat_seconds_bucket{le="+Inf"} 4' in text
+    assert "lat_seconds_count 4" in text
+
+
+def test_label_values_escaped():
+    reg = Registry()
+    Counter("x_total", "X.", ["cause"], registry=reg).labels('a"b\n').inc()
+    assert 'x_total{cause="a\\"b\\n"} 1' in reg.render()
+
+
+def test_error_cause_classification():
+    import app
+    req = httpx.Request("GET", "http://x")
+    assert app._error_cause(httpx.HTTPStatusError("", request=req, response=httpx.Response(401))) == "auth"
+    assert app._error_cause(Exception("status_code: 429, body: slow down")) == "rate_limit"
+    assert app._error_cause(ConnectionRefusedError()) == "network"
+    assert app._error_cause(ValueError("boom")) == "internal"
+
+
+async def test_metrics_route_exposes_core_series():
+    from app import fastapi_app
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        resp = await client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    for name in (
+        "stt_active_sessions", "stt_audio_bytes_in_total", "stt_send_media_errors_total",
+        "stt_keepalive_failures_total", "stt_upstream_connect_seconds", "stt_batch_request_seconds",
+        "stt_stream_errors_total", "stt_upstream_pool_connections",
+    ):
+        assert f"# TYPE {name} " in resp.text
+    assert 'stt_active_sessions{kind="mic"}' in resp.text
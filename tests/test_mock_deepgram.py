@@ -0,0 +1,122 @@
+# tests/test_mock_deepgram.py
+# Tests for scripts/mock_deepgram.py — batch/speak over ASGITransport, the streaming
+# protocol over a real socket, and the app's SDK path pointed at the mock.
+import asyncio
+import struct
+
+import pytest
+from deepgram import DeepgramClientEnvironment
+from httpx import ASGITransport, AsyncClient
+
+from scripts.mock_deepgram import MockConfig, create_app
+from stt.async_client import AsyncSTTClient
+from stt.client import STTClient
+from stt.options import Mode
+from tests.conftest import HOST, MOCK_PORT
+
+AUTH = {"Authorization": "Token test-key"}
+
+
+def _wav(seconds: float, rate: int = 16000) -> bytes:
+    data = bytes(int(seconds * rate * 2))
+    header = b"RIFF" + struct.pack("<I", 36 + len(data)) + b"WAVEfmt " + struct.pack(
+        "<IHHIIHH", 16, 1, 1, rate, rate * 2, 2, 16) + b"data" + struct.pack("<I", len(data))
+    return header + data
+
+
+async def test_batch_listen_derives_duration_from_wav_header():
+    app = create_app(MockConfig())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://mock") as client:
+        ok = await client.post("/v1/listen", params={"model": "nova-3"}, content=_wav(4.0),
+                               headers={**AUTH, "Content-Type": "audio/wav"})
+        by_url = await client.post("/v1/listen", json={"url": "https://example.com/a.wav"}, headers=AUTH)
+        no_auth = await client.post("/v1/listen", content=b"x")
+    body = ok.json()
+    assert body["metadata"]["duration"] == 4.0
+    assert len(body["results"]["channels"][0]["alternatives"][0]["words"]) == 10  # 2.5 words/s
+    assert by_url.status_code == 200
+    assert no_auth.status_code == 401
+
+
+async def test_error_injection_and_runtime_config():
+    app = create_app(MockConfig(error_rate=1.0, error_status=429))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://mock") as client:
+        failed = await client.post("/v1/listen", json={"url": "u"}, headers=AUTH)
+        await client.post("/mock/config", json={"error_rate": 0})
+        ok = await client.post("/v1/listen", json={"url": "u"}, headers=AUTH)
+        stats = (await client.get("/mock/stats")).json()
+    assert failed.status_code == 429 and ok.status_code == 200
+    assert stats["errors_injected"] == 1 and stats["batch_requests"] == 2
+
+
+async def test_speak_streams_mp3_frames_at_limited_throughput():
+    app = create_app(MockConfig(throughput=40000))
+    text = "x" * 30  # ~2 s of speech
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://mock") as client:
+        started = asyncio.get_running_loop().time()
+        async with client.stream("POST", "/v1/speak", json={"text": text}, headers=AUTH) as resp:
+            chunks = [chunk async for chunk in resp.aiter_raw()]
+        elapsed = asyncio.get_running_loop().time() - started
+    audio = b"".join(chunks)
+    assert resp.headers["content-type"] == "audio/mpeg"
+    assert audio[:2] == b"\xff\xfb"
+    assert 30_000 < len(audio) < 34_000
+    assert elapsed >= len(audio) / 40000 * 0.8
+
+
+async def test_stream_protocol_interims_finals_and_metadata(mock_deepgram):
+    client = AsyncSTTClient("test-key", base_url=f"http://{HOST}:{MOCK_PORT}")
+    params = {"model": "nova-3", "encoding": "linear16", "sample_rate": 16000, "interim_results": True}
+    async with client.open_stream(params) as stream:
+        for _ in range(5):
+            await stream.send_media(bytes(8000))  # 0.25 s each
+        await stream.send_keep_alive()
+        await stream.send_close_stream()
+        events = [(data["start"], data["duration"], is_final) async for data, is_final in stream]
+    assert stream.request_id is not None
+    assert events == [(0.0, 0.5, False), (0.0, 1.0, True), (1.0, 0.25, True)]
+
+
+async def test_stream_limit_rejects_handshake(mock_deepgram):
+    mock_deepgram.state.config.update({"max_streams": 1})
+    client = AsyncSTTClient("test-key", base_url=f"http://{HOST}:{MOCK_PORT}")
+    try:
+        async with client.open_stream({"model": "nova-3"}):
+            with pytest.raises(RuntimeError, match="429"):
+                async with client.open_stream({"model": "nova-3"}):
+                    pass
+    finally:
+        mock_deepgram.state.config.update({"max_streams": 0})
+    assert mock_deepgram.state.stats["streams_rejected"] == 1
+
+
+async def test_sync_client_batch_against_the_mock(mock_deepgram, tmp_path):
+    """STTClient (used by scripts/bulk_transcribe.py) honours an http:// base_url."""
+    audio = tmp_path / "four.wav"
+    audio.write_bytes(_wav(4.0))
+    client = STTClient("test-key", base_url=f"http://{HOST}:{MOCK_PORT}")
+    try:
+        body = await asyncio.to_thread(client.transcribe_batch, str(audio), {"model": "nova-3", "smart_format": True})
+        by_url = await asyncio.to_thread(client.transcribe_batch, "https://example.com/a.wav", {"model": "nova-3"})
+    finally:
+        client.close()
+    assert body["metadata"]["duration"] == 4.0
+    assert by_url["metadata"]["request_id"]
+    assert client.build_url({"model": "nova-3"}, Mode.BATCH) == f"http://{HOST}:{MOCK_PORT}/v1/listen?model=nova-3"
+
+
+async def test_app_streaming_path_can_target_the_mock(mock_deepgram, monkeypatch):
+    """_stt_streaming goes through the real deepgram-sdk client, aimed at the mock."""
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "DEEPGRAM_ENVIRONMENT", DeepgramClientEnvironment(
+        base=f"http://{HOST}:{MOCK_PORT}", production=f"ws://{HOST}:{MOCK_PORT}", agent=f"ws://{HOST}:{MOCK_PORT}",
+    ))
+
+    async def chunks():
+        for _ in range(4):
+            yield bytes(16000)  # 0.5 s of linear16
+
+    result = await app_module._stt_streaming(
+        chunks(), {"model": "nova-3", "encoding": "linear16", "sample_rate": 16000}, "test-key")
+    assert result["segments"] and result["transcript"].startswith("the quick")
@@ -0,0 +1,108 @@
+# tests/test_multiplexer.py
+# Tests for stt/multiplexer.py — many streams serviced by one I/O thread
+import json
+import threading
+
+import pytest
+from websockets.sync.server import serve
+
+from stt.multiplexer import StreamMultiplexer, _FrameReader
+
+
+def _results(transcript, is_final):
+    return json.dumps({"type": "Results", "is_final": is_final,
+                       "channel": {"alternatives": [{"transcript": transcript}]}})
+
+
+def fake_listen(ws):
+    """Deepgram-like endpoint: an interim per audio chunk, a final on CloseStream."""
+    ws.send(json.dumps({"type": "Metadata", "request_id": ws.request.path}))
+    received = 0
+    for msg in ws:
+        if isinstance(msg, bytes):
+            received += len(msg)
+            ws.send(_results(f"heard {received}", False))
+        elif json.loads(msg)["type"] == "CloseStream":
+            ws.send(_results(f"final {received}", True))
+            ws.send("x" * 70000)  # large (64-bit length) frame: must be skipped, not break decoding
+            break
+
+
+@pytest.fixture
+def listen_server():
+    with serve(fake_listen, "127.0.0.1", 0) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.socket.getsockname()[1]}"
+        server.shutdown()
+
+
+def test_frame_reader_handles_partial_and_fragmented_frames():
+    reader = _FrameReader()
+    frames = bytes([0x01, 3]) + b"abc" + bytes([0x00, 2]) + b"de" + bytes([0x80, 1]) + b"f"
+    frames += bytes([0x81, 126]) + (300).to_bytes(2, "big") + b"y" * 300
+    out = []
+    for i in range(len(frames)):  # one byte at a time
+        out += reader.feed(frames[i:i + 1])
+    assert out == [(0x1, b"abcdef"), (0x1, b"y" * 300)]
+
+
+def test_many_streams_share_one_io_thread(listen_server):
+    n = 20
+    transcripts = {}
+    closed = []
+    lock = threading.Lock()
+
+    def make_callbacks(i):
+        def on_transcript(data, is_final):
+            with lock:
+                transcripts.setdefault(i, []).append(
+                    (data["channel"]["alternatives"][0]["transcript"], is_final))
+
+        def on_close():
+            with lock:
+                closed.append(i)
+        return on_transcript, on_close
+
+    with StreamMultiplexer("test-key", base_url=listen_server, callback_workers=2) as mux:
+        handles = []
+        for i in range(n):
+            on_transcript, on_close = make_callbacks(i)
+            handles.append(mux.open_stream({"model": "nova-3"}, on_transcript, on_close=on_close))
+        for handle in handles:
+            assert handle.send_media(b"\x00" * 100)
+            assert handle.send_media(b"\x00" * 100)
+        # one I/O thread + at most 2 callback workers, however many streams are open
+        mux_threads = [t.name for t in threading.enumerate() if t.name.startswith("stt-mux")]
+        assert mux_threads.count("stt-mux-io") == 1 and len(mux_threads) <= 3
+        for handle in handles:
+            handle.send_close_stream()
+            assert not handle.send_media(b"late")
+        for handle in handles:
+            assert handle.wait(5)
+        assert mux.streams == 0
+
+    assert sorted(closed) == list(range(n))
+    for i in range(n):
+        # per-stream callbacks ran in order
+        assert transcripts[i] == [("heard 100", False), ("heard 200", False), ("final 200", True)]
+    assert handles[0].request_id.startswith("/v1/listen?model=nova-3")
+
+
+def test_connect_failure_raises_runtime_error():
+    with StreamMultiplexer("test-key", base_url="http://127.0.0.1:9") as mux:
+        with pytest.raises(RuntimeError, match="connection failed"):
+            mux.open_stream({"model": "nova-3"}, lambda data, is_final: None)
+
+
+def test_sockets_have_io_timeout_and_close_survives_a_stuck_io_thread(listen_server):
+    mux = StreamMultiplexer("test-key", base_url=listen_server, io_timeout=0.5)
+    closed = []
+    handle = mux.open_stream({"model": "nova-3"}, lambda data, is_final: None, on_close=lambda: closed.append("close"))
+    assert handle._ws.sock.gettimeout() == 0.5  # no single peer can block the I/O thread indefinitely
+    mux.close()
+    assert handle.wait(5) and closed == ["close"]
+    # An I/O thread that outlives close() must not submit to the shut-down pool
+    assert not mux._submit(closed.append, "dropped")
+    handle._dispatch(closed.append, "inline")
+    assert closed == ["close", "inline"]
@@ -64,3 +64,31 @@ def test_list_values_kept():
     result = clean_params(params, Mode.STREAMING)
     assert result["redact"] == ["pci", "ssn"]
     assert result["keyterms"] == ["hello:2", "world"]
+
+
+def test_emission_policy_params_not_sent_upstream():
+    params = {"model": "nova-3", "interim_max_rate": 4, "interim_delta": True}
+    result = clean_params(params, Mode.STREAMING)
+    assert "interim_max_rate" not in result
+    assert "interim_delta" not in result
+
+
+def test_listen_url_encodes_bools_lists_and_base_scheme():
+    from stt.options import listen_url
+    params = {"model": "nova-3", "smart_format": True, "redact": ["pci", "ssn"], "interim_max_rate": 4}
+    assert listen_url(params, Mode.STREAMING) == (
+        "wss://api.deepgram.com/v1/listen?model=nova-3&smart_format=true&redact=pci&redact=ssn"
+    )
+    assert listen_url({"model": "nova-3"}, Mode.BATCH, "http://localhost:8080/") == (
+        "http://localhost:8080/v1/listen?model=nova-3"
+    )
+    assert listen_url({}, Mode.STREAMING, "http://localhost:8080").startswith("ws://localhost:8080/v1/listen")
+
+
+def test_listen_url_does_not_validate_or_cache_profiles():
+    from stt import profiles
+    from stt.options import listen_url
+    before = len(profiles._profiles)
+    # "yes" is not a valid smart_format for compile_profile, but listen_url passes it through
+    assert listen_url({"smart_format": "yes"}, Mode.BATCH).endswith("/v1/listen?smart_format=yes")
+    assert len(profiles._profiles) == before
@@ -0,0 +1,80 @@
+# tests/test_profiles.py
+# Tests for stt/profiles.py — validation, mode split and caching of compiled params
+import pytest
+
+from stt.options import Mode
+from stt import profiles
+from stt.profiles import Profile, ProfileError, compile_profile, get_profile, profile_id, register_profile
+
+
+def test_modes_are_split_and_stringified_once():
+    params = {"model": "nova-3", "smart_format": True, "diarize": False, "sample_rate": 16000,
+              "interim_results": True, "paragraphs": True, "redact": ["pci", "ssn"], "interim_max_rate": 4}
+    profile = compile_profile(params)
+    assert dict(profile.streaming) == {"model": "nova-3", "smart_format": "true", "sample_rate": "16000",
+                                       "interim_results": "true", "redact": ("pci", "ssn")}
+    assert dict(profile.batch) == {"model": "nova-3", "smart_format": "true", "sample_rate": "16000",
+                                   "paragraphs": "true", "redact": ("pci", "ssn")}
+    assert profile.query(Mode.BATCH) == "model=nova-3&smart_format=true&sample_rate=16000&paragraphs=true&redact=pci&redact=ssn"
+    assert profile.params["interim_max_rate"] == 4  # server-side option kept, never sent upstream
+
+
+def test_identical_params_share_one_cached_profile():
+    a = compile_profile({"model": "nova-3", "punctuate": True})
+    b = compile_profile({"punctuate": True, "model": "nova-3"})
+    assert a is b and get_profile(a.id) is a
+    assert a.id == profile_id({"model": "nova-3", "punctuate": True})
+    assert compile_profile(a) is a
+    assert compile_profile({"model": "nova-3", "punctuate": True}, default_model="nova-2") is not a
+
+
+def test_default_model_only_fills_a_missing_model():
+    assert compile_profile({}, default_model="nova-2").streaming["model"] == "nova-2"
+    assert compile_profile({"model": "nova-3"}, default_model="nova-2").batch["model"] == "nova-3"
+
+
+def test_profiles_are_immutable():
+    profile = compile_profile({"model": "nova-3"})
+    with pytest.raises(AttributeError):
+        profile.id = "other"
+    with pytest.raises(TypeError):
+        profile.streaming["model"] = "base"
+    assert isinstance(profile, Profile)
+
+
+@pytest.mark.parametrize("params", [
+    {"smart_format": "true"},          # bool in defaults.json
+    {"sample_rate": [16000]},          # number
+    {"redact": "pci"},                 # list
+    {"extra": {"a": {"nested": 1}}},   # dict of scalars
+    {"brand_new_param": {"x": 1}},     # unknown keys must be scalars or lists
+    ["model", "nova-3"],
+])
+def test_invalid_params_are_rejected(params):
+    with pytest.raises(ProfileError):
+        compile_profile(params)
+
+
+def test_unknown_id_raises():
+    with pytest.raises(ProfileError, match="unknown profile"):
+        get_profile("0" * 16)
+
+
+def test_registered_profiles_outlive_the_compile_cache(monkeypatch):
+    monkeypatch.setattr(profiles, "MAX_PROFILES", 2)
+    pinned = register_profile({"model": "nova-3", "numerals": True})
+    transient = compile_profile({"model": "nova-3", "numerals": False})
+    for n in range(3):
+        compile_profile({"model": "nova-3", "tag": f"batch-{n}"})
+    assert get_profile(pinned.id) is pinned and pinned in profiles.registered_profiles()
+    with pytest.raises(ProfileError, match="unknown profile"):
+        get_profile(transient.id)
+
+
+def test_registration_is_bounded(monkeypatch):
+    monkeypatch.setattr(profiles, "_registered", {})
+    monkeypatch.setattr(profiles, "MAX_REGISTERED", 1)
+    first = register_profile({"model": "nova-3", "utterances": True})
+    assert register_profile({"model": "nova-3", "utterances": True}) is first  # re-registering is free
+    with pytest.raises(ProfileError, match="too many"):
+        register_profile({"model": "nova-3", "utterances": False})
@@ -0,0 +1,148 @@
+# tests/test_result_cache.py
+# Tests for the content-addressed result cache (common/result_cache.py)
+import asyncio
+import os
+import time
+
+import pytest
+
+from common.result_cache import ResultCache, cache_key
+
+
+def test_cache_key_ignores_param_order():
+    a = cache_key("batch", "abc", {"model": "nova-3", "smart_format": "true"})
+    b = cache_key("batch", "abc", {"smart_format": "true", "model": "nova-3"})
+    assert a == b
+    assert a != cache_key("streaming", "abc", {"model": "nova-3", "smart_format": "true"})
+    assert a != cache_key("batch", "abd", {"model": "nova-3", "smart_format": "true"})
+
+
+def test_cache_key_normalizes_read_only_mappings():
+    from types import MappingProxyType
+    plain = cache_key("batch", "abc", {"model": "nova-3", "redact": ["pci", "ssn"]})
+    assert cache_key("batch", "abc", MappingProxyType({"redact": ("pci", "ssn"), "model": "nova-3"})) == plain
+
+
+async def test_hit_after_miss_and_lru_eviction():
+    cache = ResultCache(max_entries=2, disk_dir=None)
+    calls = []
+
+    def make(value):
+        async def compute():
+            calls.append(value)
+            return {"v": value}
+        return compute
+
+    assert await cache.get_or_compute("a", make(1)) == ({"v": 1}, "miss")
+    assert await cache.get_or_compute("a", make(2)) == ({"v": 1}, "hit")
+    await cache.get_or_compute("b", make(3))
+    await cache.get_or_compute("c", make(4))  # evicts "a" (least recently used)
+    assert await cache.get_or_compute("a", make(5)) == ({"v": 5}, "miss")
+    assert calls == [1, 3, 4, 5]
+    assert cache.stats()["evictions"] >= 1
+
+
+async def test_concurrent_misses_coalesce():
+    cache = ResultCache(disk_dir=None)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+    assert calls == 1
+    assert sorted(status for _, status in results) == ["coalesced"] * 4 + ["miss"]
+    assert cache.stats()["coalesced"] == 4
+
+
+async def test_errors_are_not_cached_and_propagate_to_waiters():
+    cache = ResultCache(disk_dir=None)
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        cache.get_or_compute("k", boom), cache.get_or_compute("k", boom), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.stats()["entries"] == 0
+
+
+async def test_bypass_skips_lookup_but_refreshes():
+    cache = ResultCache(disk_dir=None)
+
+    async def one():
+        return {"v": 1}
+
+    async def two():
+        return {"v": 2}
+
+    await cache.get_or_compute("k", one)
+    assert await cache.get_or_compute("k", two, bypass=True) == ({"v": 2}, "bypass")
+    assert await cache.get_or_compute("k", one) == ({"v": 2}, "hit")
+
+
+async def test_disk_tier_survives_new_instance_and_expires(tmp_path):
+    first = ResultCache(disk_dir=tmp_path, ttl=60)
+
+    async def compute():
+        return {"v": 1}
+
+    async def fail():
+        pytest.fail("should have been served from disk")
+
+    await first.get_or_compute("k", compute)
+    second = ResultCache(disk_dir=tmp_path, ttl=60)
+    assert await second.get_or_compute("k", fail) == ({"v": 1}, "hit")
+    assert second.stats()["disk_hits"] == 1
+
+    old = time.time() - 120
+    os.utime(tmp_path / "k.json", (old, old))
+    third = ResultCache(disk_dir=tmp_path, ttl=60)
+    assert await third.get_or_compute("k", compute) == ({"v": 1}, "miss")
+
+
+async def test_disk_tier_size_eviction(tmp_path):
+    cache = ResultCache(disk_dir=tmp_path, disk_max_bytes=100)
+
+    async def big():
+        return {"blob": "x" * 60}
+
+    await cache.get_or_compute("a", big)
+    await asyncio.sleep(0.01)
+    await cache.get_or_compute("b", big)
+    assert not (tmp_path / "a.json").exists()
+    assert (tmp_path / "b.json").exists()
+    assert cache.stats()["disk_evictions"] == 1
+
+
+async def test_disk_tier_tracks_size_between_scans(tmp_path):
+    cache = ResultCache(disk_dir=tmp_path, disk_max_bytes=1000)
+
+    async def small():
+        return {"blob": "x" * 60}
+
+    await cache.get_or_compute("a", small)  # first write scans the directory
+    scans = []
+    cache._disk_evict = lambda: scans.append(1)
+    await cache.get_or_compute("b", small)
+    assert scans == [] and cache._disk_bytes == sum(p.stat().st_size for p in tmp_path.glob("*.json"))
+
+
+async def test_short_ttl_stays_in_memory_and_expires(tmp_path):
+    cache = ResultCache(disk_dir=tmp_path, ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"v": len(calls)}
+
+    assert await cache.get_or_compute("url", compute, ttl=0.05) == ({"v": 1}, "miss")
+    assert await cache.get_or_compute("url", compute, ttl=0.05) == ({"v": 1}, "hit")
+    assert not list(tmp_path.glob("*.json"))
+    await asyncio.sleep(0.06)
+    assert await cache.get_or_compute("url", compute, ttl=0.05) == ({"v": 2}, "miss")
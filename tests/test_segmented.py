@@ -0,0 +1,162 @@
+# tests/test_segmented.py
+# Tests for common/segmented.py — cut planning (PCM pauses, MP3 silences and frame boundaries),
+# result stitching, and the segmented /transcribe mode against a mock upstream.
+import asyncio
+import io
+import json
+import os
+import wave
+
+import numpy as np
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from common.audio_index import SeekError, build_index
+from common import segmented
+from common.segmented import merge_results, parse_silences, plan_segments, segment_prefix, Segment
+from tests.test_audio_index import mp3_frame
+
+os.environ.setdefault("DEEPGRAM_API_KEY", "test-key")
+
+RATE = 8000
+
+
+def write_wav(path, spans):
+    """(seconds, loud) spans of 8 kHz mono linear16."""
+    parts = []
+    for seconds, loud in spans:
+        n = int(RATE * seconds)
+        parts.append((8000 * np.sin(np.arange(n) / 3) if loud else np.zeros(n)).astype("<i2").tobytes())
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1), w.setsampwidth(2), w.setframerate(RATE)
+        w.writeframes(b"".join(parts))
+
+
+def test_pcm_is_cut_in_the_pause_nearest_each_target(tmp_path):
+    path = tmp_path / "talk.wav"
+    # Pauses at 9-10 s and 21-22 s; targets fall at 10 s and ~20 s
+    write_wav(path, [(9, True), (1, False), (11, True), (1, False), (8, True)])
+    index = build_index(path)
+    segments = plan_segments(path, index, target=10.0, search=2.5)
+
+    assert [round(s.start, 1) for s in segments] == [0.0, 9.5, 21.5]
+    assert segments[-1].end == 30.0
+    assert segments[0].start_offset == 44
+    assert all(a.end_offset == b.start_offset for a, b in zip(segments, segments[1:]))
+    prefix = segment_prefix(path, index, segments[1])
+    with wave.open(io.BytesIO(prefix + path.read_bytes()[segments[1].start_offset:segments[1].end_offset])) as w:
+        assert w.getnframes() / w.getframerate() == pytest.approx(12.0)
+
+
+def test_mp3_is_cut_on_frame_boundaries(tmp_path):
+    path = tmp_path / "long.mp3"
+    frame = mp3_frame(64)
+    path.write_bytes(frame * 2000)  # ~52 s
+    segments = plan_segments(path, build_index(path), target=20.0)
+    assert len(segments) == 3  # the ~12 s tail is long enough to keep
+    assert all(s.start_offset % len(frame) == 0 for s in segments)
+    assert segments[1].start == pytest.approx(20.0, abs=0.5)
+
+
+def test_mp3_is_cut_in_detected_silence(tmp_path, monkeypatch):
+    path = tmp_path / "long.mp3"
+    frame = mp3_frame(64)
+    path.write_bytes(frame * 2000)  # ~52 s
+    monkeypatch.setattr(segmented, "detect_silences", lambda p, d: [(3.0, 4.0), (17.0, 17.6), (36.6, 37.2)])
+    segments = plan_segments(path, build_index(path), target=20.0, search=5.0)
+    assert [round(s.start) for s in segments] == [0, 17, 37]  # middles of the silences, snapped to frames
+    assert all(s.start_offset % len(frame) == 0 for s in segments)
+
+
+def test_parse_silencedetect_output():
+    log = """[silencedetect @ 0x1] silence_start: -0.01
+[silencedetect @ 0x1] silence_end: 1.5 | silence_duration: 1.51
+size=N/A time=00:00:40.00 bitrate=N/A
+[silencedetect @ 0x1] silence_start: 38.25
+"""
+    assert parse_silences(log, 40.0) == [(0.0, 1.5), (38.25, 40.0)]
+
+
+def test_short_files_and_unsupported_formats(tmp_path):
+    path = tmp_path / "short.wav"
+    write_wav(path, [(3, True)])
+    assert len(plan_segments(path, build_index(path), target=10.0)) == 1
+    webm = tmp_path / "x.webm"
+    webm.write_bytes(b"\x1aE\xdf\xa3" + bytes(100))
+    with pytest.raises(SeekError):
+        plan_segments(webm, build_index(webm))
+
+
+def test_merge_shifts_words_utterances_and_paragraphs():
+    def response(word, request_id):
+        w = {"word": word, "start": 0.5, "end": 0.9, "confidence": 0.8}
+        return {
+            "metadata": {"request_id": request_id, "duration": 10.0},
+            "results": {
+                "channels": [{"alternatives": [{
+                    "transcript": word, "confidence": 0.8, "words": [w],
+                    "paragraphs": {"transcript": f"\n{word}", "paragraphs": [
+                        {"start": 0.5, "end": 0.9, "sentences": [{"text": word, "start": 0.5, "end": 0.9}]}]},
+                }]}],
+                "utterances": [{"start": 0.5, "end": 0.9, "transcript": word, "words": [w]}],
+            },
+        }
+
+    segments = [Segment(0, 44, 100, 0.0, 10.0), Segment(1, 100, 200, 10.0, 25.5)]
+    merged = merge_results([response("hello", "a"), response("world", "b")], segments)
+    alt = merged["results"]["channels"][0]["alternatives"][0]
+    assert alt["transcript"] == "hello world"
+    assert [(w["word"], w["start"]) for w in alt["words"]] == [("hello", 0.5), ("world", 10.5)]
+    assert alt["paragraphs"]["paragraphs"][1]["sentences"][0]["end"] == 10.9
+    assert [u["start"] for u in merged["results"]["utterances"]] == [0.5, 10.5]
+    assert merged["results"]["utterances"][1]["words"][0]["end"] == 10.9
+    assert merged["metadata"]["duration"] == 25.5 and merged["metadata"]["request_ids"] == ["a", "b"]
+
+
+async def test_transcribe_segmented_fans_out_and_merges(monkeypatch):
+    import httpx
+    import app as app_module
+
+    write_wav(app_module.TEMP_DIR / "long_talk.wav",
+              [(9, True), (1, False), (9, True), (1, False), (9, True), (1, False), (9, True)])
+    in_flight, peak, bodies = 0, 0, []
+
+    async def handler(request: httpx.Request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        body = await request.aread()
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        bodies.append(body)
+        with wave.open(io.BytesIO(body)) as w:
+            seconds = w.getnframes() / w.getframerate()
+        word = {"word": f"w{len(bodies)}", "start": 0.25, "end": 0.5, "confidence": 0.9}
+        return httpx.Response(200, json={
+            "metadata": {"request_id": f"r{len(bodies)}", "duration": seconds},
+            "results": {"channels": [{"alternatives": [
+                {"transcript": word["word"], "confidence": 0.9, "words": [word]}]}]},
+        })
+
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+    monkeypatch.setattr(app_module.upstream, "_client", mock)
+    async with AsyncClient(transport=ASGITransport(app=app_module.fastapi_app), base_url="http://test") as client:
+        resp = await client.post("/transcribe", json={
+            "filename": "long_talk.wav", "segmented": True, "segment_seconds": 10, "concurrency": 2,
+            "no_cache": True,
+        })
+        bad = await client.post("/transcribe", json={"url": "https://example.com/a.wav", "segmented": True})
+    await mock.aclose()
+
+    assert resp.status_code == 200, resp.text
+    result = resp.json()
+    timing = result["segmentation"]
+    assert len(timing["segments"]) == len(bodies) == 4
+    assert peak == 2 and timing["concurrency"] == 2
+    assert [round(s["start"]) for s in timing["segments"]] == [0, 10, 20, 30]
+    assert timing["speedup"] > 1.2
+    starts = [w["start"] for w in result["results"]["channels"][0]["alternatives"][0]["words"]]
+    assert starts == sorted(starts) and starts[0] == 0.25 and starts[-1] > 29
+    assert result["metadata"]["duration"] == pytest.approx(39.0)
+    assert json.loads(json.dumps(result)) == result
+    assert bad.status_code == 400
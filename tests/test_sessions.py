@@ -0,0 +1,87 @@
+# tests/test_sessions.py
+# Tests for common/sessions.py — session registry admission control
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from common.sessions import (
+    AdmissionCancelled, AdmissionRejected, SessionRegistry, SessionState, key_id,
+)
+
+
+def test_session_state_is_slotted():
+    state = SessionState("a", "mic")
+    with pytest.raises(AttributeError):
+        state.extra = 1
+    assert state.stop_event is not None and state.ws is None and not state.backpressure
+
+
+async def test_admits_under_limit_and_releases():
+    reg = SessionRegistry(max_streams=2, max_per_key=2, max_queue=0)
+    a, b = SessionState("a", "mic"), SessionState("b", "file")
+    await reg.admit(a)
+    await reg.admit(b)
+    assert reg["a"] is a and len(reg) == 2
+    with pytest.raises(AdmissionRejected) as exc:
+        await reg.admit(SessionState("c", "mic"))
+    assert exc.value.retry_after > 0
+    reg.release(a)
+    assert "a" not in reg
+    await reg.admit(SessionState("c", "mic"))
+    assert reg.occupancy()["rejected_total"] == 1
+
+
+async def test_per_key_limit():
+    reg = SessionRegistry(max_streams=10, max_per_key=1, max_queue=0)
+    await reg.admit(SessionState("a", "mic", api_key="k1"))
+    await reg.admit(SessionState("b", "mic", api_key="k2"))
+    with pytest.raises(AdmissionRejected):
+        await reg.admit(SessionState("c", "mic", api_key="k1"))
+    by_key = reg.occupancy()["by_key"]
+    assert by_key == {key_id("k1"): 1, key_id("k2"): 1}
+    assert "k1" not in str(reg.occupancy())
+
+
+async def test_queued_start_admitted_when_slot_frees():
+    reg = SessionRegistry(max_streams=1, max_queue=4, queue_timeout=2.0)
+    first = SessionState("a", "mic")
+    await reg.admit(first)
+    on_queued = AsyncMock()
+    waiter = asyncio.create_task(reg.admit(SessionState("b", "mic"), on_queued))
+    await asyncio.sleep(0.01)
+    assert reg.is_waiting("b") and reg.occupancy()["queued"] == 1
+    on_queued.assert_awaited_once_with(1)
+    del reg["a"]
+    await asyncio.wait_for(waiter, 1.0)
+    assert "b" in reg and not reg.is_waiting("b")
+
+
+async def test_queue_timeout_rejects():
+    reg = SessionRegistry(max_streams=1, max_queue=4, queue_timeout=0.05)
+    await reg.admit(SessionState("a", "mic"))
+    with pytest.raises(AdmissionRejected):
+        await reg.admit(SessionState("b", "mic"))
+    assert not reg.is_waiting("b") and "b" not in reg
+
+
+async def test_queue_full_rejects_immediately():
+    reg = SessionRegistry(max_streams=1, max_queue=1, queue_timeout=5.0)
+    await reg.admit(SessionState("a", "mic"))
+    waiter = asyncio.create_task(reg.admit(SessionState("b", "mic")))
+    await asyncio.sleep(0.01)
+    with pytest.raises(AdmissionRejected):
+        await reg.admit(SessionState("c", "mic"))
+    assert reg.cancel_wait("b")
+    with pytest.raises(AdmissionCancelled):
+        await waiter
+
+
+async def test_release_ignores_stale_state():
+    """A finished task must not evict a newer session registered on the same sid."""
+    reg = SessionRegistry()
+    old, new = SessionState("a", "mic"), SessionState("a", "mic")
+    reg["a"] = old
+    reg["a"] = new
+    reg.release(old)
+    assert reg["a"] is new and reg.occupancy()["active"] == 1
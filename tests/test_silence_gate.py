@@ -0,0 +1,103 @@
+# tests/test_silence_gate.py
+# Tests for common/silence_gate.py — frame classification, cut bookkeeping and
+# timestamp remapping, plus a gated file stream through the mock Deepgram server.
+import asyncio
+import io
+import wave
+
+import numpy as np
+import pytest
+import socketio
+from deepgram import DeepgramClientEnvironment
+
+from common.silence_gate import SilenceGate
+from tests.conftest import BASE_URL, HOST, MOCK_PORT
+
+RATE = 16000
+
+
+def pcm(*spans) -> bytes:
+    """Concatenate (seconds, loud) spans of 16 kHz mono linear16."""
+    parts = []
+    for seconds, loud in spans:
+        n = int(RATE * seconds)
+        tone = 8000 * np.sin(2 * np.pi * 440 * np.arange(n) / RATE) if loud else np.zeros(n)
+        parts.append(tone.astype("<i2").tobytes())
+    return b"".join(parts)
+
+
+def run(gate: SilenceGate, audio: bytes, chunk: int = 4096) -> bytes:
+    out = b"".join(gate.process(audio[i:i + chunk]) for i in range(0, len(audio), chunk))
+    return out + gate.flush()
+
+
+def test_short_silences_pass_through_untouched():
+    gate = SilenceGate(RATE, min_silence=1.0, pad=0.25)
+    audio = pcm((1, True), (1.2, False), (1, True))
+    assert run(gate, audio) == audio
+    assert gate.stats()["seconds_saved"] == 0.0
+    assert gate.to_original(2.5) == 2.5
+
+
+def test_long_silence_is_cut_and_timestamps_map_back():
+    gate = SilenceGate(RATE, min_silence=1.0, pad=0.2)
+    audio = pcm((1, True), (5, False), (1, True), (3, False), (0.5, True))
+    out = run(gate, audio)
+
+    # Each pause is kept at min_silence + pad = 1.2 s
+    assert len(out) == len(pcm((1, True), (1.2, False), (1, True), (1.2, False), (0.5, True)))
+    assert gate.stats() == {"seconds_in": 10.5, "seconds_sent": 4.9, "seconds_saved": 5.6, "gaps": 2}
+    assert gate.to_original(0.5) == 0.5  # before any cut
+    assert gate.to_original(2.2) == pytest.approx(6.0)  # second tone: 2.2 s upstream, 6 s originally
+    assert gate.to_original(4.4) == pytest.approx(10.0)  # third tone: both cuts apply
+
+
+def test_trailing_silence_stays_dropped():
+    gate = SilenceGate(RATE, min_silence=0.5, pad=0.1)
+    out = run(gate, pcm((1, True), (4, False)))
+    assert len(out) == len(pcm((1, True), (0.5, False)))
+    assert gate.stats()["gaps"] == 0 and gate.stats()["seconds_saved"] == 3.5
+
+
+def test_from_params_needs_linear16_or_wav_format():
+    assert SilenceGate.from_params({"encoding": "linear16"}) is None  # not requested
+    assert SilenceGate.from_params({"silence_gate": True}) is None  # compressed mic audio
+    gate = SilenceGate.from_params({"silence_gate": True, "encoding": "linear16", "sample_rate": 8000,
+                                    "silence_threshold_db": -30, "silence_min_ms": 500})
+    assert (gate.sample_rate, gate.threshold_db, gate.min_silence) == (8000, -30.0, 0.5)
+    assert SilenceGate.from_params({"silence_gate": True}, sample_rate=44100, channels=2).channels == 2
+
+
+async def test_gated_file_stream_reports_savings_and_original_timestamps(server, mock_deepgram, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setenv("DEEPGRAM_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "DEEPGRAM_ENVIRONMENT", DeepgramClientEnvironment(
+        base=f"http://{HOST}:{MOCK_PORT}", production=f"ws://{HOST}:{MOCK_PORT}", agent=f"ws://{HOST}:{MOCK_PORT}",
+    ))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1), w.setsampwidth(2), w.setframerate(RATE)
+        w.writeframes(pcm((1, True), (6, False), (2, True)))
+    (app_module.TEMP_DIR / "gated.wav").write_bytes(buf.getvalue())
+
+    client = socketio.AsyncClient()
+    starts, finished = [], asyncio.get_running_loop().create_future()
+    client.on("transcription_update", lambda data: starts.append(data["start"]) if data["is_final"] else None)
+    client.on("stream_finished", lambda data: finished.done() or finished.set_result(data))
+    await client.connect(BASE_URL, transports=["websocket"])
+    try:
+        await client.emit("start_file_streaming", {
+            "filename": "gated.wav", "pace": "max",
+            "params": {"silence_gate": True, "silence_min_ms": 500},
+        })
+        result = await asyncio.wait_for(finished, timeout=15)
+    finally:
+        await client.disconnect()
+
+    stats = result["silence_stats"]
+    assert stats["enabled"] and stats["gaps"] == 1
+    assert stats["seconds_saved"] == pytest.approx(5.3)  # 6 s pause kept at 0.5 s + 0.2 s pad
+    # The mock finalizes every second of upstream audio; after the cut those seconds
+    # lie 5.3 s later on the file's own timeline
+    assert max(starts) > 6.0
@@ -4,11 +4,14 @@
 import asyncio
 import os
 from pathlib import Path
-from unittest.mock import patch, AsyncMock, MagicMock
+from unittest.mock import patch, AsyncMock
+
+import pytest
 
 os.environ.setdefault("DEEPGRAM_API_KEY", "test-key")
 
 import app
+from common.sessions import SessionState
 from deepgram.core.events import EventType
 
 
@@ -109,10 +112,13 @@ def test_websocket_client_not_in_pyproject():
     assert "websocket-client" not in pyproject, "websocket-client found in pyproject.toml"
 
 
-def test_sessions_dict_exists():
-    """app._sessions must be a module-level dict."""
+def test_sessions_registry_exists():
+    """app._sessions must be a module-level SessionRegistry (sid -> SessionState mapping)."""
+    from collections.abc import MutableMapping
+    from common.sessions import SessionRegistry
     assert hasattr(app, "_sessions"), "app._sessions not found"
-    assert isinstance(app._sessions, dict), "app._sessions is not a dict"
+    assert isinstance(app._sessions, SessionRegistry), "app._sessions is not a SessionRegistry"
+    assert isinstance(app._sessions, MutableMapping)
 
 
 def test_streaming_task_callable():
@@ -128,12 +134,7 @@ def test_streaming_task_callable():
 async def test_audio_chunk_dropped_before_ws_ready():
     """on_audio_stream with ws=None must not raise — drops silently."""
     fake_sid = "test-sid-audio-drop"
-    app._sessions[fake_sid] = {
-        "stop_event": asyncio.Event(),
-        "ws": None,
-        "request_id": None,
-        "task": None,
-    }
+    app._sessions[fake_sid] = SessionState(fake_sid, "mic")
     try:
         # Must not raise even when ws is None
         await app.on_audio_stream(fake_sid, b"\x00\x01\x02\x03")
@@ -144,12 +145,7 @@ async def test_audio_chunk_dropped_before_ws_ready():
 async def test_disconnect_cleans_sessions():
     """disconnect must remove sid from _sessions."""
     fake_sid = "test-sid-disconnect"
-    app._sessions[fake_sid] = {
-        "stop_event": asyncio.Event(),
-        "ws": None,
-        "request_id": None,
-        "task": None,
-    }
+    app._sessions[fake_sid] = SessionState(fake_sid, "mic")
     await app.disconnect(fake_sid)
     assert fake_sid not in app._sessions, "disconnect did not clean up _sessions"
 
@@ -192,3 +188,209 @@ async def test_toggle_transcription_stop_emits_stream_finished(sio_client):
     await sio_client.emit("toggle_transcription", {"action": "stop", "params": {}})
     result = await asyncio.wait_for(future, timeout=10.0)
     assert "request_id" in result
+
+
+async def test_tts_transcribe_both_synthesizes_once(monkeypatch):
+    """mode=both tees one TTS stream into the streaming and batch legs."""
+    import httpx
+    from httpx import AsyncClient, ASGITransport
+
+    calls = {"speak": 0, "listen": 0}
+    listen_bodies = []
+
+    async def handler(request: httpx.Request):
+        if request.url.path == "/v1/speak":
+            calls["speak"] += 1
+            return httpx.Response(200, content=b"mp3" * 5000)
+        calls["listen"] += 1
+        listen_bodies.append(await request.aread())
+        return httpx.Response(200, json={"results": {}})
+
+    mock_ws = MockAsyncV1SocketClient()
+    mock = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream")
+    monkeypatch.setattr(app.upstream, "_client", mock)
+    monkeypatch.setattr(app, "AsyncDeepgramClient", lambda **kw: MockAsyncDeepgramClient(mock_ws))
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app.fastapi_app), base_url="http://test"
+    ) as client:
+        resp = await client.post("/api/tts-transcribe", json={
+            "text": "tee me once", "mode": "both", "no_cache": True,
+        })
+    await mock.aclose()
+
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"batch", "streaming"}
+    assert calls == {"speak": 1, "listen": 1}
+    assert b"".join(mock_ws.send_media_calls) == listen_bodies[0] == b"mp3" * 5000
+
+
+def test_parse_pace():
+    assert app._parse_pace(1) == 1.0
+    assert app._parse_pace("4x") == 4.0
+    assert app._parse_pace("2.5") == 2.5
+    assert app._parse_pace(None) is None
+    assert app._parse_pace("max") is None
+    assert app._parse_pace(" MAX ") is None and app._parse_pace("Unpaced") is None
+    assert app._parse_pace(" 2X ") == 2.0
+    assert app._parse_pace(0) is None
+    for bad in ("nan", float("nan"), "inf", "-1", "fast"):
+        with pytest.raises(ValueError):
+            app._parse_pace(bad)
+
+
+def _write_wav(filename, size, duration):
+    """A mono 16-bit WAV of exactly `size` bytes whose sample rate makes it `duration` s long."""
+    import wave
+    frames = (size - 44) // 2
+    with wave.open(str(app.TEMP_DIR / filename), "wb") as w:
+        w.setnchannels(1), w.setsampwidth(2), w.setframerate(max(1, round(frames / duration)))
+        w.writeframes(b"\x00" * frames * 2)
+
+
+async def _run_file_stream(monkeypatch, pace, duration=0.4, chunks=20):
+    """Run file_streaming_task against a mock socket; return (elapsed, mock_ws)."""
+    import time
+    filename = "pace_test.wav"
+    _write_wav(filename, app.CHUNK_SIZE * chunks, duration)
+    mock_ws = MockAsyncV1SocketClient()
+    monkeypatch.setattr(app, "AsyncDeepgramClient", lambda **kw: MockAsyncDeepgramClient(mock_ws))
+    monkeypatch.setattr(app.sio, "emit", AsyncMock())
+
+    sid = "test-sid-pace"
+    stop_event = asyncio.Event()
+    app._sessions[sid] = SessionState(sid, "file", stop_event=stop_event)
+    started = time.monotonic()
+    await app.file_streaming_task(sid, filename, {}, stop_event, pace)
+    return time.monotonic() - started, mock_ws
+
+
+async def test_file_streaming_real_time_pace_tracks_duration(monkeypatch):
+    elapsed, mock_ws = await _run_file_stream(monkeypatch, pace=1.0)
+    assert len(mock_ws.send_media_calls) == 20
+    assert 0.35 <= elapsed < 0.6
+
+
+async def test_file_streaming_accelerated_pace(monkeypatch):
+    elapsed, _ = await _run_file_stream(monkeypatch, pace=4.0)
+    assert 0.08 <= elapsed < 0.25
+
+
+async def test_file_streaming_unpaced(monkeypatch):
+    elapsed, mock_ws = await _run_file_stream(monkeypatch, pace=None, duration=60.0)
+    assert len(mock_ws.send_media_calls) == 20
+    assert elapsed < 0.5
+
+
+async def test_audio_before_ws_ready_is_buffered_then_sent(monkeypatch):
+    """Frames pushed while Deepgram is connecting are forwarded once the socket opens."""
+    from common.audio_buffer import AudioBuffer
+
+    mock_ws = MockAsyncV1SocketClient()
+    monkeypatch.setattr(app, "AsyncDeepgramClient", lambda **kw: MockAsyncDeepgramClient(mock_ws))
+    monkeypatch.setattr(app.sio, "emit", AsyncMock())
+
+    sid = "test-sid-preconnect"
+    stop_event = asyncio.Event()
+    buffer = AudioBuffer(flush_bytes=1024)
+    app._sessions[sid] = SessionState(sid, "mic", stop_event=stop_event, buffer=buffer)
+    await app.on_audio_stream(sid, b"first-words")
+    task = asyncio.create_task(app.streaming_task(sid, {}, stop_event, buffer))
+    await asyncio.sleep(0.05)
+    await app.on_audio_stream(sid, b"-more")
+    stop_event.set()
+    await task
+
+    assert b"".join(mock_ws.send_media_calls) == b"first-words-more"
+    assert mock_ws.send_close_stream_called
+    finished = [c for c in app.sio.emit.call_args_list if c.args[0] == "stream_finished"]
+    assert finished[0].args[1]["audio_stats"]["dropped_bytes"] == 0
+
+
+def make_results(transcript, start, duration, is_final=True):
+    from deepgram.listen.v1.types import ListenV1Results
+    return ListenV1Results.model_validate({
+        "channel_index": [0, 1], "duration": duration, "start": start, "is_final": is_final,
+        "channel": {"alternatives": [{"transcript": transcript, "confidence": 0.9, "words": []}]},
+        "metadata": {"request_id": "r", "model_info": {"name": "n", "version": "v", "arch": "a"},
+                     "model_uuid": "u"},
+    })
+
+
+async def test_file_streaming_emits_latency_stats_when_requested(monkeypatch):
+    filename = "latency_test.wav"
+    _write_wav(filename, app.CHUNK_SIZE * 4, 1.0)
+    mock_ws = MockAsyncV1SocketClient(controlled_messages=[make_results("hello", 0.0, 0.5)])
+    monkeypatch.setattr(app, "AsyncDeepgramClient", lambda **kw: MockAsyncDeepgramClient(mock_ws))
+    monkeypatch.setattr(app.sio, "emit", AsyncMock())
+
+    sid = "test-sid-latency"
+    stop_event = asyncio.Event()
+    app._sessions[sid] = SessionState(sid, "file", stop_event=stop_event)
+    await app.file_streaming_task(sid, filename, {"latency_stats": True}, stop_event, None)
+
+    events = [c.args[0] for c in app.sio.emit.call_args_list]
+    assert "latency_stats" in events
+    assert events.index("latency_stats") < events.index("stream_finished")
+    stats = next(c.args[1] for c in app.sio.emit.call_args_list if c.args[0] == "latency_stats")
+    assert set(stats) == {"time_to_first_transcript", "interim", "final"}
+
+
+async def _run_range_stream(monkeypatch, messages, stop=False, **kwargs):
+    mock_ws = MockAsyncV1SocketClient(controlled_messages=messages)
+    monkeypatch.setattr(app, "AsyncDeepgramClient", lambda **kw: MockAsyncDeepgramClient(mock_ws))
+    monkeypatch.setattr(app.sio, "emit", AsyncMock())
+    sid = "test-sid-range"
+    stop_event = asyncio.Event()
+    if stop:
+        stop_event.set()  # dropped before any audio went out
+    app._sessions[sid] = SessionState(sid, "file", stop_event=stop_event)
+    await app.file_streaming_task(sid, "range_test.wav", {}, stop_event, None, **kwargs)
+    emitted = {c.args[0]: c.args[1] for c in app.sio.emit.call_args_list}
+    return b"".join(mock_ws.send_media_calls), emitted
+
+
+async def test_file_streaming_time_range_seeks_and_shifts_results(monkeypatch):
+    _write_wav("range_test.wav", 44 + 32000 * 4, 4.0)  # 16 kHz mono, 4 s
+    sent, emitted = await _run_range_stream(
+        monkeypatch, [make_results("later", 0.25, 0.5)], start_time=2.0, end_time=3.0,
+    )
+    assert len(sent) == 44 + 32000 and sent.startswith(b"RIFF")  # header, then 1 s of PCM
+    assert emitted["stream_started"]["start_time"] == 2.0
+    assert emitted["transcription_update"]["start"] == 2.25  # on the file's timeline
+
+
+async def test_file_streaming_resume_starts_at_last_final(monkeypatch):
+    from common.audio_index import load_resume_point
+
+    _write_wav("range_test.wav", 44 + 32000 * 4, 4.0)
+    path = app.TEMP_DIR / "range_test.wav"
+    await _run_range_stream(monkeypatch, [make_results("first", 1.0, 0.5)], stop=True)
+    assert load_resume_point(path) == 1.5
+
+    sent, emitted = await _run_range_stream(monkeypatch, [], resume=True)
+    assert emitted["stream_started"]["start_time"] == 1.5
+    assert len(sent) == 44 + 32000 * 2.5
+    assert load_resume_point(path) is None  # reached the end: nothing left to resume
+
+
+async def test_file_streaming_bad_range_emits_bad_request(monkeypatch):
+    _write_wav("range_test.wav", 44 + 32000 * 4, 4.0)
+    sent, emitted = await _run_range_stream(monkeypatch, [], start_time=9.0)
+    assert sent == b""
+    assert "past the end" in emitted["stream_error"]["message"]
+    assert "stream_finished" in emitted
+
+
+async def test_start_over_capacity_emits_retry_after(monkeypatch):
+    """With no free upstream slot and no queue, a start fails fast with a retry_after hint."""
+    monkeypatch.setattr(app._sessions, "max_streams", 0)
+    monkeypatch.setattr(app._sessions, "max_queue", 0)
+    monkeypatch.setattr(app.sio, "emit", AsyncMock())
+
+    await app.on_toggle_transcription("test-sid-capacity", {"action": "start", "params": {}})
+
+    assert "test-sid-capacity" not in app._sessions
+    event, payload = app.sio.emit.call_args.args
+    assert event == "stream_error"
+    assert payload["retry_after"] > 0
@@ -0,0 +1,96 @@
+# tests/test_tee.py
+# Tests for the single-source audio fan-out (common/tee.py)
+import asyncio
+
+import pytest
+
+from common.tee import AudioTee
+
+
+def counting_source(chunks, delay=0.01):
+    pulls = []
+
+    async def source():
+        pulls.append(1)
+        for c in chunks:
+            await asyncio.sleep(delay)
+            yield c
+
+    return source, pulls
+
+
+async def test_source_pulled_once_for_all_consumers():
+    source, pulls = counting_source([b"a", b"b", b"c"])
+    tee = AudioTee(source)
+
+    async def collect():
+        return b"".join([c async for c in tee.subscribe()])
+
+    live, late, full = await asyncio.gather(collect(), collect(), tee.read_all())
+    assert live == late == full == b"abc"
+    assert len(pulls) == 1
+    assert await tee.read_all() is full  # joined once, shared by every batch consumer
+
+
+async def test_late_subscriber_gets_replay():
+    source, _ = counting_source([b"1", b"2"], delay=0)
+    tee = AudioTee(source)
+    assert await tee.read_all() == b"12"
+    assert [c async for c in tee.subscribe()] == [b"1", b"2"]
+
+
+async def test_read_all_resolves_before_live_consumer_finishes():
+    source, _ = counting_source([b"x"] * 3)
+    tee = AudioTee(source)
+    order = []
+
+    async def slow_consumer():
+        async for _ in tee.subscribe():
+            await asyncio.sleep(0.05)
+        order.append("live")
+
+    async def batch():
+        await tee.read_all()
+        order.append("batch")
+
+    await asyncio.gather(slow_consumer(), batch())
+    assert order == ["batch", "live"]
+
+
+async def test_source_error_reaches_every_consumer():
+    async def broken():
+        yield b"a"
+        raise RuntimeError("tts failed")
+
+    tee = AudioTee(broken)
+    with pytest.raises(RuntimeError):
+        await tee.read_all()
+    with pytest.raises(RuntimeError):
+        async for _ in tee.subscribe():
+            pass
+
+
+async def test_cancelled_source_fails_consumers_instead_of_truncating():
+    started = asyncio.Event()
+
+    async def endless():
+        yield b"a"
+        started.set()
+        await asyncio.Event().wait()
+        yield b"never"
+
+    tee = AudioTee(endless)
+    received = []
+
+    async def consume():
+        async for chunk in tee.subscribe():
+            received.append(chunk)
+
+    consumer = asyncio.create_task(consume())
+    await started.wait()
+    await tee.aclose()
+    with pytest.raises(asyncio.CancelledError):
+        await consumer
+    with pytest.raises(asyncio.CancelledError):
+        await tee.read_all()
+    assert received == [b"a"]
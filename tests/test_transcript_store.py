@@ -0,0 +1,120 @@
+# tests/test_transcript_store.py
+# Tests for common/transcript_store.py — interim replacement, incremental snapshots,
+# the per-session word cap, retention — and the get_transcript / export path in app.py.
+import json
+from unittest.mock import AsyncMock
+
+from deepgram.listen.v1.types import ListenV1Results
+from httpx import ASGITransport, AsyncClient
+
+from common.transcript_store import Transcript, TranscriptStore
+from tests.test_streaming import MockAsyncDeepgramClient, MockAsyncV1SocketClient, _write_wav
+
+
+def words(*items, speaker=None):
+    """(word, start) pairs -> store tuples, each word 0.4 s long."""
+    return [(w, start, start + 0.4, 0.9, speaker) for w, start in items]
+
+
+def test_interims_are_replaced_and_finals_appended():
+    t = Transcript("s1")
+    t.add(words(("hel", 0.0)), is_final=False)
+    t.add(words(("hello", 0.0), ("wor", 0.5)), is_final=False)
+    assert t.snapshot()["interim"]["word"] == ["hello", "wor"] and t.snapshot()["word"] == []
+
+    t.add(words(("hello", 0.0), ("world", 0.5)), is_final=True)
+    t.add(words(("again", 1.0)), is_final=False)
+    snap = t.snapshot()
+    assert snap["word"] == ["hello", "world"] and snap["start"] == [0.0, 0.5] and snap["end"] == [0.4, 0.9]
+    assert snap["confidence"] == [0.9, 0.9] and snap["speaker"] is None
+    assert snap["interim"]["word"] == ["again"] and snap["final_words"] == 2
+
+    t.add(words(("again", 1.0)), is_final=True)
+    since = t.snapshot(since=snap["final_words"])
+    assert since["word"] == ["again"] and since["offset"] == 2 and since["interim"] is None
+
+
+def test_word_cap_drops_the_oldest_finals():
+    t = Transcript("s1", max_words=16)
+    for i in range(40):
+        t.add(words((f"w{i}", float(i))), is_final=True)
+    snap = t.snapshot()
+    assert len(snap["word"]) <= 16 and snap["word"][-1] == "w39"
+    assert snap["dropped"] + len(snap["word"]) == snap["final_words"] == 40
+    assert t.snapshot(since=38)["word"] == ["w38", "w39"]
+    assert t.snapshot(since=0)["offset"] == snap["dropped"]  # dropped words can't be replayed
+    assert t.stats() == {"words": 40, "dropped": snap["dropped"], "duration": 39.4}
+
+
+def test_text_export_groups_speaker_turns():
+    t = Transcript("s1")
+    t.add(words(("hi", 0.0), ("there", 0.5), speaker=0), is_final=True)
+    t.add(words(("hello", 1.0), speaker=1.0), is_final=True)  # the SDK reports speakers as floats
+    assert t.export("text") == "[Speaker 0] hi there\n[Speaker 1] hello"
+    assert t.export("json")["speaker"] == [0, 0, 1]
+
+
+def test_store_retains_finished_transcripts_within_bounds():
+    store = TranscriptStore(max_finished=2)
+    first = store.open("a")
+    store.open("b"), store.open("c")
+    assert store.get("a") is first and first.live
+    for sid in ("a", "b", "c"):
+        store.finish(sid)
+    assert store.get("a") is None and not store.get("c").live  # oldest evicted past max_finished
+    assert store.stats() == {"live": 0, "finished": 2, "words": 0}
+
+    old = store.open("c")
+    new = store.open("c")  # a new stream on the same sid
+    store.finish("c", old)  # the old stream ending late must not retire the new one
+    assert store.get("c") is new and new.live
+
+
+def _result(pairs, is_final, start=0.0):
+    return ListenV1Results.model_validate({
+        "channel_index": [0, 1], "duration": 1.0, "start": start, "is_final": is_final,
+        "channel": {"alternatives": [{
+            "transcript": " ".join(w for w, _ in pairs), "confidence": 0.9,
+            "words": [{"word": w.lower(), "punctuated_word": w, "start": s, "end": s + 0.4, "confidence": 0.8}
+                      for w, s in pairs],
+        }]},
+        "metadata": {"request_id": "r", "model_info": {"name": "n", "version": "v", "arch": "a"}, "model_uuid": "u"},
+    })
+
+
+async def test_file_stream_transcript_is_served_after_the_stream(monkeypatch, tmp_path):
+    import app
+
+    _write_wav("transcript_test.wav", app.CHUNK_SIZE * 4, 1.0)
+    mock_ws = MockAsyncV1SocketClient([
+        _result([("Good", 0.1)], False),
+        _result([("Good", 0.1), ("morning.", 0.6)], True),
+        _result([("How", 1.1)], True, start=1.0),
+    ])
+    monkeypatch.setattr(app, "AsyncDeepgramClient", lambda **kw: MockAsyncDeepgramClient(mock_ws))
+    monkeypatch.setattr(app.sio, "emit", AsyncMock())
+    monkeypatch.setattr(app, "TRANSCRIPT_DIR", str(tmp_path))
+
+    await app.file_streaming_task("sid-transcript", "transcript_test.wav", {}, app.asyncio.Event(), None)
+
+    emitted = {c.args[0]: c.args[1] for c in app.sio.emit.call_args_list}
+    assert emitted["stream_finished"]["transcript"] == {"words": 3, "dropped": 0, "duration": 1.5}
+    token = emitted["stream_started"]["transcript_token"]
+    assert (await app.on_get_transcript("sid-transcript"))["word"] == ["Good", "morning.", "How"]  # the owner
+    snap = await app.on_get_transcript("sid-reloaded", {"sid": "sid-transcript", "token": token})
+    assert snap["word"] == ["Good", "morning.", "How"] and not snap["live"] and snap["kind"] == "file"
+    since = await app.on_get_transcript("sid-reloaded", {"sid": "sid-transcript", "token": token, "since": 2})
+    assert since["word"] == ["How"]
+    assert "error" in await app.on_get_transcript("sid-unknown")
+    assert "error" in await app.on_get_transcript("sid-other", {"sid": "sid-transcript"})
+    assert "error" in await app.on_get_transcript("sid-other", {"sid": "sid-transcript", "token": "guess"})
+    assert json.loads((tmp_path / "sid-transcript.json").read_text())["word"] == snap["word"]
+
+    async with AsyncClient(transport=ASGITransport(app=app.fastapi_app), base_url="http://test") as client:
+        url = "/api/sessions/sid-transcript/transcript"
+        text = await client.get(url, params={"format": "text", "token": token})
+        no_token = await client.get(url)
+        missing = await client.get("/api/sessions/nope/transcript", params={"token": token})
+        bad = await client.get(url, params={"format": "srt", "token": token})
+    assert text.text == "Good morning. How"
+    assert no_token.status_code == missing.status_code == 404 and bad.status_code == 400
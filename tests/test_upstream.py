@@ -0,0 +1,54 @@
+# tests/test_upstream.py
+# Tests for the shared Deepgram REST connection pool (common/upstream.py)
+import os
+
+os.environ.setdefault("DEEPGRAM_API_KEY", "test-key")
+
+from httpx import AsyncClient, ASGITransport
+from app import fastapi_app
+from common.upstream import UpstreamPool
+from tests.conftest import BASE_URL
+
+
+async def test_pool_reuses_connection(server):
+    """Two sequential requests through the pool share one keep-alive connection."""
+    pool = UpstreamPool(base_url=BASE_URL)
+    try:
+        for _ in range(2):
+            resp = await pool.client.get("/")
+            assert resp.status_code == 200
+        stats = pool.stats()
+        assert stats["requests"] == 2
+        assert stats["connects"] == 1
+        assert stats["connections"] == 1
+        assert stats["idle"] == 1
+        assert stats["in_use"] == 0
+    finally:
+        await pool.aclose()
+
+
+async def test_pool_reopens_after_close():
+    pool = UpstreamPool(base_url="http://example.invalid/")
+    first = pool.client
+    await pool.aclose()
+    assert first.is_closed
+    assert pool.client is not first
+    assert pool.base_url == "http://example.invalid"
+    await pool.aclose()
+
+
+async def test_upstream_stats_route():
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        resp = await client.get("/api/upstream-stats")
+    assert resp.status_code == 200
+    body = resp.json()
+    for key in ("in_use", "idle", "connects", "tls_handshakes", "base_url"):
+        assert key in body
+
+
+def test_websocket_base_follows_rest_base():
+    from common.upstream import websocket_base
+    assert websocket_base("https://api.deepgram.com") == "wss://api.deepgram.com"
+    assert websocket_base("http://127.0.0.1:8080/") == "ws://127.0.0.1:8080"